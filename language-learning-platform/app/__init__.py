@@ -1,9 +1,12 @@
 
 from flask import Flask
 from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from flask_cors import CORS
 from app.models import db
+from app.db_pool import configure_engine_options, register_pool_listeners, pool_metrics
+from app.json_provider import FastJSONProvider
+from app.compression import init_compression
 from app.api.auth_routes import auth_bp
 from app.api.user_routes import user_bp
 from app.api.activity_routes import activity_bp
@@ -23,6 +26,7 @@ from app.api.enhanced_analytics_routes import analytics_bp as enhanced_analytics
 from app.api.enhanced_question_routes import enhanced_assessment_bp, enhanced_activity_bp
 from app.api.vocabulary_routes import vocabulary_bp
 from app.api.notifications_routes import notifications_bp
+from app.api.dashboard_routes import dashboard_bp
 from config import config
 
 migrate = Migrate()
@@ -33,9 +37,12 @@ def create_app(config_name='development'):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    app.json = FastJSONProvider(app)  # orjson-backed jsonify and request.get_json
     
     # Initialize extensions
+    configure_engine_options(app)
     db.init_app(app)
+    register_pool_listeners(app, db)
     migrate.init_app(app, db)
     jwt.init_app(app)
     
@@ -45,6 +52,9 @@ def create_app(config_name='development'):
          allow_headers=['Content-Type', 'Authorization'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
     
+    # gzip/brotli response bodies, negotiated per request
+    init_compression(app)
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/user')
@@ -77,6 +87,9 @@ def create_app(config_name='development'):
     # Register notifications blueprint
     app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
     
+    # Register composite home screen dashboard blueprint
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    
     # Also register with singular 'test' for alternative URL patterns
     app.register_blueprint(test_bp, url_prefix='/api/test', name='test_singular')
     
@@ -85,4 +98,12 @@ def create_app(config_name='development'):
     def health_check():
         return {'status': 'healthy', 'message': 'Telugu-English Learning Platform is running!'}
     
+    # Connection pool telemetry (occupancy, overflow, checkout wait times);
+    # signed-in users only, and not served in production unless enabled
+    if app.config.get('DB_POOL_METRICS_ENABLED'):
+        @app.route('/health/db-pool')
+        @jwt_required()
+        def db_pool_health():
+            return {'pools': pool_metrics(db)}
+    
     return app
@@ -1,15 +1,31 @@
 
 from flask import Blueprint, request, jsonify
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.activity_search_service import ActivitySearchService
+from app.services.analytics_service import AnalyticsService
+from app.services.service_registry import lazy_service
 from app.models import db, Activity, LearningPath, UserActivityLog
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import load_only
 import base64
 import io
-from PIL import Image
 from datetime import datetime, timedelta
 
 activity_bp = Blueprint('activity', __name__)
-activity_service = ActivityGeneratorService()
+activity_service = lazy_service(ActivityGeneratorService)
+
+# Column projections for list endpoints: rows are rendered from these alone, so
+# the large JSON columns (activity content, log responses/timelines) stay in the database.
+ACTIVITY_LIST_COLUMNS = (
+    Activity.id, Activity.title, Activity.activity_type, Activity.difficulty_level,
+    Activity.estimated_duration_minutes, Activity.points_reward, Activity.order_in_path,
+    Activity.learning_path_id, Activity.created_at, Activity.content_preview
+)
+ACTIVITY_LOG_SUMMARY_COLUMNS = (
+    UserActivityLog.id, UserActivityLog.user_id, UserActivityLog.activity_id,
+    UserActivityLog.completed_at, UserActivityLog.score, UserActivityLog.max_score,
+    UserActivityLog.time_spent_minutes, UserActivityLog.is_completed, UserActivityLog.attempt_number
+)
 
 @activity_bp.route('/generate/quiz', methods=['POST'])
 def generate_quiz():
@@ -172,6 +188,7 @@ def analyze_image():
         
         # Decode base64 image
         try:
+            from PIL import Image
             image_data = base64.b64decode(data['image'])
             image = Image.open(io.BytesIO(image_data))
         except Exception as e:
@@ -349,7 +366,7 @@ def get_user_activities():
         per_page = request.args.get('per_page', 10, type=int)
         
         # Build query
-        query = Activity.query
+        query = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS))
         
         if learning_path_id:
             query = query.filter(Activity.learning_path_id == learning_path_id)
@@ -364,7 +381,7 @@ def get_user_activities():
         )
         
         # Get user's completed activities
-        completed_logs = UserActivityLog.query.filter_by(user_id=user_id).all()
+        completed_logs = UserActivityLog.query.options(load_only(*ACTIVITY_LOG_SUMMARY_COLUMNS)).filter_by(user_id=user_id).all()
         completed_activity_ids = {log.activity_id: log for log in completed_logs}
         
         activity_list = []
@@ -567,7 +584,48 @@ def submit_activity_answer(activity_id):
                 )
                 db.session.add(activity_log)
             
-            db.session.commit()
+            activity_log = existing_log or activity_log
+            db.session.flush()
+            
+            # Record analytics in the same transaction as the activity log
+            percentage = round((score / max_score * 100), 1) if max_score > 0 else 0
+            points_earned = activity.points_reward if score >= (max_score * 0.7) else int(activity.points_reward * 0.5)
+            analytics = AnalyticsService.unit_of_work()
+            if isinstance(feedback, dict):
+                for question_index, (question_key, result) in enumerate(feedback.items()):
+                    if not isinstance(result, dict) or 'correct' not in result:
+                        continue
+                    analytics.record_activity_question_response(
+                        activity_log.id, user_id, activity_id, question_index,
+                        {
+                            'text': str(question_key),
+                            'type': activity.activity_type,
+                            'correct_answer': result.get('correct_answer'),
+                            'difficulty_level': activity.difficulty_level,
+                            'skill_area': activity.skill_area
+                        },
+                        str(result.get('user_answer')) if result.get('user_answer') is not None else None,
+                        bool(result.get('correct')),
+                        ai_feedback=result.get('explanation'),
+                        activity_log_completed_at=activity_log.completed_at
+                    )
+            analytics.update_learning_streaks(user_id, activity.activity_type, activity.skill_area)
+            analytics.record_learning_event(
+                user_id, 'activity_completed',
+                event_subtype=f'{activity.activity_type}_completed',
+                related_id=activity.id,
+                related_type='activity',
+                points_earned=points_earned,
+                skill_areas_affected=[activity.skill_area] if activity.skill_area else None,
+                difficulty_level=activity.difficulty_level,
+                performance_score=percentage,
+                time_spent_minutes=time_spent
+            )
+            if not analytics.commit():
+                return jsonify({
+                    'error': 'Failed to submit activity',
+                    'telugu_message': 'కార్యకలాపం సమర్పించడంలో విఫలం'
+                }), 500
             
             return jsonify({
                 'message': 'Activity submitted successfully!',
@@ -575,9 +633,9 @@ def submit_activity_answer(activity_id):
                 'evaluation': {
                     'score': score,
                     'max_score': max_score,
-                    'percentage': round((score / max_score * 100), 1) if max_score > 0 else 0,
+                    'percentage': percentage,
                     'feedback': feedback,
-                    'points_earned': activity.points_reward if score >= (max_score * 0.7) else int(activity.points_reward * 0.5)
+                    'points_earned': points_earned
                 },
                 'user_progress': {
                     'attempt_number': existing_log.attempt_number if existing_log else 1,
@@ -585,6 +643,8 @@ def submit_activity_answer(activity_id):
                     'total_time_spent': (existing_log.time_spent_minutes or 0) + time_spent if existing_log else time_spent
                 }
             }), 200
+        
+        return protected_route()
             
     except Exception as e:
         return jsonify({
@@ -611,11 +671,13 @@ def get_learning_path_activities(learning_path_id):
             }), 404
         
         # Get activities in order
-        activities = Activity.query.filter_by(learning_path_id=learning_path_id)\
+        activities = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS))\
+                                 .filter_by(learning_path_id=learning_path_id)\
                                  .order_by(Activity.order_in_path).all()
         
         # Get user's progress for these activities
-        completed_logs = UserActivityLog.query.filter_by(user_id=user_id)\
+        completed_logs = UserActivityLog.query.options(load_only(*ACTIVITY_LOG_SUMMARY_COLUMNS))\
+                                             .filter_by(user_id=user_id)\
                                              .filter(UserActivityLog.activity_id.in_([a.id for a in activities]))\
                                              .all()
         completed_dict = {log.activity_id: log for log in completed_logs}
@@ -699,7 +761,8 @@ def get_next_activity():
         
         for learning_path in user.enrolled_paths:
             # Get activities in order
-            activities = Activity.query.filter_by(learning_path_id=learning_path.id)\
+            activities = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS))\
+                                     .filter_by(learning_path_id=learning_path.id)\
                                      .order_by(Activity.order_in_path).all()
             
             # Find first incomplete activity
@@ -757,7 +820,7 @@ def get_user_activity_summary():
         user_id = int(get_jwt_identity())
         
         # Get all user's activity logs
-        logs = UserActivityLog.query.filter_by(user_id=user_id).all()
+        logs = UserActivityLog.query.options(load_only(*ACTIVITY_LOG_SUMMARY_COLUMNS)).filter_by(user_id=user_id).all()
         
         if not logs:
             return jsonify({
@@ -788,7 +851,7 @@ def get_user_activity_summary():
         # Calculate total points (assuming full points for 70%+ scores, half points otherwise)
         total_points = 0
         activity_ids = [log.activity_id for log in logs]
-        activities = Activity.query.filter(Activity.id.in_(activity_ids)).all()
+        activities = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS)).filter(Activity.id.in_(activity_ids)).all()
         activity_points = {a.id: a.points_reward for a in activities}
         
         for log in logs:
@@ -875,7 +938,7 @@ def get_all_activities():
         per_page = min(request.args.get('per_page', 20, type=int), 100)  # Max 100 per page
         
         # Build query
-        query = Activity.query
+        query = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS))
         
         # Apply filters
         if activity_type:
@@ -937,7 +1000,7 @@ def get_all_activities():
                 'points_reward': activity.points_reward,
                 'learning_path_id': activity.learning_path_id,
                 'created_at': activity.created_at.isoformat(),
-                'content_preview': str(activity.content)[:200] + "..." if len(str(activity.content)) > 200 else str(activity.content)
+                'content_preview': activity.content_preview
             })
         
         return jsonify({
@@ -1084,7 +1147,9 @@ def get_my_generated_activities():
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         
         # Get user's activity logs with activities
-        query = db.session.query(Activity, UserActivityLog).join(
+        query = db.session.query(Activity, UserActivityLog).options(
+            load_only(*ACTIVITY_LIST_COLUMNS), load_only(*ACTIVITY_LOG_SUMMARY_COLUMNS)
+        ).join(
             UserActivityLog, Activity.id == UserActivityLog.activity_id
         ).filter(UserActivityLog.user_id == current_user_id)
         
@@ -1411,7 +1476,9 @@ def get_bookmarked_activities():
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         
         # Get bookmarked activities
-        query = db.session.query(Activity, UserActivityLog).join(
+        query = db.session.query(Activity, UserActivityLog).options(
+            load_only(*ACTIVITY_LIST_COLUMNS), load_only(UserActivityLog.id, UserActivityLog.user_response)
+        ).join(
             UserActivityLog, Activity.id == UserActivityLog.activity_id
         ).filter(
             UserActivityLog.user_id == current_user_id,
@@ -1492,7 +1559,10 @@ def search_activities():
         # Build base query
         if completion_status in ['completed', 'not_completed', 'bookmarked']:
             # Query with user activity logs
-            query = db.session.query(Activity, UserActivityLog).join(
+            query = db.session.query(Activity, UserActivityLog).options(
+                load_only(*ACTIVITY_LIST_COLUMNS),
+                load_only(*ACTIVITY_LOG_SUMMARY_COLUMNS, UserActivityLog.user_response)
+            ).join(
                 UserActivityLog, Activity.id == UserActivityLog.activity_id
             ).filter(UserActivityLog.user_id == current_user_id)
             
@@ -1504,21 +1574,13 @@ def search_activities():
                 query = query.filter(UserActivityLog.user_response.contains({'bookmarked': True}))
         else:
             # Query activities only
-            query = Activity.query
+            query = Activity.query.options(load_only(*ACTIVITY_LIST_COLUMNS))
         
-        # Apply keyword search
+        # Apply keyword search against the full-text index
+        search_matches = None
         if keyword:
-            keyword_filter = f"%{keyword}%"
-            if completion_status in ['completed', 'not_completed', 'bookmarked']:
-                query = query.filter(
-                    Activity.title.ilike(keyword_filter) |
-                    Activity.content.astext.ilike(keyword_filter)
-                )
-            else:
-                query = query.filter(
-                    Activity.title.ilike(keyword_filter) |
-                    Activity.content.astext.ilike(keyword_filter)
-                )
+            search_matches = ActivitySearchService.ranked_matches(keyword)
+            query = query.join(search_matches, Activity.id == search_matches.c.activity_id)
         
         # Apply other filters
         if activity_type:
@@ -1570,17 +1632,11 @@ def search_activities():
         
         # Apply sorting
         if sort_by == 'relevance' and keyword:
-            # Simple relevance scoring: title matches first, then content matches
-            if completion_status in ['completed', 'not_completed', 'bookmarked']:
-                query = query.order_by(
-                    Activity.title.ilike(f"%{keyword}%").desc(),
-                    Activity.created_at.desc()
-                )
-            else:
-                query = query.order_by(
-                    Activity.title.ilike(f"%{keyword}%").desc(),
-                    Activity.created_at.desc()
-                )
+            # Engine-computed relevance (ts_rank on PostgreSQL, BM25 on SQLite)
+            query = query.order_by(
+                search_matches.c.rank.desc(),
+                Activity.created_at.desc()
+            )
         else:
             # Standard sorting
             sort_attr = getattr(Activity, sort_by, None) if hasattr(Activity, sort_by) else Activity.created_at
@@ -1596,6 +1652,15 @@ def search_activities():
         offset = (page - 1) * per_page
         results = query.offset(offset).limit(per_page).all()
         
+        # Engine-generated highlights for the current page only
+        highlights = {}
+        if keyword:
+            page_ids = [
+                (result[0] if completion_status in ['completed', 'not_completed', 'bookmarked'] else result).id
+                for result in results
+            ]
+            highlights = ActivitySearchService.highlights(keyword, page_ids)
+        
         # Format results
         search_results = []
         for result in results:
@@ -1635,10 +1700,9 @@ def search_activities():
             
             # Add keyword highlighting if keyword search was used
             if keyword:
-                highlighted_title = activity.title.replace(
-                    keyword, f"**{keyword}**"
-                ) if keyword.lower() in activity.title.lower() else activity.title
-                activity_data['highlighted_title'] = highlighted_title
+                highlight = highlights.get(activity.id, {})
+                activity_data['highlighted_title'] = highlight.get('highlighted_title') or activity.title
+                activity_data['snippet'] = highlight.get('snippet')
             
             search_results.append(activity_data)
         
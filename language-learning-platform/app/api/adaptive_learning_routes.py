@@ -1,20 +1,25 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_sock import Sock
 from app.services.comprehensive_assessment_service import ComprehensiveAssessmentService
 from app.services.adaptive_learning_path_generator import AdaptiveLearningPathGenerator
 from app.services.real_time_performance_monitor import RealTimePerformanceMonitor
 from app.services.adaptive_learning_service import AdaptiveLearningAlgorithm
+from app.services.service_registry import lazy_service
 from app.models import db, User, LearningPath, Activity, UserActivityLog
+from itsdangerous import URLSafeTimedSerializer, BadData
 from datetime import datetime
 import logging
+import time
 
 adaptive_learning_bp = Blueprint('adaptive_learning', __name__)
+sock = Sock()
 
 # Initialize services
-assessment_service = ComprehensiveAssessmentService()
-path_generator = AdaptiveLearningPathGenerator()
-performance_monitor = RealTimePerformanceMonitor()
-adaptive_algorithm = AdaptiveLearningAlgorithm()
+assessment_service = lazy_service(ComprehensiveAssessmentService)
+path_generator = lazy_service(AdaptiveLearningPathGenerator)
+performance_monitor = lazy_service(RealTimePerformanceMonitor)
+adaptive_algorithm = lazy_service(AdaptiveLearningAlgorithm)
 
 
 @adaptive_learning_bp.route('/assessment/comprehensive/start', methods=['POST'])
@@ -177,13 +182,12 @@ def get_next_adaptive_activity():
 
 @adaptive_learning_bp.route('/activity/<int:activity_id>/start-session', methods=['POST'])
 @jwt_required()
-def start_activity_session():
+def start_activity_session(activity_id):
     """
     Start a monitored learning session for real-time adaptation.
     """
     try:
         user_id = int(get_jwt_identity())
-        activity_id = request.view_args['activity_id']
         
         session_result = performance_monitor.start_learning_session(user_id, activity_id)
         
@@ -457,7 +461,7 @@ def get_activity_recommendations():
         count = int(request.args.get('count', 5))
         
         recommendations = adaptive_algorithm.recommend_next_activities(
-            user_id, learning_path_id, count
+            user_id, learning_path_id, count, request.args.get('skill_area')
         )
         
         return jsonify({
@@ -472,4 +476,179 @@ def get_activity_recommendations():
         return jsonify({
             'error': 'Failed to get recommendations',
             'details': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@adaptive_learning_bp.route('/activity/<int:activity_id>/related', methods=['GET'])
+@jwt_required()
+def get_related_activities(activity_id):
+    """
+    Get activities similar in content to the given one that the user hasn't
+    completed yet, for "more like this" and related-concept practice.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        count = request.args.get('count', 5, type=int)
+        
+        related = adaptive_algorithm.find_related_activities(user_id, activity_id, count=count)
+        
+        return jsonify({
+            'activity_id': activity_id,
+            'related_activities': related,
+            'total_related': len(related)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting related activities: {str(e)}")
+        return jsonify({
+            'error': 'Failed to get related activities',
+            'details': str(e)
+        }), 500
+
+
+# Browsers can't set headers on a WebSocket handshake, so the live channel
+# also accepts the JWT as ?jwt=<token>. The event stream takes a short-lived
+# ticket in the URL instead (see /session/events/ticket), so the bearer token
+# itself never lands in access or proxy logs.
+LIVE_TOKEN_LOCATIONS = ['headers', 'query_string']
+_EVENTS_TICKET_SALT = 'session-events'
+
+
+def _events_ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=_EVENTS_TICKET_SALT)
+
+
+def _parse_event_id(event_id):
+    """(session_id, seq) from an event id of the form <session_id>:<seq>, or (None, 0)."""
+    session_id, _, seq = (event_id or '').rpartition(':')
+    return (session_id, int(seq)) if session_id and seq.isdigit() else (None, 0)
+
+
+@sock.route('/session/live', bp=adaptive_learning_bp)
+def live_learning_session(ws):
+    """
+    WebSocket channel for a live learning session. The token is checked once
+    per connection. Client messages are JSON objects with a `type`:
+    start (activity_id), interaction (the track-interaction fields),
+    adaptive_content (accuracy), end and ping. Every interaction is answered
+    with a tracking_result, followed by any intervention and adaptive_content
+    events it raised.
+    """
+    try:
+        verify_jwt_in_request(locations=LIVE_TOKEN_LOCATIONS)
+        user_id = int(get_jwt_identity())
+    except Exception as e:
+        ws.send(current_app.json.dumps({'type': 'error', 'error': 'Authentication required', 'details': str(e)}))
+        ws.close(reason=1008)
+        return
+    
+    idle_timeout = current_app.config.get('LIVE_SESSION_IDLE_SECONDS', 600)
+    while True:
+        raw = ws.receive(timeout=idle_timeout)
+        if raw is None:
+            ws.close(reason=1000, message='Idle timeout')
+            return
+        
+        try:
+            message = current_app.json.loads(raw)
+            message_type = message.get('type')
+        except (ValueError, AttributeError):
+            ws.send(current_app.json.dumps({'type': 'error', 'error': 'Messages must be JSON objects'}))
+            continue
+        
+        if message_type == 'interaction':
+            missing = [field for field in ('is_correct', 'response_time_seconds') if field not in message]
+            if missing:
+                ws.send(current_app.json.dumps({'type': 'error', 'error': f'{missing[0]} is required'}))
+                continue
+            result, live_events = performance_monitor.track_live_interaction(user_id, message)
+            ws.send(current_app.json.dumps({'type': 'tracking_result', **result}))
+            for live_event in live_events:
+                ws.send(current_app.json.dumps(live_event))
+        elif message_type == 'start':
+            result = performance_monitor.start_learning_session(user_id, message.get('activity_id'))
+            ws.send(current_app.json.dumps({'type': 'session_started', **result}))
+        elif message_type == 'adaptive_content':
+            result = performance_monitor.generate_adaptive_content(user_id, message)
+            ws.send(current_app.json.dumps({'type': 'adaptive_content', **result}))
+        elif message_type == 'end':
+            result = performance_monitor.end_learning_session(user_id)
+            ws.send(current_app.json.dumps({'type': 'session_ended', **result}, default=str))
+            ws.close(reason=1000)
+            return
+        elif message_type == 'ping':
+            ws.send(current_app.json.dumps({'type': 'pong'}))
+        else:
+            ws.send(current_app.json.dumps({'type': 'error', 'error': f'Unknown message type: {message_type}'}))
+
+
+@adaptive_learning_bp.route('/session/events/ticket', methods=['POST'])
+@jwt_required()
+def create_session_events_ticket():
+    """
+    Ticket for opening /session/events with EventSource, which can't send an
+    Authorization header. It is valid for LIVE_EVENTS_TICKET_SECONDS and only
+    for that stream; fetch a new one whenever the stream has to be reopened.
+    """
+    user_id = int(get_jwt_identity())
+    return jsonify({
+        'ticket': _events_ticket_serializer().dumps(user_id),
+        'expires_in': current_app.config.get('LIVE_EVENTS_TICKET_SECONDS', 60)
+    }), 200
+
+
+@adaptive_learning_bp.route('/session/events', methods=['GET'])
+def stream_session_events():
+    """
+    Server-sent events fallback for clients that can't open the WebSocket:
+    interactions are posted to /session/track-interaction as usual (on any
+    worker) and the interventions and adaptive content they raise are pushed
+    here. Authenticated by the Authorization header or ?ticket=. Event ids are
+    <session_id>:<seq>, so a reconnect (Last-Event-ID) resumes within the same
+    session and starts from the beginning of a new one.
+    """
+    ticket = request.args.get('ticket')
+    try:
+        if ticket:
+            user_id = int(_events_ticket_serializer().loads(
+                ticket, max_age=current_app.config.get('LIVE_EVENTS_TICKET_SECONDS', 60)
+            ))
+        else:
+            verify_jwt_in_request(locations=['headers'])
+            user_id = int(get_jwt_identity())
+    except (BadData, ValueError, TypeError) as e:
+        return jsonify({'error': 'Invalid or expired ticket', 'details': str(e)}), 401
+
+    last_session_id, last_seq = _parse_event_id(
+        request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    )
+    poll_interval = current_app.config.get('LIVE_EVENTS_POLL_SECONDS', 0.5)
+    max_duration = current_app.config.get('LIVE_EVENTS_MAX_STREAM_SECONDS', 300)
+    
+    def events():
+        session_id, seq = last_session_id, last_seq
+        started = last_sent = time.monotonic()
+        yield f"retry: {int(poll_interval * 2000)}\n\n"
+        while time.monotonic() - started < max_duration:
+            state = performance_monitor.active_sessions.get(user_id)
+            if state is None:
+                yield "event: session_ended\ndata: {}\n\n"
+                return
+            if state.get('session_id') != session_id:
+                # A different session, whose numbering starts over
+                session_id, seq = state.get('session_id'), 0
+            for live_event in state.get('live_events', []):
+                if live_event['seq'] > seq:
+                    seq = live_event['seq']
+                    last_sent = time.monotonic()
+                    yield f"id: {session_id}:{seq}\nevent: {live_event['type']}\n" \
+                          f"data: {current_app.json.dumps(live_event)}\n\n"
+            if time.monotonic() - last_sent > 15:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            time.sleep(poll_interval)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
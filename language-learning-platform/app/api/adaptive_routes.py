@@ -1,13 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.adaptive_learning_service import AdaptiveLearningAlgorithm
+from app.services.service_registry import lazy_service
 from app.models import User, Activity, UserActivityLog
 from app.models import db
 from typing import Dict, List
 import traceback
 
 adaptive_routes = Blueprint('adaptive', __name__)
-adaptive_service = AdaptiveLearningAlgorithm()
+adaptive_service = lazy_service(AdaptiveLearningAlgorithm)
 
 
 @adaptive_routes.route('/api/adaptive/performance-analysis', methods=['GET'])
@@ -61,6 +62,7 @@ def get_next_activities():
     Query Parameters:
     - learning_path_id: Specific learning path (optional)
     - count: Number of recommendations (default: 5, max: 10)
+    - skill_area: Only recommend activities for this skill area (optional)
     """
     try:
         user_id = get_jwt_identity()
@@ -75,7 +77,7 @@ def get_next_activities():
             }), 400
         
         recommendations = adaptive_service.recommend_next_activities(
-            user_id, learning_path_id, count
+            user_id, learning_path_id, count, request.args.get('skill_area')
         )
         
         if not recommendations:
@@ -1,15 +1,113 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, User, LearningSession, UserActivityLog, VocabularyWord, UserGoal, Activity
+from app.db_routing import read_only
+from app.services.streak_service import StreakService
+from app.services.activity_log_metrics import fetch_activity_log_columns, group_sum, truthy_mask
+from app.services.user_lookups import active_goal
+from app.models import db, User, LearningSession, UserActivityLog, VocabularyWord, Activity
 from datetime import datetime, date, timedelta
 from sqlalchemy import func, and_, or_
 from collections import defaultdict
+import numpy as np
 import json
 
 analytics_bp = Blueprint('analytics', __name__)
 
+def dashboard_summary(user_id):
+    """Learning time, activity, vocabulary and streak/goal figures for the dashboard."""
+    # Date ranges
+    today = date.today()
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    
+    # Learning time analytics
+    total_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id).scalar() or 0
+    
+    weekly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id,
+               LearningSession.start_time >= week_ago).scalar() or 0
+    
+    monthly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id,
+               LearningSession.start_time >= month_ago).scalar() or 0
+    
+    # Activity completion analytics
+    total_activities = UserActivityLog.query.filter_by(user_id=user_id).count()
+    
+    weekly_activities = UserActivityLog.query.filter(
+        UserActivityLog.user_id == user_id,
+        UserActivityLog.completed_at >= week_ago
+    ).count()
+    
+    # Vocabulary analytics
+    total_vocabulary = VocabularyWord.query.filter_by(user_id=user_id).count()
+    mastered_words = VocabularyWord.query.filter(
+        VocabularyWord.user_id == user_id,
+        VocabularyWord.mastery_level >= 0.8
+    ).count()
+    
+    weekly_new_words = VocabularyWord.query.filter(
+        VocabularyWord.user_id == user_id,
+        VocabularyWord.discovered_at >= week_ago
+    ).count()
+    
+    # Performance analytics
+    avg_score = db.session.query(func.avg(UserActivityLog.score))\
+        .filter(UserActivityLog.user_id == user_id).scalar() or 0
+    
+    recent_avg_score = db.session.query(func.avg(UserActivityLog.score))\
+        .filter(UserActivityLog.user_id == user_id,
+               UserActivityLog.completed_at >= week_ago).scalar() or 0
+    
+    # Streak and goal analytics
+    user = User.query.get(user_id)
+    daily_streak = StreakService.get_daily_streak(user)
+    current_streak = daily_streak['current_streak']
+    longest_streak = daily_streak['longest_streak']
+    
+    # Current goal progress
+    current_goal = active_goal(user_id)
+    today_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id,
+               func.date(LearningSession.start_time) == today).scalar() or 0
+    
+    goal_progress = 0
+    if current_goal and current_goal.daily_time_goal_minutes > 0:
+        goal_progress = min(100, (today_time / current_goal.daily_time_goal_minutes) * 100)
+    
+    return {
+        'learning_time': {
+            'total_minutes': total_time,
+            'weekly_minutes': weekly_time,
+            'monthly_minutes': monthly_time,
+            'daily_average': round(weekly_time / 7, 1),
+            'monthly_average': round(monthly_time / 30, 1)
+        },
+        'activities': {
+            'total_completed': total_activities,
+            'weekly_completed': weekly_activities,
+            'average_score': round(avg_score, 1),
+            'recent_average_score': round(recent_avg_score, 1),
+            'improvement': round(recent_avg_score - avg_score, 1) if avg_score > 0 else 0
+        },
+        'vocabulary': {
+            'total_words': total_vocabulary,
+            'mastered_words': mastered_words,
+            'weekly_new_words': weekly_new_words,
+            'mastery_rate': round((mastered_words / total_vocabulary * 100), 1) if total_vocabulary > 0 else 0
+        },
+        'streaks_and_goals': {
+            'current_streak': current_streak,
+            'longest_streak': longest_streak,
+            'today_goal_progress': round(goal_progress, 1),
+            'daily_goal_minutes': current_goal.daily_time_goal_minutes if current_goal else 0
+        }
+    }
+
 @analytics_bp.route('/dashboard-summary', methods=['GET'])
 @jwt_required()
+@read_only
 def get_dashboard_summary():
     """
     Get comprehensive dashboard analytics summary.
@@ -17,94 +115,7 @@ def get_dashboard_summary():
     try:
         user_id = int(get_jwt_identity())
         
-        # Date ranges
-        today = date.today()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
-        # Learning time analytics
-        total_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id).scalar() or 0
-        
-        weekly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id,
-                   LearningSession.start_time >= week_ago).scalar() or 0
-        
-        monthly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id,
-                   LearningSession.start_time >= month_ago).scalar() or 0
-        
-        # Activity completion analytics
-        total_activities = UserActivityLog.query.filter_by(user_id=user_id).count()
-        
-        weekly_activities = UserActivityLog.query.filter(
-            UserActivityLog.user_id == user_id,
-            UserActivityLog.completed_at >= week_ago
-        ).count()
-        
-        # Vocabulary analytics
-        total_vocabulary = VocabularyWord.query.filter_by(user_id=user_id).count()
-        mastered_words = VocabularyWord.query.filter(
-            VocabularyWord.user_id == user_id,
-            VocabularyWord.mastery_level >= 0.8
-        ).count()
-        
-        weekly_new_words = VocabularyWord.query.filter(
-            VocabularyWord.user_id == user_id,
-            VocabularyWord.discovered_at >= week_ago
-        ).count()
-        
-        # Performance analytics
-        avg_score = db.session.query(func.avg(UserActivityLog.score))\
-            .filter(UserActivityLog.user_id == user_id).scalar() or 0
-        
-        recent_avg_score = db.session.query(func.avg(UserActivityLog.score))\
-            .filter(UserActivityLog.user_id == user_id,
-                   UserActivityLog.completed_at >= week_ago).scalar() or 0
-        
-        # Streak and goal analytics
-        user = User.query.get(user_id)
-        current_streak = user.profile.current_streak if user.profile else 0
-        longest_streak = user.profile.longest_streak if user.profile else 0
-        
-        # Current goal progress
-        current_goal = UserGoal.query.filter_by(user_id=user_id, is_active=True).first()
-        today_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id,
-                   func.date(LearningSession.start_time) == today).scalar() or 0
-        
-        goal_progress = 0
-        if current_goal and current_goal.daily_time_goal_minutes > 0:
-            goal_progress = min(100, (today_time / current_goal.daily_time_goal_minutes) * 100)
-        
-        summary = {
-            'learning_time': {
-                'total_minutes': total_time,
-                'weekly_minutes': weekly_time,
-                'monthly_minutes': monthly_time,
-                'daily_average': round(weekly_time / 7, 1),
-                'monthly_average': round(monthly_time / 30, 1)
-            },
-            'activities': {
-                'total_completed': total_activities,
-                'weekly_completed': weekly_activities,
-                'average_score': round(avg_score, 1),
-                'recent_average_score': round(recent_avg_score, 1),
-                'improvement': round(recent_avg_score - avg_score, 1) if avg_score > 0 else 0
-            },
-            'vocabulary': {
-                'total_words': total_vocabulary,
-                'mastered_words': mastered_words,
-                'weekly_new_words': weekly_new_words,
-                'mastery_rate': round((mastered_words / total_vocabulary * 100), 1) if total_vocabulary > 0 else 0
-            },
-            'streaks_and_goals': {
-                'current_streak': current_streak,
-                'longest_streak': longest_streak,
-                'today_goal_progress': round(goal_progress, 1),
-                'daily_goal_minutes': current_goal.daily_time_goal_minutes if current_goal else 0
-            }
-        }
+        summary = dashboard_summary(user_id)
         
         return jsonify({
             'message': 'Dashboard summary retrieved successfully!',
@@ -121,6 +132,7 @@ def get_dashboard_summary():
 
 @analytics_bp.route('/learning-trends', methods=['GET'])
 @jwt_required()
+@read_only
 def get_learning_trends():
     """
     Get learning trends over time with detailed analytics.
@@ -248,6 +260,7 @@ def get_learning_trends():
 
 @analytics_bp.route('/performance-analysis', methods=['GET'])
 @jwt_required()
+@read_only
 def get_performance_analysis():
     """
     Get detailed performance analysis by activity type and difficulty.
@@ -359,6 +372,7 @@ def get_performance_analysis():
 
 @analytics_bp.route('/vocabulary-analytics', methods=['GET'])
 @jwt_required()
+@read_only
 def get_vocabulary_analytics():
     """
     Get detailed vocabulary learning analytics.
@@ -487,6 +501,7 @@ def get_vocabulary_analytics():
 
 @analytics_bp.route('/export/progress-report', methods=['GET'])
 @jwt_required()
+@read_only
 def export_progress_report():
     """
     Generate a comprehensive progress report for export.
@@ -526,7 +541,7 @@ def export_progress_report():
                     'total_activities_completed': total_activities,
                     'average_score': round(avg_score, 1),
                     'vocabulary_words_learned': total_vocabulary,
-                    'current_streak': user.profile.current_streak if user.profile else 0
+                    'current_streak': StreakService.get_daily_streak(user)['current_streak']
                 }
             }
         
@@ -585,6 +600,7 @@ def export_progress_report():
 
 @analytics_bp.route('/activity-performance-analysis', methods=['GET'])
 @jwt_required()
+@read_only
 def get_activity_performance_analysis():
     """Advanced analytics for activity performance patterns"""
     try:
@@ -748,7 +764,8 @@ def get_activity_performance_analysis():
         """
         
         from app.services.activity_generator_service import ActivityGeneratorService
-        activity_service = ActivityGeneratorService()
+        from app.services.service_registry import get_service
+        activity_service = get_service(ActivityGeneratorService)
         response = activity_service.model.generate_content(insights_prompt)
         from app.services.activity_generator_service import _extract_json_from_response
         ai_insights = _extract_json_from_response(response.text)
@@ -778,6 +795,7 @@ def get_activity_performance_analysis():
 
 @analytics_bp.route('/learning-pattern-recognition', methods=['GET'])
 @jwt_required()
+@read_only
 def analyze_learning_patterns():
     """Recognize and analyze user's learning patterns using AI"""
     try:
@@ -786,54 +804,41 @@ def analyze_learning_patterns():
         # Get comprehensive user data
         user = User.query.get(user_id)
         
-        # Get recent activity logs (last 60 days)
+        # Get recent activity logs (last 60 days) as columns
         start_date = datetime.utcnow() - timedelta(days=60)
-        recent_logs = UserActivityLog.query.filter_by(user_id=user_id)\
-                                         .filter(UserActivityLog.completed_at >= start_date)\
-                                         .order_by(UserActivityLog.completed_at.desc()).all()
+        logs = fetch_activity_log_columns(user_id, since=start_date)
         
         # Get learning path progress
         from app.models.course import LearningPath
         enrolled_paths = user.enrolled_paths if hasattr(user, 'enrolled_paths') else []
         
         # Calculate learning metrics
-        total_activities = len(recent_logs)
-        unique_activity_types = set()
-        daily_activity_counts = {}
-        weekly_progress = {}
-        mistake_patterns = []
+        total_activities = len(logs)
+        unique_activity_types = set(logs.activity_type[logs.has_activity])
+        
+        # Daily activity tracking
+        days, day_counts = np.unique(logs.days, return_counts=True)
+        daily_activity_counts = {str(day): int(count) for day, count in zip(days, day_counts)}
+        
+        # Weekly progress tracking
+        weeks, week_scores, week_counts = group_sum(logs.week_starts, np.nan_to_num(logs.score))
+        _, week_max_scores, _ = group_sum(logs.week_starts, np.nan_to_num(logs.max_score))
+        weekly_progress = {
+            str(week): {'activities': int(count), 'total_score': int(total_score), 'total_max': int(total_max)}
+            for week, count, total_score, total_max in zip(weeks, week_counts, week_scores, week_max_scores)
+        }
         
-        for log in recent_logs:
-            # Activity type tracking
-            activity = Activity.query.get(log.activity_id)
-            if activity:
-                unique_activity_types.add(activity.activity_type)
-            
-            # Daily activity tracking
-            date_key = log.completed_at.date().isoformat()
-            if date_key not in daily_activity_counts:
-                daily_activity_counts[date_key] = 0
-            daily_activity_counts[date_key] += 1
-            
-            # Weekly progress tracking
-            week_start = (log.completed_at.date() - timedelta(days=log.completed_at.weekday())).isoformat()
-            if week_start not in weekly_progress:
-                weekly_progress[week_start] = {'activities': 0, 'total_score': 0, 'total_max': 0}
-            
-            weekly_progress[week_start]['activities'] += 1
-            weekly_progress[week_start]['total_score'] += log.score or 0
-            weekly_progress[week_start]['total_max'] += log.max_score or 0
-            
-            # Identify potential mistakes/challenges
-            if log.score and log.max_score and log.max_score > 0:
-                accuracy = (log.score / log.max_score)
-                if accuracy < 0.7:  # Less than 70% accuracy
-                    mistake_patterns.append({
-                        'activity_type': activity.activity_type if activity else 'unknown',
-                        'accuracy': accuracy,
-                        'date': log.completed_at.date().isoformat(),
-                        'attempts': log.attempt_number or 1
-                    })
+        # Identify potential mistakes/challenges (less than 70% accuracy)
+        challenges = np.flatnonzero(logs.scored & (logs.accuracy < 0.7))
+        mistake_patterns = [
+            {
+                'activity_type': logs.activity_type[i] or 'unknown',
+                'accuracy': float(logs.accuracy[i]),
+                'date': str(logs.days[i]),
+                'attempts': int(logs.attempt_number[i]) if truthy_mask(logs.attempt_number[i]) else 1
+            }
+            for i in challenges
+        ]
         
         # Calculate consistency metrics
         active_days = len(daily_activity_counts)
@@ -915,7 +920,8 @@ def analyze_learning_patterns():
         """
         
         from app.services.activity_generator_service import ActivityGeneratorService
-        activity_service = ActivityGeneratorService()
+        from app.services.service_registry import get_service
+        activity_service = get_service(ActivityGeneratorService)
         response = activity_service.model.generate_content(pattern_analysis_prompt)
         from app.services.activity_generator_service import _extract_json_from_response
         pattern_analysis = _extract_json_from_response(response.text)
@@ -948,6 +954,7 @@ def analyze_learning_patterns():
 
 @analytics_bp.route('/engagement-analytics', methods=['GET'])
 @jwt_required()
+@read_only
 def get_engagement_analytics():
     """Analyze user engagement metrics and patterns"""
     try:
@@ -962,41 +969,32 @@ def get_engagement_analytics():
         }
         
         engagement_data = {}
+        daily_streak = StreakService.get_daily_streak(User.query.get(user_id))
+        
+        logs = fetch_activity_log_columns(user_id, since=periods['last_90_days'])
+        completed = logs.scored & (logs.accuracy >= 0.7)
+        timed = truthy_mask(logs.time_spent_minutes)
         
         for period_name, start_date in periods.items():
-            logs = UserActivityLog.query.filter_by(user_id=user_id)\
-                                      .filter(UserActivityLog.completed_at >= start_date).all()
+            in_period = logs.since(start_date)
             
             # Calculate metrics
-            total_sessions = len(logs)
-            total_time = sum(log.time_spent_minutes or 0 for log in logs)
-            unique_days = len(set(log.completed_at.date() for log in logs))
+            total_sessions = int(in_period.sum())
+            total_time = int(np.nansum(logs.time_spent_minutes[in_period]))
+            unique_days = len(np.unique(logs.days[in_period]))
             
             # Activity completion rate
-            completed_activities = len([log for log in logs if log.score and log.max_score and (log.score / log.max_score) >= 0.7])
+            completed_activities = int((completed & in_period).sum())
             completion_rate = (completed_activities / total_sessions * 100) if total_sessions > 0 else 0
             
             # Session length analysis
-            session_lengths = [log.time_spent_minutes or 0 for log in logs if log.time_spent_minutes]
-            avg_session_length = sum(session_lengths) / len(session_lengths) if session_lengths else 0
-            
-            # Streak calculation
-            dates = sorted(set(log.completed_at.date() for log in logs))
-            current_streak = 0
-            max_streak = 0
-            temp_streak = 0
-            
-            for i, date in enumerate(dates):
-                if i == 0 or (date - dates[i-1]).days == 1:
-                    temp_streak += 1
-                else:
-                    max_streak = max(max_streak, temp_streak)
-                    temp_streak = 1
-                    
-                if date == now.date():
-                    current_streak = temp_streak
+            session_lengths = logs.time_spent_minutes[timed & in_period]
+            avg_session_length = float(session_lengths.mean()) if len(session_lengths) else 0
             
-            max_streak = max(max_streak, temp_streak)
+            # Streaks come from the streak engine; a window can't hold a longer run than its length
+            window_days = (now - start_date).days
+            current_streak = min(daily_streak['current_streak'], window_days)
+            max_streak = min(daily_streak['longest_streak'], window_days)
             
             engagement_data[period_name] = {
                 'total_sessions': total_sessions,
@@ -1074,7 +1072,8 @@ def get_engagement_analytics():
         """
         
         from app.services.activity_generator_service import ActivityGeneratorService
-        activity_service = ActivityGeneratorService()
+        from app.services.service_registry import get_service
+        activity_service = get_service(ActivityGeneratorService)
         response = activity_service.model.generate_content(insights_prompt)
         from app.services.activity_generator_service import _extract_json_from_response
         engagement_insights = _extract_json_from_response(response.text)
@@ -1098,6 +1097,7 @@ def get_engagement_analytics():
 
 @analytics_bp.route('/predictive-analytics', methods=['GET'])
 @jwt_required()
+@read_only
 def get_predictive_analytics():
     """Generate predictive analytics for learning outcomes"""
     try:
@@ -1226,7 +1226,8 @@ def get_predictive_analytics():
         """
         
         from app.services.activity_generator_service import ActivityGeneratorService
-        activity_service = ActivityGeneratorService()
+        from app.services.service_registry import get_service
+        activity_service = get_service(ActivityGeneratorService)
         response = activity_service.model.generate_content(prediction_prompt)
         from app.services.activity_generator_service import _extract_json_from_response
         predictions = _extract_json_from_response(response.text)
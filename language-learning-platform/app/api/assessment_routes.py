@@ -1,13 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.initial_assessment_service import InitialAssessmentService
+from app.services.service_registry import lazy_service
 from app.models import User, ProficiencyAssessment
 from app.models import db
 from typing import Dict, List
 import traceback
 
 assessment_routes = Blueprint('assessment', __name__)
-assessment_service = InitialAssessmentService()
+assessment_service = lazy_service(InitialAssessmentService)
 
 
 @assessment_routes.route('/api/assessment/generate', methods=['POST'])
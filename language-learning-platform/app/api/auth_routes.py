@@ -4,6 +4,7 @@ from flask_jwt_extended import create_access_token, create_refresh_token, jwt_re
 from app.models import db, User, Profile
 from app.services.comprehensive_assessment_service import ComprehensiveAssessmentService
 from app.services.adaptive_learning_path_generator import AdaptiveLearningPathGenerator
+from app.services.service_registry import lazy_service
 from werkzeug.security import check_password_hash
 from datetime import datetime, timedelta
 import re
@@ -11,8 +12,8 @@ import re
 auth_bp = Blueprint('auth', __name__)
 
 # Initialize services
-assessment_service = ComprehensiveAssessmentService()
-learning_path_generator = AdaptiveLearningPathGenerator()
+assessment_service = lazy_service(ComprehensiveAssessmentService)
+learning_path_generator = lazy_service(AdaptiveLearningPathGenerator)
 
 def validate_email(email):
     """Simple email validation"""
@@ -2,19 +2,39 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import (
     db, User, Chapter, UserChapterProgress, PracticeSession, 
-    UserNotes, TestAssessment, ChapterDependency, AIConversationContext
+    UserNotes, TestAssessment, AIConversationContext
 )
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.services.personalization_service import PersonalizationService
+from app.services.adaptive_learning_service import AdaptiveLearningAlgorithm
+from app.services.embedding_index import content_embeddings, chapter_text, CHAPTERS
+from app.services.service_registry import lazy_service
+from app.services.reference_data import reference_data, paginate
+from app.http_cache import conditional
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from datetime import datetime
 import json
 
 chapter_bp = Blueprint('chapters', __name__)
-activity_service = ActivityGeneratorService()
-personalization_service = PersonalizationService()
+activity_service = lazy_service(ActivityGeneratorService)
+personalization_service = lazy_service(PersonalizationService)
+adaptive_algorithm = lazy_service(AdaptiveLearningAlgorithm)
+
+def _chapter_progress_versions(user_id):
+    """
+    What chapter listings depend on besides the chapter catalog: the user's
+    progress rows, stamped by their count, highest id and latest updated_at,
+    read from the (user_id, chapter_id) index. Nothing is written on the
+    progress write path.
+    """
+    return tuple(db.session.query(
+        func.count(UserChapterProgress.id), func.max(UserChapterProgress.id), func.max(UserChapterProgress.updated_at)
+    ).filter(UserChapterProgress.user_id == user_id).one())
 
 @chapter_bp.route('/chapters', methods=['GET'])
 @jwt_required()
+@conditional('chapters', 'chapter_dependencies', user_versions=_chapter_progress_versions)
 def get_all_chapters():
     """
     Get all available chapters with user progress information.
@@ -25,14 +45,8 @@ def get_all_chapters():
         per_page = request.args.get('per_page', 20, type=int)
         difficulty = request.args.get('difficulty')
         
-        # Get chapters with optional filtering
-        query = Chapter.query.filter_by(is_active=True)
-        if difficulty:
-            query = query.filter_by(difficulty_level=difficulty)
-        
-        chapters = query.order_by(Chapter.chapter_number).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Get chapters with optional filtering, from the cached catalog
+        chapters = paginate(reference_data.active_chapters(difficulty), page, per_page)
         
         # Get user progress for these chapters
         chapter_ids = [ch.id for ch in chapters.items]
@@ -41,13 +55,14 @@ def get_all_chapters():
             UserChapterProgress.query.filter_by(user_id=user_id)
             .filter(UserChapterProgress.chapter_id.in_(chapter_ids)).all()
         }
+        completed_chapter_ids = _completed_chapter_ids(user_id)
         
         chapters_data = []
         for chapter in chapters.items:
             progress = user_progress.get(chapter.id)
             
             # Check if chapter is unlocked (prerequisites met)
-            is_unlocked = _check_chapter_prerequisites(user_id, chapter.id)
+            is_unlocked = _check_chapter_prerequisites(user_id, chapter.id, completed_chapter_ids)
             
             chapters_data.append({
                 'id': chapter.id,
@@ -180,7 +195,11 @@ def get_chapter_details(chapter_id):
         db.session.commit()
         
         # Get recent practice sessions
-        recent_sessions = PracticeSession.query.filter_by(
+        recent_sessions = PracticeSession.query.options(load_only(
+            PracticeSession.id, PracticeSession.session_type, PracticeSession.start_time,
+            PracticeSession.duration_minutes, PracticeSession.score_percentage,
+            PracticeSession.total_questions, PracticeSession.correct_answers
+        )).filter_by(
             user_id=user_id, chapter_id=chapter_id
         ).order_by(PracticeSession.start_time.desc()).limit(5).all()
         
@@ -322,30 +341,34 @@ def start_practice_session(chapter_id):
             'telugu_message': 'అభ్యాస సెషన్ ప్రారంభించడంలో విఫలం'
         }), 500
 
-def _check_chapter_prerequisites(user_id, chapter_id):
+def _completed_chapter_ids(user_id, chapter_ids=None):
+    """
+    Ids of the chapters the user has completed or mastered, optionally
+    limited to the given chapters.
+    """
+    query = db.session.query(UserChapterProgress.chapter_id).filter(
+        UserChapterProgress.user_id == user_id,
+        UserChapterProgress.status.in_(['completed', 'mastered'])
+    )
+    if chapter_ids is not None:
+        query = query.filter(UserChapterProgress.chapter_id.in_(chapter_ids))
+    return {chapter_id for chapter_id, in query.all()}
+
+def _check_chapter_prerequisites(user_id, chapter_id, completed_chapter_ids=None):
     """
-    Check if user has met prerequisites for a chapter.
+    Check if user has met prerequisites for a chapter. Callers checking many
+    chapters pass the user's completed chapter ids to avoid a query each.
     """
     try:
-        # Get all prerequisites for this chapter
-        dependencies = ChapterDependency.query.filter_by(chapter_id=chapter_id).all()
+        # Strict prerequisites (must be completed) from the cached dependency graph
+        prerequisites = reference_data.chapter_graph().strict_prerequisites.get(chapter_id, ())
         
-        if not dependencies:
+        if not prerequisites:
             return True  # No prerequisites
         
-        # Check each prerequisite
-        for dep in dependencies:
-            if dep.is_strict:
-                # Must have completed prerequisite chapter
-                progress = UserChapterProgress.query.filter_by(
-                    user_id=user_id, 
-                    chapter_id=dep.prerequisite_chapter_id
-                ).first()
-                
-                if not progress or progress.status not in ['completed', 'mastered']:
-                    return False
-        
-        return True
+        if completed_chapter_ids is None:
+            completed_chapter_ids = _completed_chapter_ids(user_id, prerequisites)
+        return all(prerequisite_id in completed_chapter_ids for prerequisite_id in prerequisites)
         
     except Exception as e:
         current_app.logger.error(f"Error checking prerequisites: {str(e)}")
@@ -410,6 +433,7 @@ def update_chapter_progress(chapter_id):
 
 @chapter_bp.route('/chapters/progress-graph', methods=['GET'])
 @jwt_required()
+@conditional('chapters', 'chapter_dependencies', user_versions=_chapter_progress_versions)
 def get_progress_graph():
     """
     Get the learning path graph showing all chapters and user progress.
@@ -418,16 +442,20 @@ def get_progress_graph():
         user_id = int(get_jwt_identity())
         
         # Get all chapters
-        chapters = Chapter.query.filter_by(is_active=True).order_by(Chapter.chapter_number).all()
+        chapters = reference_data.active_chapters()
         
         # Get user progress for all chapters
         user_progress = {
             prog.chapter_id: prog for prog in 
             UserChapterProgress.query.filter_by(user_id=user_id).all()
         }
+        completed_chapter_ids = {
+            chapter_id for chapter_id, prog in user_progress.items()
+            if prog.status in ['completed', 'mastered']
+        }
         
         # Get chapter dependencies
-        dependencies = ChapterDependency.query.all()
+        dependencies = reference_data.chapter_graph().edges
         
         # Build the graph structure
         graph_nodes = []
@@ -435,7 +463,7 @@ def get_progress_graph():
         
         for chapter in chapters:
             progress = user_progress.get(chapter.id)
-            is_unlocked = _check_chapter_prerequisites(user_id, chapter.id)
+            is_unlocked = _check_chapter_prerequisites(user_id, chapter.id, completed_chapter_ids)
             
             node = {
                 'id': chapter.id,
@@ -625,6 +653,31 @@ def get_adaptive_chapter_content(chapter_id):
         # Get user's overall performance
         user = User.query.get(user_id)
         
+        # Related practice and chapters from the local embedding index
+        related_activities = adaptive_algorithm.find_related_activities(
+            user_id,
+            text=' '.join(filter(None, [chapter.title, chapter.topic, chapter.description, chapter_text(chapter.subtopics)])),
+            count=5
+        )
+        similar_chapters = content_embeddings.similar(CHAPTERS, chapter.id, count=3)
+        chapters_by_id = {
+            related.id: related
+            for related in Chapter.query.options(load_only(Chapter.id, Chapter.title, Chapter.topic, Chapter.difficulty_level))
+                                        .filter(Chapter.id.in_([related_id for related_id, _ in similar_chapters]))
+                                        .filter_by(is_active=True)
+        } if similar_chapters else {}
+        related_chapters = [
+            {
+                'id': related_id,
+                'title': chapters_by_id[related_id].title,
+                'topic': chapters_by_id[related_id].topic,
+                'difficulty_level': chapters_by_id[related_id].difficulty_level,
+                'similarity': round(similarity, 3)
+            }
+            for related_id, similarity in similar_chapters
+            if related_id in chapters_by_id and similarity > 0
+        ]
+        
         # Generate adaptive content based on user performance
         adaptation_prompt = f"""
         Adapt chapter content for a Telugu speaker learning English based on their performance.
@@ -638,6 +691,8 @@ def get_adaptive_chapter_content(chapter_id):
         - Total Attempts: {user_progress.total_attempts if user_progress else 0}
         - Status: {user_progress.status if user_progress else 'not_started'}
         
+        Related practice activities available: {', '.join(activity['title'] for activity in related_activities) or 'none'}
+        
         Adapt the content by:
         1. Adjusting complexity based on performance
         2. Adding reinforcement for weak areas
@@ -693,7 +748,9 @@ def get_adaptive_chapter_content(chapter_id):
                 'status': user_progress.status if user_progress else 'not_started',
                 'total_attempts': user_progress.total_attempts if user_progress else 0
             },
-            'adaptive_content': adaptive_content
+            'adaptive_content': adaptive_content,
+            'related_activities': related_activities,
+            'related_chapters': related_chapters
         }), 200
         
     except Exception as e:
@@ -6,12 +6,14 @@ from app.models import (
 )
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.services.personalization_service import PersonalizationService
+from app.services.service_registry import lazy_service
+from sqlalchemy.orm import defer
 from datetime import datetime
 import json
 
 chat_bp = Blueprint('chat', __name__)
-activity_service = ActivityGeneratorService()
-personalization_service = PersonalizationService()
+activity_service = lazy_service(ActivityGeneratorService)
+personalization_service = lazy_service(PersonalizationService)
 
 @chat_bp.route('/conversations', methods=['GET'])
 @jwt_required()
@@ -24,7 +26,10 @@ def get_conversations():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        conversations = LearningSession.query.filter_by(
+        # The transcript is only needed by the per-conversation messages endpoint
+        conversations = LearningSession.query.options(
+            defer(LearningSession.conversation_messages), defer(LearningSession.user_feedback)
+        ).filter_by(
             user_id=user_id, 
             session_type='chat'
         ).order_by(LearningSession.start_time.desc())\
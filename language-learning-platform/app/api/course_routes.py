@@ -2,15 +2,34 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import db, User, LearningPath, Course, UserActivityLog, Activity
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.streak_service import StreakService
+from app.services.service_registry import lazy_service
+from app.services.reference_data import reference_data, paginate
+from app.models.course import user_learning_paths
+from app.services.performance_profile_cache import activity_log_version
+from app.http_cache import conditional
 from datetime import datetime
 from sqlalchemy import func
 import json
 
 courses_bp = Blueprint('courses', __name__)
-activity_service = ActivityGeneratorService()
+activity_service = lazy_service(ActivityGeneratorService)
+
+def _learning_path_versions(user_id):
+    """
+    What the learning path list depends on besides the paths and the
+    activity totals per path (the 'activities' version, bumped by activity
+    inserts, deletes and moves between paths): the user's enrollments and
+    activity log.
+    """
+    enrolled_path_ids = db.session.query(user_learning_paths.c.learning_path_id).filter(
+        user_learning_paths.c.user_id == user_id
+    ).order_by(user_learning_paths.c.learning_path_id).all()
+    return activity_log_version(user_id), tuple(row[0] for row in enrolled_path_ids)
 
 @courses_bp.route('/learning-paths', methods=['GET'])
 @jwt_required()
+@conditional('learning_paths', 'activities', user_versions=_learning_path_versions)
 def get_learning_paths():
     """
     Get available learning paths with user enrollment status.
@@ -22,16 +41,13 @@ def get_learning_paths():
         category = request.args.get('category', None)
         difficulty = request.args.get('difficulty', None)
         
-        # Base query
-        query = LearningPath.query.filter_by(is_active=True)
-        
-        # Apply filters
-        if category:
-            query = query.filter(LearningPath.category == category)
-        if difficulty:
-            query = query.filter(LearningPath.difficulty_level == difficulty)
-        
-        paths = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Active paths, filtered in memory from the cached catalog
+        paths = paginate([
+            path for path in reference_data.learning_paths()
+            if path.is_active
+            and (not category or path.category == category)
+            and (not difficulty or path.difficulty_level == difficulty)
+        ], page, per_page)
         
         # Get user's enrolled paths
         user = User.query.get(user_id)
@@ -478,12 +494,8 @@ def get_my_learning_paths():
             enrollment_info = user.enrollment_data.get(str(path.id), {}) if user.enrollment_data else {}
             
             # Get next activity
-            completed_activity_ids = [log.activity_id for log in UserActivityLog.query.filter_by(
-                user_id=user_id, learning_path_id=path.id
-            ).all()]
-            
             next_activity = Activity.query.filter_by(learning_path_id=path.id)\
-                .filter(~Activity.id.in_(completed_activity_ids))\
+                .filter(Activity.not_completed_by(user_id))\
                 .order_by(Activity.order_in_path).first()
             
             # Calculate time spent
@@ -740,6 +752,7 @@ def complete_activity(activity_id):
         db.session.add(activity_log)
         
         # Update user progress and streaks
+        StreakService.record_activity(user_id, activity.activity_type, activity.skill_area)
         user = User.query.get(user_id)
         if user.profile:
             user.profile.total_activities_completed += 1
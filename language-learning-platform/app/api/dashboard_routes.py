@@ -0,0 +1,185 @@
+from flask import Blueprint, request, jsonify, current_app, g, has_app_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import event
+from app.models import db
+from app.services.personalization_service import PersonalizationService
+from app.services.gamification_service import GamificationService
+from app.services.adaptive_learning_service import AdaptiveLearningAlgorithm
+from app.services.service_registry import lazy_service
+from app.services.user_lookups import UserLookups
+from app.api.analytics_routes import dashboard_summary
+from app.api.user_routes import user_statistics
+from app.api.notifications_routes import notifications_page
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+dashboard_bp = Blueprint('dashboard', __name__)
+personalization_service = lazy_service(PersonalizationService)
+gamification_service = lazy_service(GamificationService)
+adaptive_service = lazy_service(AdaptiveLearningAlgorithm)
+
+_executor_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def _personalized_dashboard(user_id):
+    dashboard_data = personalization_service.get_personalized_dashboard(user_id)
+    if 'error' in dashboard_data:
+        raise ValueError(dashboard_data['error'])
+    return dashboard_data['dashboard']
+
+
+# Section name -> (loader(user_id), whether its queries may go to the read replica)
+SECTIONS = {
+    'personalization': (_personalized_dashboard, False),
+    'analytics': (dashboard_summary, True),
+    'statistics': (user_statistics, False),
+    'badges': (lambda user_id: gamification_service.get_user_badges(user_id), False),
+    'notifications': (lambda user_id: notifications_page(user_id), False),
+    'recommendations': (lambda user_id: adaptive_service.recommend_next_activities(user_id), False),
+}
+
+
+def _executor_size(config):
+    """
+    DASHBOARD_WORKERS, capped at half the database pool (pool_size +
+    max_overflow): each section thread holds a connection while it runs, and
+    the request threads need the rest.
+    """
+    workers = config.get('DASHBOARD_WORKERS', 8)
+    options = config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options:
+        workers = min(workers, max((options['pool_size'] + options.get('max_overflow', 0)) // 2, 1))
+    return workers
+
+
+def _section_executor():
+    """Threads for evaluating sections, started per process (threads don't survive a pre-fork)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=_executor_size(current_app.config), thread_name_prefix='dashboard'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run_section(app, name, user_id, lookups, deadline):
+    load, read_only = SECTIONS[name]
+    # Own app context, so its own database session, released when the section returns
+    with app.app_context():
+        g.db_read_only = read_only
+        g.dashboard_deadline = deadline
+        lookups.bind()
+        return load(user_id)
+
+
+@event.listens_for(db.session, 'after_begin')
+def _limit_section_statements(session, transaction, connection):
+    """
+    Cap a section's statements at the time left before its request gives
+    up on it, so a section that overruns fails its query and releases its
+    connection instead of holding it until the query ends (PostgreSQL only).
+    """
+    deadline = g.get('dashboard_deadline') if has_app_context() else None
+    if deadline is not None and connection.dialect.name == 'postgresql':
+        remaining_ms = max(int((deadline - time.monotonic()) * 1000), 1)
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+
+def _evaluate_sections(names, user_id, lookups, timeout):
+    """
+    Run the sections, at most DASHBOARD_MAX_PARALLEL_SECTIONS at a time so
+    one request can't occupy the whole pool. Returns (sections, errors);
+    sections not finished by the deadline are errors, and those not yet
+    started never are.
+    """
+    app = current_app._get_current_object()
+    executor = _section_executor()
+    parallel = max(current_app.config.get('DASHBOARD_MAX_PARALLEL_SECTIONS', 3), 1)
+    deadline = time.monotonic() + timeout
+    queued = list(names)
+    running = {}
+    sections, errors = {}, {}
+
+    while queued or running:
+        while queued and len(running) < parallel:
+            name = queued.pop(0)
+            running[executor.submit(_run_section, app, name, user_id, lookups, deadline)] = name
+        remaining = deadline - time.monotonic()
+        done = wait(running, timeout=remaining, return_when=FIRST_COMPLETED).done if remaining > 0 else set()
+        if not done:
+            break
+        for future in done:
+            name = running.pop(future)
+            if future.exception() is not None:
+                logger.error(f"Dashboard section {name} failed for user {user_id}: {future.exception()}")
+                errors[name] = 'failed'
+            else:
+                sections[name] = future.result()
+
+    for future, name in running.items():
+        future.cancel()  # Not started yet; a running one stops at its next statement (see above)
+        errors[name] = 'timeout'
+    for name in queued:
+        errors[name] = 'timeout'
+    return {name: sections[name] for name in names if name in sections}, errors
+
+
+@dashboard_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """
+    Home screen in one request. The sections named in ?sections= (all of
+    them by default) are evaluated concurrently, a few at a time, and share
+    one lookup of the user, profile and active goal. Sections not done
+    within DASHBOARD_SECTION_TIMEOUT_SECONDS are reported in 'errors' and
+    the rest are returned.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        requested = request.args.get('sections')
+        names = list(dict.fromkeys(
+            name.strip() for name in requested.split(',') if name.strip()
+        )) if requested else list(SECTIONS)
+
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            return jsonify({
+                'error': f"Unknown sections: {', '.join(unknown)}",
+                'telugu_message': 'తెలియని విభాగాలు',
+                'available_sections': list(SECTIONS)
+            }), 400
+
+        lookups = UserLookups.load(user_id)
+        if lookups.user is None:
+            return jsonify({
+                'error': 'User not found',
+                'telugu_message': 'వినియోగదారు కనుగొనబడలేదు'
+            }), 404
+
+        sections, errors = _evaluate_sections(
+            names, user_id, lookups, current_app.config.get('DASHBOARD_SECTION_TIMEOUT_SECONDS', 5)
+        )
+
+        return jsonify({
+            'message': 'Dashboard retrieved successfully!',
+            'telugu_message': 'డాష్‌బోర్డ్ విజయవంతంగా తీసుకోబడింది!',
+            'sections': sections,
+            'errors': errors,
+            'partial': bool(errors)
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting dashboard: {str(e)}")
+        return jsonify({
+            'error': 'Failed to get dashboard',
+            'telugu_message': 'డాష్‌బోర్డ్ పొందడంలో విఫలం'
+        }), 500
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.db_routing import read_only
+from app.services.streak_service import StreakService
 from app.models import (
     db, User, AssessmentQuestionResponse, ActivityQuestionResponse, 
     UserAnalytics, LearningStreak, AIGeneratedContent, 
     UserLearningTimeline, PerformanceTrend, ProficiencyAssessment,
-    Activity, UserActivityLog
+    Activity, UserActivityLog, MonthlyActivityRollup
 )
 from datetime import datetime, date, timedelta
 from sqlalchemy import func, desc, and_, or_
@@ -15,6 +17,7 @@ analytics_bp = Blueprint('enhanced_analytics', __name__)
 
 @analytics_bp.route('/performance-trends', methods=['GET'])
 @jwt_required()
+@read_only
 def get_performance_trends():
     """
     Get performance trends over time for the current user.
@@ -89,15 +92,13 @@ def get_performance_trends():
 
 @analytics_bp.route('/learning-streaks', methods=['GET'])
 @jwt_required()
+@read_only
 def get_learning_streaks():
     """Get current learning streaks for the user."""
     try:
         user_id = get_jwt_identity()
         
-        streaks = LearningStreak.query.filter(
-            LearningStreak.user_id == user_id,
-            LearningStreak.is_active == True
-        ).all()
+        streaks = StreakService.get_active_streaks(int(user_id))
         
         streak_data = []
         for streak in streaks:
@@ -127,6 +128,7 @@ def get_learning_streaks():
 
 @analytics_bp.route('/skill-breakdown', methods=['GET'])
 @jwt_required()
+@read_only
 def get_skill_breakdown():
     """Get comprehensive skill analysis for the user."""
     try:
@@ -151,15 +153,34 @@ def get_skill_breakdown():
             UserAnalytics.skill_area.isnot(None)
         ).group_by(UserAnalytics.skill_area).all()
         
-        # Get question-level performance
-        question_performance = db.session.query(
+        # Get question-level performance: live responses plus the rollups of archived months
+        question_totals = defaultdict(lambda: [0, 0, 0.0])  # skill -> [questions, correct, seconds]
+        live_responses = db.session.query(
             AssessmentQuestionResponse.skill_area,
-            func.avg(func.cast(AssessmentQuestionResponse.is_correct, db.Float)).label('accuracy'),
-            func.avg(AssessmentQuestionResponse.time_spent_seconds).label('avg_time'),
-            func.count(AssessmentQuestionResponse.id).label('question_count')
+            func.count(AssessmentQuestionResponse.id),
+            func.sum(func.cast(AssessmentQuestionResponse.is_correct, db.Integer)),
+            func.sum(AssessmentQuestionResponse.time_spent_seconds)
         ).filter(
             AssessmentQuestionResponse.user_id == user_id
         ).group_by(AssessmentQuestionResponse.skill_area).all()
+        archived_responses = db.session.query(
+            MonthlyActivityRollup.category,
+            func.sum(MonthlyActivityRollup.event_count),
+            func.sum(MonthlyActivityRollup.correct_count),
+            func.sum(MonthlyActivityRollup.time_spent_minutes) * 60
+        ).filter(
+            MonthlyActivityRollup.user_id == user_id,
+            MonthlyActivityRollup.source_table == 'assessment_question_responses'
+        ).group_by(MonthlyActivityRollup.category).all()
+        for skill, count, correct, seconds in live_responses + archived_responses:
+            totals = question_totals[skill]
+            totals[0] += count or 0
+            totals[1] += correct or 0
+            totals[2] += seconds or 0
+        question_performance = [
+            (skill, correct / count if count else 0.0, seconds / count if count else 0.0, count)
+            for skill, (count, correct, seconds) in question_totals.items()
+        ]
         
         # Combine data
         skill_breakdown = {}
@@ -214,6 +235,7 @@ def get_skill_breakdown():
 
 @analytics_bp.route('/time-spent', methods=['GET'])
 @jwt_required()
+@read_only
 def get_time_analytics():
     """Get time spent analytics across different activities."""
     try:
@@ -276,6 +298,7 @@ def get_time_analytics():
 
 @analytics_bp.route('/difficulty-progression', methods=['GET'])
 @jwt_required()
+@read_only
 def get_difficulty_progression():
     """Analyze how user handles increasing difficulty levels."""
     try:
@@ -358,6 +381,7 @@ def get_difficulty_progression():
 
 @analytics_bp.route('/learning-timeline', methods=['GET'])
 @jwt_required()
+@read_only
 def get_learning_timeline():
     """Get comprehensive learning timeline for the user."""
     try:
@@ -417,6 +441,7 @@ def get_learning_timeline():
 
 @analytics_bp.route('/comprehensive-report', methods=['GET'])
 @jwt_required()
+@read_only
 def get_comprehensive_report():
     """Generate a comprehensive learning report for the user."""
     try:
@@ -473,10 +498,7 @@ def get_comprehensive_report():
         ).scalar() or 0
         
         # Current streaks
-        active_streaks = LearningStreak.query.filter(
-            LearningStreak.user_id == user_id,
-            LearningStreak.is_active == True
-        ).count()
+        active_streaks = len(StreakService.get_active_streaks(int(user_id)))
         
         # Recent improvements
         recent_timeline = UserLearningTimeline.query.filter(
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.db_routing import read_only
 from app.models import (
     db, AssessmentQuestionResponse, ActivityQuestionResponse,
     ProficiencyAssessment, Activity, UserActivityLog, UserAnalytics,
@@ -16,6 +17,7 @@ enhanced_activity_bp = Blueprint('enhanced_activity', __name__)
 
 @enhanced_assessment_bp.route('/<int:assessment_id>/question-analysis', methods=['GET'])
 @jwt_required()
+@read_only
 def get_assessment_question_analysis(assessment_id):
     """Get detailed per-question analysis for an assessment."""
     try:
@@ -121,6 +123,7 @@ def get_assessment_question_analysis(assessment_id):
 
 @enhanced_assessment_bp.route('/<int:assessment_id>/comparative-report', methods=['GET'])
 @jwt_required()
+@read_only
 def get_comparative_assessment_report(assessment_id):
     """Compare current assessment with previous assessments."""
     try:
@@ -228,6 +231,7 @@ def get_comparative_assessment_report(assessment_id):
 
 @enhanced_assessment_bp.route('/skill-progression', methods=['GET'])
 @jwt_required()
+@read_only
 def get_skill_progression():
     """Track skill improvement over time across assessments."""
     try:
@@ -316,6 +320,7 @@ def get_skill_progression():
 
 @enhanced_activity_bp.route('/<int:activity_id>/question-breakdown', methods=['GET'])
 @jwt_required()
+@read_only
 def get_activity_question_breakdown(activity_id):
     """Get detailed per-question breakdown for an activity."""
     try:
@@ -429,6 +434,7 @@ def get_activity_question_breakdown(activity_id):
 
 @enhanced_activity_bp.route('/performance-history', methods=['GET'])
 @jwt_required()
+@read_only
 def get_activity_performance_history():
     """Get historical performance across all activities."""
     try:
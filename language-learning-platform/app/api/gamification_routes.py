@@ -1,10 +1,14 @@
 
 from flask import Blueprint, jsonify, request
 from app.services.gamification_service import GamificationService
-from app.models import db, Badge, Achievement
+from app.services.leaderboard_service import LEADERBOARD_PERIODS
+from app.services.service_registry import lazy_service
+from app.services.reference_data import reference_data
+from app.http_cache import conditional
+from app.models import db
 
 gamification_bp = Blueprint('gamification', __name__)
-gamification_service = GamificationService()
+gamification_service = lazy_service(GamificationService)
 
 @gamification_bp.route('/badges/<int:user_id>', methods=['GET'])
 def get_user_badges(user_id):
@@ -17,10 +21,11 @@ def get_user_badges(user_id):
         return jsonify({'error': 'Failed to fetch badges', 'details': str(e)}), 500
 
 @gamification_bp.route('/badges/available', methods=['GET'])
+@conditional('badges')
 def get_available_badges():
     """Get all available badges in the system"""
     try:
-        badges = Badge.query.all()
+        badges = reference_data.badges()
         
         badge_list = []
         for badge in badges:
@@ -80,6 +85,9 @@ def get_leaderboard():
         if limit > 50:  # Prevent excessive requests
             limit = 50
         
+        if time_period not in LEADERBOARD_PERIODS:
+            return jsonify({'error': f"time_period must be one of: {', '.join(LEADERBOARD_PERIODS)}"}), 400
+        
         leaderboard = gamification_service.get_leaderboard(limit, time_period)
         
         return jsonify({
@@ -91,6 +99,28 @@ def get_leaderboard():
     except Exception as e:
         return jsonify({'error': 'Failed to fetch leaderboard', 'details': str(e)}), 500
 
+@gamification_bp.route('/leaderboard/rank/<int:user_id>', methods=['GET'])
+def get_leaderboard_rank(user_id):
+    """Get a user's leaderboard rank and the users ranked around them"""
+    try:
+        time_period = request.args.get('time_period', 'all_time')
+        neighbours = min(max(request.args.get('neighbours', 2, type=int), 0), 10)
+        
+        if time_period not in LEADERBOARD_PERIODS:
+            return jsonify({'error': f"time_period must be one of: {', '.join(LEADERBOARD_PERIODS)}"}), 400
+        
+        rank = gamification_service.get_leaderboard_rank(user_id, time_period, neighbours)
+        if rank is None:
+            return jsonify({'error': 'Failed to fetch leaderboard rank'}), 500
+        
+        return jsonify({
+            'leaderboard_rank': rank,
+            'time_period': time_period
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch leaderboard rank', 'details': str(e)}), 500
+
 @gamification_bp.route('/daily-challenge/<int:user_id>', methods=['GET'])
 def get_daily_challenge(user_id):
     """Get daily challenge status for a user"""
@@ -105,10 +135,11 @@ def get_daily_challenge(user_id):
         return jsonify({'error': 'Failed to fetch daily challenge', 'details': str(e)}), 500
 
 @gamification_bp.route('/achievements', methods=['GET'])
+@conditional('achievements')
 def get_all_achievements():
     """Get all available achievements"""
     try:
-        achievements = Achievement.query.filter_by(is_active=True).all()
+        achievements = reference_data.active_achievements()
         
         achievement_list = []
         for achievement in achievements:
@@ -137,20 +168,15 @@ def get_gamification_stats(user_id):
         daily_challenge = gamification_service.get_daily_challenge_status(user_id)
         
         # Get user's rank in leaderboard
-        leaderboard = gamification_service.get_leaderboard(100)  # Get top 100
-        user_rank = None
-        for idx, entry in enumerate(leaderboard):
-            if 'user_id' in entry and entry['user_id'] == user_id:
-                user_rank = idx + 1
-                break
+        rank = gamification_service.get_leaderboard_rank(user_id, neighbours=0) or {}
         
         return jsonify({
             'gamification_stats': {
                 'badges': badges,
                 'total_badges': len(badges),
                 'daily_challenge': daily_challenge,
-                'leaderboard_rank': user_rank,
-                'total_leaderboard_users': len(leaderboard)
+                'leaderboard_rank': rank.get('rank'),
+                'total_leaderboard_users': rank.get('total_ranked_users', 0)
             }
         }), 200
         
@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify
 from app.models import db, LearningPath, Activity, UserActivityLog
 from app.models.user import User
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.service_registry import lazy_service
+from app.services.reference_data import reference_data
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import json
 
 learning_path_bp = Blueprint('learning_path', __name__)
-activity_service = ActivityGeneratorService()
+activity_service = lazy_service(ActivityGeneratorService)
 
 # ===== DYNAMIC LEARNING PATH SYSTEM =====
 
@@ -86,7 +88,7 @@ def get_personalized_learning_path_recommendation():
         recommendation_data = _extract_json_from_response(response.text)
         
         # Get actual learning paths from database
-        available_paths = LearningPath.query.all()
+        available_paths = reference_data.learning_paths()
         path_details = []
         
         for rec_path in recommendation_data.get('recommended_paths', []):
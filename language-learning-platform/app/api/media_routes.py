@@ -3,14 +3,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 from app.models import db, User, LearningSession
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.service_registry import lazy_service
 import os
 import uuid
 from datetime import datetime
-from PIL import Image
 import io
 
 media_bp = Blueprint('media', __name__)
-activity_service = ActivityGeneratorService()
+activity_service = lazy_service(ActivityGeneratorService)
 
 def allowed_file(filename, allowed_extensions):
     """Check if file extension is allowed"""
@@ -65,7 +65,8 @@ def upload_image():
         
         # Process and save image
         try:
-            # Open and process image with PIL
+            # Open and process image with PIL, imported on first upload rather than at startup
+            from PIL import Image
             image = Image.open(file.stream)
             
             # Convert to RGB if necessary
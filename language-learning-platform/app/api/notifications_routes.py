@@ -9,6 +9,34 @@ notifications_bp = Blueprint('notifications', __name__)
 # In-memory storage for demo (in production, use database table)
 user_notifications = {}
 
+def notifications_page(user_id, page=1, per_page=20, unread_only=False):
+    """One page of the user's notifications, with its pagination."""
+    # Get user notifications (demo data)
+    notifications = user_notifications.get(str(user_id), [])
+    
+    if unread_only:
+        notifications = [n for n in notifications if not n.get('read', False)]
+    
+    # Simple pagination
+    start = (page - 1) * per_page
+    end = start + per_page
+    paginated_notifications = notifications[start:end]
+    
+    total = len(notifications)
+    pages = (total + per_page - 1) // per_page
+    
+    return {
+        'notifications': paginated_notifications,
+        'pagination': {
+            'page': page,
+            'pages': pages,
+            'per_page': per_page,
+            'total': total,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        }
+    }
+
 @notifications_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_notifications():
@@ -20,32 +48,10 @@ def get_notifications():
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         unread_only = request.args.get('unread_only', 'false').lower() == 'true'
         
-        # Get user notifications (demo data)
-        notifications = user_notifications.get(str(user_id), [])
-        
-        if unread_only:
-            notifications = [n for n in notifications if not n.get('read', False)]
-        
-        # Simple pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_notifications = notifications[start:end]
-        
-        total = len(notifications)
-        pages = (total + per_page - 1) // per_page
-        
         return jsonify({
             'message': 'Notifications retrieved successfully',
             'telugu_message': 'నోటిఫికేషన్లు విజయవంతంగా పొందబడ్డాయి',
-            'notifications': paginated_notifications,
-            'pagination': {
-                'page': page,
-                'pages': pages,
-                'per_page': per_page,
-                'total': total,
-                'has_next': page < pages,
-                'has_prev': page > 1
-            }
+            **notifications_page(user_id, page, per_page, unread_only)
         }), 200
         
     except Exception as e:
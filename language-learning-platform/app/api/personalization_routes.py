@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.personalization_service import PersonalizationService
+from app.services.service_registry import lazy_service
 from app.models import db, User, LearningSession, VocabularyWord
 from datetime import datetime
 import logging
 
 personalization_bp = Blueprint('personalization', __name__)
-personalization_service = PersonalizationService()
+personalization_service = lazy_service(PersonalizationService)
 
 @personalization_bp.route('/goals', methods=['POST'])
 @jwt_required()
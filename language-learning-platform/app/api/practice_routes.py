@@ -6,12 +6,13 @@ from app.models import (
 )
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.services.personalization_service import PersonalizationService
+from app.services.service_registry import lazy_service
 from datetime import datetime
 import json
 
 practice_bp = Blueprint('practice', __name__)
-activity_service = ActivityGeneratorService()
-personalization_service = PersonalizationService()
+activity_service = lazy_service(ActivityGeneratorService)
+personalization_service = lazy_service(PersonalizationService)
 
 @practice_bp.route('/generate-questions', methods=['POST'])
 @jwt_required()
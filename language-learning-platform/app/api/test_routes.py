@@ -6,12 +6,14 @@ from app.models import (
 )
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.services.practice_agent_service import PracticeAgentService
+from app.services.service_registry import lazy_service
+from sqlalchemy.orm import load_only
 from datetime import datetime
 import json
 
 test_bp = Blueprint('tests', __name__)
-activity_service = ActivityGeneratorService()
-practice_agent = PracticeAgentService()
+activity_service = lazy_service(ActivityGeneratorService)
+practice_agent = lazy_service(PracticeAgentService)
 
 @test_bp.route('/tests/create', methods=['POST'])
 @jwt_required()
@@ -389,7 +391,11 @@ def get_test_history():
         per_page = request.args.get('per_page', 10, type=int)
         test_type = request.args.get('test_type')
         
-        query = TestAssessment.query.filter_by(user_id=user_id, is_completed=True)
+        query = TestAssessment.query.options(load_only(
+            TestAssessment.id, TestAssessment.test_type, TestAssessment.chapter_ids,
+            TestAssessment.start_time, TestAssessment.duration_minutes, TestAssessment.score_percentage,
+            TestAssessment.grade, TestAssessment.total_questions, TestAssessment.correct_answers
+        )).filter_by(user_id=user_id, is_completed=True)
         
         if test_type:
             query = query.filter_by(test_type=test_type)
@@ -3,7 +3,11 @@ from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.progress_service import ProgressService
 from app.services.gamification_service import GamificationService
+from app.services.achievement_service import ACTIVITY_COMPLETED, POINTS_AWARDED
 from app.services.personalization_service import PersonalizationService
+from app.services.streak_service import StreakService
+from app.services.service_registry import lazy_service
+from app.services.user_lookups import active_goal
 from app.models import db, User, Profile, LearningPath, UserGoal, VocabularyWord, LearningSession
 from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime, date, timedelta
@@ -11,9 +15,9 @@ from sqlalchemy import func
 import json
 
 user_bp = Blueprint('user', __name__)
-progress_service = ProgressService()
-gamification_service = GamificationService()
-personalization_service = PersonalizationService()
+progress_service = lazy_service(ProgressService)
+gamification_service = lazy_service(GamificationService)
+personalization_service = lazy_service(PersonalizationService)
 
 @user_bp.route('/profile', methods=['GET'])
 @jwt_required()
@@ -305,6 +309,82 @@ def change_password():
             'telugu_message': 'పాస్‌వర్డ్ మార్చడంలో విఫలం'
         }), 500
 
+def user_statistics(user_id):
+    """Overall, weekly, today's and vocabulary learning statistics."""
+    # Get basic stats
+    total_sessions = LearningSession.query.filter_by(user_id=user_id).count()
+    total_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id).scalar() or 0
+    
+    total_vocabulary = VocabularyWord.query.filter_by(user_id=user_id).count()
+    mastered_words = VocabularyWord.query.filter(
+        VocabularyWord.user_id == user_id, 
+        VocabularyWord.mastery_level >= 0.8  # Consider words with 80%+ mastery as "mastered"
+    ).count()
+    
+    # Get weekly stats
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    weekly_sessions = LearningSession.query.filter(
+        LearningSession.user_id == user_id,
+        LearningSession.start_time >= week_ago
+    ).count()
+    
+    weekly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id,
+               LearningSession.start_time >= week_ago).scalar() or 0
+    
+    # Get streak info
+    user = User.query.get(user_id)
+    daily_streak = StreakService.get_daily_streak(user)
+    current_streak = daily_streak['current_streak']
+    longest_streak = daily_streak['longest_streak']
+    
+    # Get goal progress
+    current_goal = active_goal(user_id)
+    
+    today = date.today()
+    today_time = db.session.query(func.sum(LearningSession.duration_minutes))\
+        .filter(LearningSession.user_id == user_id,
+               func.date(LearningSession.start_time) == today).scalar() or 0
+    
+    goal_progress = 0
+    if current_goal and current_goal.daily_time_goal_minutes > 0:
+        goal_progress = min(100, (today_time / current_goal.daily_time_goal_minutes) * 100)
+    
+    return {
+        'overall': {
+            'total_learning_sessions': total_sessions,
+            'total_learning_time_minutes': total_time,
+            'total_vocabulary_learned': total_vocabulary,
+            'words_mastered': mastered_words,
+            'current_streak_days': current_streak,
+            'longest_streak_days': longest_streak
+        },
+        'this_week': {
+            'sessions_completed': weekly_sessions,
+            'time_spent_minutes': weekly_time,
+            'average_session_length': round(weekly_time / weekly_sessions, 1) if weekly_sessions > 0 else 0
+        },
+        'today': {
+            'time_spent_minutes': today_time,
+            'goal_progress_percentage': round(goal_progress, 1),
+            'daily_goal_minutes': current_goal.daily_time_goal_minutes if current_goal else 0
+        },
+        'vocabulary_breakdown': {
+            'total_words': total_vocabulary,
+            'mastered': mastered_words,
+            'learning': VocabularyWord.query.filter(
+                VocabularyWord.user_id == user_id, 
+                VocabularyWord.mastery_level >= 0.3,
+                VocabularyWord.mastery_level < 0.8
+            ).count(),  # Words with 30-79% mastery are "learning"
+            'new': VocabularyWord.query.filter(
+                VocabularyWord.user_id == user_id, 
+                VocabularyWord.mastery_level < 0.3
+            ).count()  # Words with <30% mastery are "new"
+        }
+    }
+
 @user_bp.route('/statistics', methods=['GET'])
 @jwt_required()
 def get_user_statistics():
@@ -312,78 +392,7 @@ def get_user_statistics():
     try:
         user_id = int(get_jwt_identity())
         
-        # Get basic stats
-        total_sessions = LearningSession.query.filter_by(user_id=user_id).count()
-        total_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id).scalar() or 0
-        
-        total_vocabulary = VocabularyWord.query.filter_by(user_id=user_id).count()
-        mastered_words = VocabularyWord.query.filter(
-            VocabularyWord.user_id == user_id, 
-            VocabularyWord.mastery_level >= 0.8  # Consider words with 80%+ mastery as "mastered"
-        ).count()
-        
-        # Get weekly stats
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        weekly_sessions = LearningSession.query.filter(
-            LearningSession.user_id == user_id,
-            LearningSession.start_time >= week_ago
-        ).count()
-        
-        weekly_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id,
-                   LearningSession.start_time >= week_ago).scalar() or 0
-        
-        # Get streak info
-        user = User.query.get(user_id)
-        current_streak = user.profile.current_streak if user.profile else 0
-        longest_streak = user.profile.longest_streak if user.profile else 0
-        
-        # Get goal progress
-        current_goal = UserGoal.query.filter_by(user_id=user_id, is_active=True).first()
-        
-        today = date.today()
-        today_time = db.session.query(func.sum(LearningSession.duration_minutes))\
-            .filter(LearningSession.user_id == user_id,
-                   func.date(LearningSession.start_time) == today).scalar() or 0
-        
-        goal_progress = 0
-        if current_goal and current_goal.daily_time_goal_minutes > 0:
-            goal_progress = min(100, (today_time / current_goal.daily_time_goal_minutes) * 100)
-        
-        statistics = {
-            'overall': {
-                'total_learning_sessions': total_sessions,
-                'total_learning_time_minutes': total_time,
-                'total_vocabulary_learned': total_vocabulary,
-                'words_mastered': mastered_words,
-                'current_streak_days': current_streak,
-                'longest_streak_days': longest_streak
-            },
-            'this_week': {
-                'sessions_completed': weekly_sessions,
-                'time_spent_minutes': weekly_time,
-                'average_session_length': round(weekly_time / weekly_sessions, 1) if weekly_sessions > 0 else 0
-            },
-            'today': {
-                'time_spent_minutes': today_time,
-                'goal_progress_percentage': round(goal_progress, 1),
-                'daily_goal_minutes': current_goal.daily_time_goal_minutes if current_goal else 0
-            },
-            'vocabulary_breakdown': {
-                'total_words': total_vocabulary,
-                'mastered': mastered_words,
-                'learning': VocabularyWord.query.filter(
-                    VocabularyWord.user_id == user_id, 
-                    VocabularyWord.mastery_level >= 0.3,
-                    VocabularyWord.mastery_level < 0.8
-                ).count(),  # Words with 30-79% mastery are "learning"
-                'new': VocabularyWord.query.filter(
-                    VocabularyWord.user_id == user_id, 
-                    VocabularyWord.mastery_level < 0.3
-                ).count()  # Words with <30% mastery are "new"
-            }
-        }
+        statistics = user_statistics(user_id)
         
         return jsonify({
             'message': 'Statistics retrieved successfully!',
@@ -561,8 +570,10 @@ def log_activity_completion():
             time_spent_minutes, feedback_provided
         )
         
-        # Check for new achievements
-        new_badges = gamification_service.check_for_new_achievements(user_id)
+        # Check the badges affected by the completion and the points it earned
+        new_badges = gamification_service.check_for_new_achievements(
+            user_id, [ACTIVITY_COMPLETED, POINTS_AWARDED]
+        )
         
         # Update streak
         gamification_service.update_streak(user_id)
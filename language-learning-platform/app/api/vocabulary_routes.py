@@ -1,11 +1,28 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import db, VocabularyWord, User, LearningSession
+from app.services.vocabulary_search_service import VocabularySearchService
 from datetime import datetime
 from sqlalchemy import or_, and_
 
 vocabulary_bp = Blueprint('vocabulary', __name__)
 
+def _serialize_word(word):
+    """Serialize a vocabulary word for list responses."""
+    return {
+        'id': word.id,
+        'english_word': word.english_word,
+        'telugu_translation': word.telugu_translation,
+        'example_sentence': word.context_sentence,
+        'category': word.category,
+        'difficulty_level': word.difficulty_level,
+        'mastery_level': word.mastery_level,
+        'practice_count': word.times_practiced,
+        'times_encountered': word.times_encountered,
+        'created_at': word.discovered_at.isoformat() if word.discovered_at else None,
+        'last_practiced': word.last_practiced.isoformat() if word.last_practiced else None
+    }
+
 @vocabulary_bp.route('/words', methods=['GET'])
 @jwt_required()
 def get_vocabulary_words():
@@ -26,12 +43,9 @@ def get_vocabulary_words():
         query = VocabularyWord.query.filter_by(user_id=user_id)
         
         # Apply filters
-        if search:
-            query = query.filter(or_(
-                VocabularyWord.english_word.ilike(f'%{search}%'),
-                VocabularyWord.telugu_translation.ilike(f'%{search}%'),
-                VocabularyWord.definition.ilike(f'%{search}%')
-            ))
+        search_filter = VocabularySearchService.search_filter(search) if search else None
+        if search_filter is not None:
+            query = query.filter(search_filter)
         
         if difficulty and difficulty in ['beginner', 'intermediate', 'advanced']:
             query = query.filter_by(difficulty_level=difficulty)
@@ -40,6 +54,12 @@ def get_vocabulary_words():
             query = query.filter_by(mastery_level=mastery_level)
         
         # Apply sorting
+        if sort_by == 'relevance' and search_filter is not None:
+            query = query.order_by(
+                VocabularySearchService.relevance_order(search),
+                VocabularyWord.english_search_key.asc()
+            )
+        
         if sort_by == 'alphabetical':
             order_column = VocabularyWord.english_word
         elif sort_by == 'difficulty':
@@ -47,7 +67,7 @@ def get_vocabulary_words():
         elif sort_by == 'mastery':
             order_column = VocabularyWord.mastery_level
         else:
-            order_column = VocabularyWord.created_at
+            order_column = VocabularyWord.discovered_at
         
         if sort_order == 'asc':
             query = query.order_by(order_column.asc())
@@ -59,22 +79,7 @@ def get_vocabulary_words():
             page=page, per_page=per_page, error_out=False
         )
         
-        words = []
-        for word in pagination.items:
-            words.append({
-                'id': word.id,
-                'english_word': word.english_word,
-                'telugu_translation': word.telugu_translation,
-                'phonetic_spelling': word.phonetic_spelling,
-                'definition': word.definition,
-                'example_sentence': word.example_sentence,
-                'difficulty_level': word.difficulty_level,
-                'mastery_level': word.mastery_level,
-                'practice_count': word.practice_count,
-                'correct_count': word.correct_count,
-                'created_at': word.created_at.isoformat() if word.created_at else None,
-                'last_practiced': word.last_practiced.isoformat() if word.last_practiced else None
-            })
+        words = [_serialize_word(word) for word in pagination.items]
         
         return jsonify({
             'message': 'Vocabulary words retrieved successfully',
@@ -97,6 +102,29 @@ def get_vocabulary_words():
             'telugu_error': 'పదజాలం పదాలు పొందడంలో విఫలం'
         }), 500
 
+@vocabulary_bp.route('/words/suggest', methods=['GET'])
+@jwt_required()
+def suggest_vocabulary_words():
+    """Type-ahead suggestions from the user's word list (English or Telugu prefix)"""
+    try:
+        user_id = int(get_jwt_identity())
+        prefix = request.args.get('q', '')
+        limit = min(request.args.get('limit', 10, type=int), 25)
+        
+        suggestions = VocabularySearchService.suggest(user_id, prefix, limit=limit)
+        
+        return jsonify({
+            'query': prefix,
+            'suggestions': suggestions
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting vocabulary suggestions: {str(e)}")
+        return jsonify({
+            'error': 'Failed to get vocabulary suggestions',
+            'telugu_error': 'పద సూచనలు పొందడంలో విఫలం'
+        }), 500
+
 @vocabulary_bp.route('/words', methods=['POST'])
 @jwt_required()
 def add_vocabulary_word():
@@ -0,0 +1,59 @@
+from sqlalchemy import event
+from app.models import db
+import multiprocessing
+import threading
+import zlib
+
+# Counter slots; names are hashed onto them, so a collision only costs a spurious reload
+_SLOTS = 256
+_CHANGED_CACHES_KEY = 'changed_caches'
+
+
+class CacheGenerations:
+    """
+    A change counter per process-local cache. A cache remembers the
+    generation it was built at and rebuilds once the counter moves on.
+    Counters start out private to the process; share() (called by the
+    pre-fork master, see app/prefork.py) moves them into shared memory, so a
+    change committed by one worker invalidates that cache in every sibling.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = [0] * _SLOTS
+
+    @staticmethod
+    def _slot(name):
+        return zlib.crc32(name.encode('utf-8')) % _SLOTS
+
+    def current(self, name):
+        return self._counters[self._slot(name)]
+
+    def bump(self, name):
+        with self._lock:
+            self._counters[self._slot(name)] += 1
+
+    def share(self):
+        """Move the counters into memory inherited by processes forked after this call."""
+        shared = multiprocessing.Array('q', list(self._counters))
+        self._lock = shared.get_lock()
+        self._counters = shared.get_obj()
+
+
+cache_generations = CacheGenerations()
+
+
+def mark_changed(name):
+    """Bump a cache's generation once the current transaction commits."""
+    db.session.info.setdefault(_CHANGED_CACHES_KEY, set()).add(name)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_committed_changes(session):
+    for name in session.info.pop(_CHANGED_CACHES_KEY, ()):
+        cache_generations.bump(name)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop(_CHANGED_CACHES_KEY, None)
@@ -0,0 +1,110 @@
+from flask import request, current_app
+from app.http_cache import response_store
+import logging
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: responses are only gzipped without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'}
+# Event streams must reach the client event by event, so they are never buffered in a compressor
+UNCOMPRESSED_MIMETYPES = {'text/event-stream'}
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    if mimetype in UNCOMPRESSED_MIMETYPES:
+        return False
+    return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith('text/') or mimetype.endswith('+json')
+
+
+def _codings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compressor(coding):
+    """A (compress(chunk), finish()) pair for a content coding."""
+    config = current_app.config
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(config.get('COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)  # 31: gzip container
+    return compressor.compress, compressor.flush
+
+
+def _compress(coding, body):
+    compress, finish = _compressor(coding)
+    return compress(body) + finish()
+
+
+def _compress_stream(coding, chunks):
+    # The compressor is built now: the generator runs after the request context is gone
+    compress, finish = _compressor(coding)
+
+    def generate():
+        for chunk in chunks:
+            compressed = compress(chunk)
+            if compressed:
+                yield compressed
+        yield finish()
+    return generate()
+
+
+def _chunks(body):
+    for start in range(0, len(body), STREAM_CHUNK_BYTES):
+        yield body[start:start + STREAM_CHUNK_BYTES]
+
+
+def compress_response(response):
+    """
+    after_request hook: compress the body with the best coding the client
+    accepts (brotli if installed, else gzip). Bodies under
+    COMPRESSION_MIN_BYTES are sent as they are. Responses carrying a strong
+    ETag (see app/http_cache.py) are compressed once per coding and stored
+    next to the identity body; the coding is appended to their ETag, as a
+    strong ETag names one exact byte sequence. Streamed bodies, and bodies
+    over COMPRESSION_STREAM_BYTES, are compressed chunk by chunk as they are
+    sent.
+    """
+    config = current_app.config
+    if not config.get('COMPRESSION_ENABLED', True) or response.direct_passthrough or \
+            response.status_code < 200 or response.status_code in (204, 206) or \
+            'Content-Encoding' in response.headers or not _compressible(response):
+        return response
+
+    streamed = response.is_streamed
+    size = None if streamed else response.calculate_content_length()
+    if size is not None and size < config.get('COMPRESSION_MIN_BYTES', 1024):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    coding = request.accept_encodings.best_match(_codings())
+    if coding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if streamed or size > config.get('COMPRESSION_STREAM_BYTES', 1024 * 1024):
+        response.response = _compress_stream(coding, response.iter_encoded() if streamed else
+                                             _chunks(response.get_data()))
+        response.headers.pop('Content-Length', None)
+    elif etag and not weak:
+        stored = response_store.get((etag, coding))
+        if stored is None:
+            stored = response_store.put((etag, coding), _compress(coding, response.get_data()), response.mimetype)
+        response.set_data(stored.body)
+    else:
+        response.set_data(_compress(coding, response.get_data()))
+
+    if etag:
+        response.set_etag(f'{etag}-{coding}', weak)
+    response.headers['Content-Encoding'] = coding
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
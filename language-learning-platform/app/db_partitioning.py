@@ -0,0 +1,215 @@
+from datetime import date, datetime
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# High-volume history tables and their monthly range partition key. Nearly every
+# query filters on a recent window of the key, so PostgreSQL can prune the
+# partitions outside it. Order matters: user_activity_logs goes first so the
+# foreign key from activity_question_responses is replaced (see
+# PARTITIONED_REFERENCES) before that table is rebuilt.
+PARTITIONED_TABLES = {
+    'user_activity_logs': 'completed_at',
+    'user_learning_timeline': 'created_at',
+    'activity_question_responses': 'created_at',
+    'assessment_question_responses': 'created_at',
+}
+
+# Foreign keys into partitioned tables: (referencing table, id column) -> (referenced
+# table, column holding a copy of the referenced row's partition key). PostgreSQL
+# can only reference a partitioned table by its whole primary key, (id, partition
+# key), so these become composite foreign keys once the referenced table is
+# partitioned. ON UPDATE CASCADE follows the partition key when a row is updated
+# (e.g. a retried activity's completed_at), which needs PostgreSQL 15 or later.
+PARTITIONED_REFERENCES = {
+    ('activity_question_responses', 'activity_log_id'): ('user_activity_logs', 'activity_log_completed_at'),
+}
+
+# Indexes declared on each partitioned parent; PostgreSQL creates them on every partition
+PARTITION_INDEXES = {
+    'user_activity_logs': [('user_id', 'completed_at'), ('activity_id',), ('user_id', 'activity_id')],
+    'user_learning_timeline': [('user_id', 'created_at'), ('user_id', 'event_type')],
+    'activity_question_responses': [('user_id', 'created_at'), ('activity_log_id',)],
+    'assessment_question_responses': [('user_id', 'created_at'), ('assessment_id',)],
+}
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def is_partitioned(connection, table):
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {'table': table}).scalar()
+
+
+def list_monthly_partitions(connection, table):
+    """Return {month: partition_name} for the table's monthly partitions, oldest first."""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {'table': table}).scalars().all()
+
+    prefix = f'{table}_p'
+    partitions = {}
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_monthly_partition(connection, table, month):
+    """
+    Create and attach the partition for the given month if it doesn't exist yet.
+    Rows that already landed in the default partition for that month are moved
+    into it, so this is safe to run for past as well as upcoming months.
+    Returns the partition name, or None if it already existed.
+    """
+    key = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    if connection.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar():
+        return None
+
+    bounds = {'lower': month, 'upper': add_months(month, 1)}
+    default = f'{table}_default'
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    if connection.execute(text("SELECT to_regclass(:name)"), {'name': default}).scalar():
+        connection.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {key} >= :lower AND {key} < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+    connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['lower'].isoformat()}') TO ('{bounds['upper'].isoformat()}')"
+    ))
+    return name
+
+
+def add_partitioned_reference(connection, table, column):
+    """Add the composite foreign key PARTITIONED_REFERENCES names for table.column."""
+    referenced, key_column = PARTITIONED_REFERENCES[(table, column)]
+    key = PARTITIONED_TABLES[referenced]
+    connection.execute(text(
+        f"UPDATE {table} t SET {key_column} = r.{key} FROM {referenced} r "
+        f"WHERE r.id = t.{column} AND t.{key_column} IS DISTINCT FROM r.{key}"
+    ))
+    # Rows whose referenced row is already gone (archived) get a NULL key, which the foreign key doesn't check
+    connection.execute(text(
+        f"UPDATE {table} t SET {key_column} = NULL WHERE {key_column} IS NOT NULL AND NOT EXISTS "
+        f"(SELECT 1 FROM {referenced} r WHERE r.id = t.{column} AND r.{key} = t.{key_column})"
+    ))
+    connection.execute(text(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+        f"FOREIGN KEY ({column}, {key_column}) REFERENCES {referenced} (id, {key}) ON UPDATE CASCADE"
+    ))
+
+
+def convert_to_partitioned(connection, table, months_ahead=3):
+    """
+    Rebuild an unpartitioned table as a monthly range-partitioned one, keeping its
+    rows, id sequence and outgoing foreign keys. The primary key becomes
+    (id, partition key), as PostgreSQL requires, so foreign keys into the
+    table are replaced by the composite ones in PARTITIONED_REFERENCES.
+    Returns False if the table is already partitioned.
+    """
+    key = PARTITIONED_TABLES[table]
+    if is_partitioned(connection, table):
+        return False
+
+    legacy = f'{table}_unpartitioned'
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+    primary_key = connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'p'"
+    ), {'table': table}).scalar()
+
+    # The partition key must be NOT NULL; rows that never had one are stamped now
+    connection.execute(text(f"UPDATE {table} SET {key} = timezone('utc', now()) WHERE {key} IS NULL"))
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    if primary_key:
+        connection.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {primary_key} TO {legacy}_pkey"))
+
+    connection.execute(text(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})"))
+    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL"))
+    connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {key})"))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+    # One partition per month from the oldest row up to a few months ahead,
+    # plus a default partition so out-of-range timestamps never fail an insert
+    oldest = connection.execute(text(f"SELECT min({key}) FROM {legacy}")).scalar()
+    current = month_start(datetime.utcnow())
+    month = month_start(oldest) if oldest else current
+    while month <= add_months(current, months_ahead):
+        create_monthly_partition(connection, table, month)
+        month = add_months(month, 1)
+    connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}"))
+
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid), confrelid::regclass::text FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:legacy) AND contype = 'f'"
+    ), {'legacy': legacy}).fetchall()
+    for name, definition, referenced in foreign_keys:
+        # Foreign keys into tables partitioned earlier are already the composite ones
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+
+    referencing = connection.execute(text(
+        "SELECT c.conrelid::regclass::text, c.conname, a.attname FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+        "WHERE c.confrelid = to_regclass(:legacy) AND c.contype = 'f'"
+    ), {'legacy': legacy}).fetchall()
+    for referencing_table, name, column in referencing:
+        connection.execute(text(f"ALTER TABLE {referencing_table} DROP CONSTRAINT {name}"))
+        if (referencing_table, column) in PARTITIONED_REFERENCES:
+            add_partitioned_reference(connection, referencing_table, column)
+        else:
+            logger.warning(f"Dropped foreign key {referencing_table}.{name}: {table} is now partitioned")
+
+    connection.execute(text(f"DROP TABLE {legacy}"))
+
+    for columns in PARTITION_INDEXES[table]:
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+        ))
+    connection.execute(text(f"ANALYZE {table}"))
+    return True
+
+
+def convert_to_unpartitioned(connection, table):
+    """Inverse of convert_to_partitioned, used by the migration downgrade."""
+    if not is_partitioned(connection, table):
+        return False
+
+    partitioned = f'{table}_partitioned'
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f' AND conparentid = 0"
+    ), {'table': table}).fetchall()
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {partitioned}"))
+    connection.execute(text(f"ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey"))
+    connection.execute(text(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)"))
+    connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)"))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {partitioned}"))
+    connection.execute(text(f"DROP TABLE {partitioned}"))
+
+    for name, definition in foreign_keys:
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+    return True
@@ -0,0 +1,119 @@
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Thread-safe counters for connection checkouts on one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.slow_checkouts = 0
+        self.last_timeout_at = None
+
+    def record_wait(self, seconds, slow_threshold):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if seconds >= slow_threshold:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self.last_timeout_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts_total': self.checkouts,
+                'checkout_timeouts_total': self.timeouts,
+                'slow_checkouts_total': self.slow_checkouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'last_timeout_at': self.last_timeout_at
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout and logs slow or exhausted checkouts."""
+
+    slow_checkout_seconds = 0.5
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            logger.error(f"Database pool exhausted after {time.perf_counter() - started:.2f}s: {self.status()}")
+            raise
+
+        waited = time.perf_counter() - started
+        self.stats.record_wait(waited, self.slow_checkout_seconds)
+        if waited >= self.slow_checkout_seconds:
+            logger.warning(f"Slow database pool checkout ({waited:.2f}s): {self.status()}")
+        return connection
+
+
+def configure_engine_options(app):
+    """Swap in the instrumented pool for pooled engines. Call before db.init_app()."""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options and 'poolclass' not in options:
+        InstrumentedQueuePool.slow_checkout_seconds = app.config.get('DB_POOL_SLOW_CHECKOUT_SECONDS', 0.5)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, 'poolclass': InstrumentedQueuePool}
+
+
+def register_pool_listeners(app, db):
+    """
+    Attach per-engine listeners. Call after db.init_app(). Behind a
+    transaction-mode pooler the statement timeout can't be a startup
+    parameter, so it is set at the start of every transaction instead.
+    """
+    statement_timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if not (app.config.get('DB_PGBOUNCER_TRANSACTION_MODE') and statement_timeout_ms):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'postgresql':
+                continue
+
+            @event.listens_for(engine, 'begin')
+            def _set_statement_timeout(connection):
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
+
+
+def pool_metrics(db):
+    """Current pool occupancy and checkout telemetry for every configured bind."""
+    metrics = {}
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        entry = {'pool_class': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout_seconds': pool.timeout()
+            })
+        if isinstance(pool, InstrumentedQueuePool):
+            entry.update(pool.stats.snapshot())
+        metrics[bind_key or 'default'] = entry
+    return metrics
@@ -0,0 +1,110 @@
+from flask import g, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text, Insert, Update, Delete
+from functools import wraps
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_KEY = 'replica'
+
+# Lag is zero while the replica has replayed everything it has received;
+# otherwise it is the age of the last replayed transaction. Comparing the
+# LSNs avoids reporting lag on an idle primary.
+_POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class ReplicaHealth:
+    """
+    Process-wide, rate-limited view of whether the replica is usable.
+    The lag probe runs at most once per check interval; in between, the
+    cached verdict is reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = False
+        self.last_lag_seconds = None
+
+    def is_usable(self, engine, max_lag_seconds, check_interval_seconds):
+        now = time.monotonic()
+        if now - self._checked_at < check_interval_seconds:
+            return self._healthy
+
+        with self._lock:
+            if now - self._checked_at < check_interval_seconds:
+                return self._healthy
+            self._healthy = self._probe(engine, max_lag_seconds)
+            self._checked_at = now
+            return self._healthy
+
+    def _probe(self, engine, max_lag_seconds):
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = connection.execute(_POSTGRES_LAG_QUERY).scalar()
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = 0
+        except Exception as e:
+            logger.warning(f"Read replica unavailable, routing reads to primary: {e}")
+            self.last_lag_seconds = None
+            return False
+
+        self.last_lag_seconds = float(lag) if lag is not None else None
+        if self.last_lag_seconds is None or self.last_lag_seconds > max_lag_seconds:
+            logger.warning(f"Read replica lag {self.last_lag_seconds}s exceeds {max_lag_seconds}s, routing reads to primary")
+            return False
+        return True
+
+
+replica_health = ReplicaHealth()
+
+
+def _is_write(clause):
+    return isinstance(clause, (Insert, Update, Delete))
+
+
+def _replica_requested():
+    return has_app_context() and g.get('db_read_only', False)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads from @read_only endpoints to the replica bind.
+    Flushes and DML always go to the primary, and reads fall back to the
+    primary when no replica is configured or it is lagging.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause) and _replica_requested():
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None and replica_health.is_usable(
+                engine,
+                current_app.config.get('REPLICA_MAX_LAG_SECONDS', 30),
+                current_app.config.get('REPLICA_LAG_CHECK_INTERVAL_SECONDS', 10)
+            ):
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Mark an endpoint as read-only so its queries may be served by the read replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        previous = g.get('db_read_only', False)
+        g.db_read_only = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.db_read_only = previous
+    return wrapper
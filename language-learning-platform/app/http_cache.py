@@ -0,0 +1,139 @@
+from flask import request, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+from app.services.reference_data import reference_data
+from collections import OrderedDict
+from functools import wraps
+from typing import NamedTuple
+import hashlib
+import threading
+
+
+class StoredResponse(NamedTuple):
+    body: bytes
+    mimetype: str
+
+
+class ResponseStore:
+    """
+    Process-local LRU of response bodies keyed by ETag, or by (ETag, content
+    coding) for compressed copies (see app/compression.py). As an ETag is
+    derived from everything the body depends on, an entry never goes stale;
+    old ones just age out. Bounded by RESPONSE_CACHE_MAX_ENTRIES and
+    RESPONSE_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype):
+        config = current_app.config
+        max_entries = config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000)
+        max_bytes = config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        entry = StoredResponse(body, mimetype)
+        if max_entries <= 0 or len(body) > max_bytes:
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = entry
+            self._size += len(body)
+            while len(self._entries) > max_entries or self._size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_store = ResponseStore()
+
+
+def _matching_etag(etag):
+    """
+    The If-None-Match tag naming the current body: etag itself or one of its
+    compressed variants (<etag>-<coding>, see app/compression.py). None if
+    there is no match.
+    """
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return etag
+    for tag in if_none_match.as_set(include_weak=True):
+        if tag == etag or tag.startswith(f'{etag}-'):
+            return tag
+    return None
+
+
+def _set_cache_headers(response, etag, per_user):
+    response.set_etag(etag)
+    if per_user:
+        # Revalidate every time, and never let a shared cache hand one user's data to another
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Authorization')
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('RESPONSE_CACHE_MAX_AGE_SECONDS', 60)
+
+
+def conditional(*tables, user_versions=None):
+    """
+    Conditional GET for an endpoint whose response depends only on its URL,
+    the given reference tables (see app/services/reference_data.py) and, for
+    per-user endpoints, whatever user_versions(user_id) stamps. The ETag is
+    derived from those versions before the view runs, so a matching
+    If-None-Match gets a 304, and a body already rendered for the same ETag
+    is served from the response store, both without running the view.
+
+    Per-user endpoints go below @jwt_required() and are sent as private,
+    always-revalidate responses; the others are public for
+    RESPONSE_CACHE_MAX_AGE_SECONDS.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            per_user = user_versions is not None
+            key = [current_app.config.get('RELEASE_ID', ''), request.full_path, reference_data.versions(*tables)]
+            if per_user:
+                user_id = int(get_jwt_identity())
+                key += [user_id, user_versions(user_id)]
+            etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+            matched = _matching_etag(etag)
+            if matched is not None:
+                response = current_app.response_class(status=304)
+                if matched != etag:
+                    # The client holds a compressed variant: the 304 names that one, as its 200 did
+                    response.vary.add('Accept-Encoding')
+                _set_cache_headers(response, matched, per_user)
+                return response
+
+            stored = response_store.get(etag)
+            if stored is not None:
+                response = current_app.response_class(stored.body, mimetype=stored.mimetype)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_store.put(etag, response.get_data(), response.mimetype)
+
+            _set_cache_headers(response, etag, per_user)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+from flask.json.provider import DefaultJSONProvider
+from datetime import date
+import logging
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value):
+    # ISO 8601 on the stdlib path too, rather than Flask's RFC 822 dates
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, installed as app.json so jsonify,
+    request.get_json and the live session channels all use it.
+
+    Output is UTF-8 (Telugu text is not \\u-escaped), keys keep their
+    insertion order, datetimes and dates are ISO 8601 like the .isoformat()
+    calls throughout the API, and numpy scalars and arrays are encoded
+    natively. Anything orjson can't encode (integers beyond 64 bits, unknown
+    keyword arguments) or decode (non-UTF-8 bodies, NaN literals) goes
+    through the stdlib provider, as does everything when orjson isn't
+    installed.
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def _options(self, indent=None, sort_keys=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    @staticmethod
+    def _orjson_default(default):
+        def encode(value):
+            if isinstance(value, tuple):  # named tuples, e.g. reference data snapshots
+                return list(value)
+            return default(value)
+        return encode
+
+    def dump_bytes(self, obj, default=None, indent=None, sort_keys=None, **kwargs):
+        """Serialize to UTF-8 bytes, the form responses and sockets send."""
+        if orjson is not None and not kwargs.keys() - {'separators', 'ensure_ascii'}:
+            try:
+                return orjson.dumps(obj, default=self._orjson_default(default or self.default),
+                                    option=self._options(indent, sort_keys))
+            except orjson.JSONEncodeError as e:
+                logger.debug(f"Falling back to the stdlib JSON encoder: {e}")
+        if default is not None:
+            kwargs['default'] = default
+        if indent is not None:
+            kwargs['indent'] = indent
+        else:
+            kwargs.setdefault('separators', (',', ':'))
+        if sort_keys is not None:
+            kwargs['sort_keys'] = sort_keys
+        return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        return self.dump_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dump_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype)
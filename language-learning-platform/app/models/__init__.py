@@ -1,7 +1,7 @@
 from .user import db, User, Profile
 from .course import LearningPath, Course
 from .activity import Activity, UserActivityLog, ConceptMastery, AdaptiveLearningPathProgress, AdaptiveLearningSession
-from .gamification import Badge, UserBadge, Achievement
+from .gamification import Badge, UserBadge, Achievement, LeaderboardLedger, UserAchievementCounter
 from .personalization import (
     UserGoal, ProficiencyAssessment, VocabularyWord, 
     MistakePattern, LearningSession, DailyChallenge, UserDailyChallengeCompletion
@@ -12,17 +12,20 @@ from .chapter import (
 )
 from .analytics import (
     AssessmentQuestionResponse, ActivityQuestionResponse, UserAnalytics,
-    LearningStreak, AIGeneratedContent, UserLearningTimeline, PerformanceTrend
+    LearningStreak, AIGeneratedContent, UserLearningTimeline, PerformanceTrend,
+    MonthlyActivityRollup
 )
+from .reference_data import ReferenceDataVersion
 
 __all__ = [
     'db', 'User', 'Profile', 'LearningPath', 'Course', 
     'Activity', 'UserActivityLog', 'ConceptMastery', 'AdaptiveLearningPathProgress', 'AdaptiveLearningSession',
-    'Badge', 'UserBadge', 'Achievement',
+    'Badge', 'UserBadge', 'Achievement', 'LeaderboardLedger', 'UserAchievementCounter',
     'UserGoal', 'ProficiencyAssessment', 'VocabularyWord', 
     'MistakePattern', 'LearningSession', 'DailyChallenge', 'UserDailyChallengeCompletion',
     'Chapter', 'UserChapterProgress', 'PracticeSession', 'UserNotes', 
     'TestAssessment', 'ChapterDependency', 'AIConversationContext',
     'AssessmentQuestionResponse', 'ActivityQuestionResponse', 'UserAnalytics',
-    'LearningStreak', 'AIGeneratedContent', 'UserLearningTimeline', 'PerformanceTrend'
+    'LearningStreak', 'AIGeneratedContent', 'UserLearningTimeline', 'PerformanceTrend',
+    'MonthlyActivityRollup', 'ReferenceDataVersion'
 ]
\ No newline at end of file
@@ -1,6 +1,43 @@
 
 from .user import db
 from datetime import datetime
+from sqlalchemy import event, inspect, exists, DDL
+import unicodedata
+
+# Combining marks of the Telugu block. SQLite's unicode61 tokenizer treats
+# them as separators by default, which splits words like "నమస్కారం" apart.
+TELUGU_TOKENCHARS = ''.join(
+    chr(cp) for cp in range(0x0C00, 0x0C80)
+    if unicodedata.category(chr(cp)).startswith('M')
+)
+SEARCH_TEXT_MAX_LENGTH = 20000
+CONTENT_PREVIEW_LENGTH = 200
+
+
+def extract_search_text(content):
+    """Flatten the string leaves of an activity's JSON content into searchable text."""
+    parts = []
+
+    def walk(node):
+        if isinstance(node, str):
+            text = node.strip()
+            if text and not text.startswith(('http://', 'https://', 'data:')):
+                parts.append(text)
+        elif isinstance(node, dict):
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, (list, tuple)):
+            for value in node:
+                walk(value)
+
+    walk(content)
+    return '\n'.join(parts)[:SEARCH_TEXT_MAX_LENGTH]
+
+
+def build_content_preview(content):
+    """Truncated rendering of an activity's content shown by list endpoints."""
+    text = str(content)
+    return text[:CONTENT_PREVIEW_LENGTH] + "..." if len(text) > CONTENT_PREVIEW_LENGTH else text
 
 class Activity(db.Model):
     __tablename__ = 'activities'
@@ -11,6 +48,8 @@ class Activity(db.Model):
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)  # Enhanced description
     content = db.Column(db.JSON, nullable=False)  # Stores the AI-generated JSON content
+    search_text = db.Column(db.Text)  # Text extracted from content, feeds the full-text index
+    content_preview = db.Column(db.String(255))  # Precomputed so list views never load content
     difficulty_level = db.Column(db.String(20), default='beginner')
     order_in_path = db.Column(db.Integer, nullable=False)
     estimated_duration_minutes = db.Column(db.Integer, default=10)  # in minutes
@@ -36,9 +75,88 @@ class Activity(db.Model):
     user_logs = db.relationship('UserActivityLog', backref='activity', lazy='dynamic', cascade='all, delete-orphan')
     child_activities = db.relationship('Activity', backref=db.backref('parent_activity', remote_side=[id]))
     
+    __table_args__ = (
+        db.Index('ix_activities_learning_path_id_order_in_path', 'learning_path_id', 'order_in_path'),
+        db.Index('ix_activities_difficulty_level_skill_area', 'difficulty_level', 'skill_area'),
+    )
+    
+    @classmethod
+    def not_completed_by(cls, user_id):
+        """
+        NOT EXISTS anti-join criterion for activities the user has no log for.
+        Each candidate costs one probe of ix_user_activity_logs_user_id_activity_id,
+        independent of how long the user's history is.
+        """
+        return ~exists().where(
+            UserActivityLog.user_id == user_id,
+            UserActivityLog.activity_id == cls.id
+        )
+    
     def __repr__(self):
         return f'<Activity {self.title} ({self.activity_type})>'
 
+
+@event.listens_for(Activity, 'before_insert')
+@event.listens_for(Activity, 'before_update')
+def _refresh_activity_derived_text(mapper, connection, target):
+    # Only recompute when content changed, so updates don't load a deferred content column
+    state = inspect(target)
+    if state.persistent and not state.attrs.content.history.has_changes():
+        return
+    target.search_text = extract_search_text(target.content)
+    target.content_preview = build_content_preview(target.content)
+
+
+# Full-text index over title, description and extracted content text.
+# PostgreSQL: a stored tsvector column with a GIN index, maintained by the database.
+# SQLite (development): an external-content FTS5 table kept in sync by triggers.
+ACTIVITY_SEARCH_DDL = {
+    'postgresql': [
+        """
+        ALTER TABLE activities ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(search_text, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_activities_search_vector ON activities USING GIN (search_vector)",
+    ],
+    'sqlite': [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS activities_fts USING fts5(
+            title, description, search_text,
+            content='activities', content_rowid='id',
+            tokenize="unicode61 tokenchars '{TELUGU_TOKENCHARS}'"
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS activities_fts_ai AFTER INSERT ON activities BEGIN
+            INSERT INTO activities_fts(rowid, title, description, search_text)
+            VALUES (new.id, new.title, new.description, new.search_text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS activities_fts_ad AFTER DELETE ON activities BEGIN
+            INSERT INTO activities_fts(activities_fts, rowid, title, description, search_text)
+            VALUES ('delete', old.id, old.title, old.description, old.search_text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS activities_fts_au AFTER UPDATE ON activities BEGIN
+            INSERT INTO activities_fts(activities_fts, rowid, title, description, search_text)
+            VALUES ('delete', old.id, old.title, old.description, old.search_text);
+            INSERT INTO activities_fts(rowid, title, description, search_text)
+            VALUES (new.id, new.title, new.description, new.search_text);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in ACTIVITY_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Activity.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
 class UserActivityLog(db.Model):
     __tablename__ = 'user_activity_logs'
     
@@ -46,7 +164,7 @@ class UserActivityLog(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     activity_id = db.Column(db.Integer, db.ForeignKey('activities.id'), nullable=False)
     learning_path_id = db.Column(db.Integer, db.ForeignKey('learning_paths.id'), nullable=True)  # For easier queries
-    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)  # Monthly partition key on PostgreSQL (app/db_partitioning.py)
     score = db.Column(db.Integer)  # Score achieved (e.g., 4/5 for quiz)
     max_score = db.Column(db.Integer)  # Maximum possible score
     time_spent_minutes = db.Column(db.Integer)  # Time spent on activity
@@ -78,6 +196,10 @@ class UserActivityLog(db.Model):
     needs_review = db.Column(db.Boolean, default=False)  # Whether concept needs review
     next_review_date = db.Column(db.DateTime)  # For spaced repetition
     
+    __table_args__ = (
+        db.Index('ix_user_activity_logs_user_id_activity_id', 'user_id', 'activity_id'),
+    )
+    
     def __repr__(self):
         return f'<UserActivityLog {self.user.username} - {self.activity.title}>'
 
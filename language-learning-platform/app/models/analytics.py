@@ -1,5 +1,6 @@
 from .user import db
 from datetime import datetime
+from sqlalchemy import func, literal_column
 
 class AssessmentQuestionResponse(db.Model):
     """
@@ -42,7 +43,10 @@ class ActivityQuestionResponse(db.Model):
     __tablename__ = 'activity_question_responses'
     
     id = db.Column(db.Integer, primary_key=True)
+    # Once user_activity_logs is partitioned, PostgreSQL enforces this as a foreign key on
+    # (activity_log_id, activity_log_completed_at) (see PARTITIONED_REFERENCES in app/db_partitioning.py)
     activity_log_id = db.Column(db.Integer, db.ForeignKey('user_activity_logs.id'), nullable=False)
+    activity_log_completed_at = db.Column(db.DateTime)  # The log's completed_at, its partition key
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     activity_id = db.Column(db.Integer, db.ForeignKey('activities.id'), nullable=False)
     question_index = db.Column(db.Integer, nullable=False)  # Order within the activity
@@ -89,9 +93,24 @@ class UserAnalytics(db.Model):
     
     # Indexes will be added via migrations
     
+    @classmethod
+    def metric_key_elements(cls):
+        """
+        Natural key of a daily metric row. activity_type/skill_area are coalesced
+        so NULLs collide in the unique index and ON CONFLICT upserts can target it
+        (the empty string must render as a literal to match the index expression).
+        """
+        return [
+            cls.user_id, cls.metric_type, cls.date_recorded,
+            func.coalesce(cls.activity_type, literal_column("''")),
+            func.coalesce(cls.skill_area, literal_column("''"))
+        ]
+    
     def __repr__(self):
         return f'<UserAnalytics User:{self.user_id} {self.metric_type}:{self.metric_value}>'
 
+db.Index('ux_user_analytics_metric_key', *UserAnalytics.metric_key_elements(), unique=True)
+
 class LearningStreak(db.Model):
     """
     Tracks various types of learning streaks for gamification and motivation.
@@ -170,7 +189,10 @@ class UserLearningTimeline(db.Model):
     milestone_achieved = db.Column(db.String(100))  # Any milestone reached
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Indexes will be added via migrations
+    __table_args__ = (
+        # Collects a learning session's buffered interactions when it ends
+        db.Index('ix_user_learning_timeline_related_type_related_id', 'related_type', 'related_id'),
+    )
     
     def __repr__(self):
         return f'<UserLearningTimeline User:{self.user_id} {self.event_type}>'
@@ -215,4 +237,34 @@ class PerformanceTrend(db.Model):
     )
     
     def __repr__(self):
-        return f'<PerformanceTrend User:{self.user_id} {self.trend_period} {self.period_start}>'
\ No newline at end of file
+        return f'<PerformanceTrend User:{self.user_id} {self.trend_period} {self.period_start}>'
+
+class MonthlyActivityRollup(db.Model):
+    """
+    Per-user monthly aggregates of the partitioned history tables, written
+    before a cold partition is archived so long-range analytics survive it.
+    """
+    __tablename__ = 'monthly_activity_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source_table = db.Column(db.String(50), nullable=False)  # user_activity_logs, user_learning_timeline, ...
+    period_month = db.Column(db.Date, nullable=False)  # First day of the month
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category = db.Column(db.String(50), nullable=False, default='')  # skill_area, or event_type for the timeline
+    
+    event_count = db.Column(db.Integer, default=0)
+    score_sum = db.Column(db.Float, default=0.0)  # Score, or points earned where there is no score
+    max_score_sum = db.Column(db.Float, default=0.0)
+    correct_count = db.Column(db.Integer, default=0)
+    time_spent_minutes = db.Column(db.Float, default=0.0)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('source_table', 'user_id', 'period_month', 'category',
+                          name='unique_monthly_activity_rollup'),
+        db.Index('ix_monthly_activity_rollups_user_month', 'user_id', 'period_month'),
+    )
+    
+    def __repr__(self):
+        return f'<MonthlyActivityRollup User:{self.user_id} {self.source_table} {self.period_month}>'
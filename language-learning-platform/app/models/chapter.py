@@ -49,6 +49,7 @@ class UserChapterProgress(db.Model):
     completed_at = db.Column(db.DateTime)
     last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text)  # User notes for this chapter
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Unique constraint to ensure one progress record per user per chapter
     __table_args__ = (UniqueConstraint('user_id', 'chapter_id', name='unique_user_chapter_progress'),)
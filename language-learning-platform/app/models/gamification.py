@@ -1,6 +1,15 @@
 
 from .user import db
+from .activity import Activity, UserActivityLog
 from datetime import datetime
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
 
 class Badge(db.Model):
     __tablename__ = 'badges'
@@ -50,3 +59,120 @@ class Achievement(db.Model):
     
     def __repr__(self):
         return f'<Achievement {self.name}>'
+
+class LeaderboardLedger(db.Model):
+    """
+    Points earned per user in each leaderboard window (all-time, weekly, daily).
+    Updated on every award; the in-memory leaderboards are built from it.
+    """
+    __tablename__ = 'leaderboard_ledgers'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    period = db.Column(db.String(20), nullable=False)  # all_time, weekly, daily
+    period_start = db.Column(db.Date, nullable=False)  # Window start (UTC); fixed for all_time
+    points = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'period_start', name='unique_user_leaderboard_window'),
+        db.Index('ix_leaderboard_ledgers_window_updated', 'period', 'period_start', 'updated_at'),
+    )
+    
+    def __repr__(self):
+        return f'<LeaderboardLedger User:{self.user_id} {self.period} {self.period_start}: {self.points}>'
+
+
+class UserAchievementCounter(db.Model):
+    """
+    Running per-user totals that badge requirements are checked against
+    (activities_completed, perfect_scores, <activity_type>_completed).
+    Kept in step with user_activity_logs by the mapper events below.
+    """
+    __tablename__ = 'user_achievement_counters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    counter = db.Column(db.String(64), nullable=False)  # Matches Badge.requirement_type
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'counter', name='unique_user_achievement_counter'),
+    )
+    
+    def __repr__(self):
+        return f'<UserAchievementCounter User:{self.user_id} {self.counter}={self.value}>'
+
+
+def _is_perfect(score, max_score):
+    return score is not None and max_score is not None and max_score > 0 and score == max_score
+
+
+def bump_achievement_counters(connection, user_id, deltas):
+    """Add deltas ({counter: amount}) to a user's counters on the given connection."""
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': user_id, 'counter': counter, 'value': amount, 'updated_at': now}
+        for counter, amount in deltas.items() if amount
+    ]
+    if not rows:
+        return
+
+    table = UserAchievementCounter.__table__
+    dialect_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(rows)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'counter'],
+            set_={'value': table.c.value + stmt.excluded.value, 'updated_at': stmt.excluded.updated_at}
+        ))
+        return
+
+    for row in rows:
+        result = connection.execute(update(table).where(
+            table.c.user_id == row['user_id'], table.c.counter == row['counter']
+        ).values(value=table.c.value + row['value'], updated_at=row['updated_at']))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+
+@event.listens_for(UserActivityLog, 'after_insert')
+def _count_activity_log(mapper, connection, target):
+    activity_type = connection.execute(
+        select(Activity.activity_type).where(Activity.id == target.activity_id)
+    ).scalar()
+    deltas = {
+        'activities_completed': 1,
+        'perfect_scores': int(_is_perfect(target.score, target.max_score))
+    }
+    if activity_type:
+        deltas[f'{activity_type}_completed'] = 1
+    bump_achievement_counters(connection, target.user_id, deltas)
+
+
+@event.listens_for(UserActivityLog, 'after_update')
+def _recount_perfect_score(mapper, connection, target):
+    state = inspect(target)
+    score, max_score = state.attrs.score.history, state.attrs.max_score.history
+    if not (score.has_changes() or max_score.has_changes()):
+        return
+    was_perfect = _is_perfect(
+        (score.deleted or [target.score])[0], (max_score.deleted or [target.max_score])[0]
+    )
+    delta = int(_is_perfect(target.score, target.max_score)) - int(was_perfect)
+    bump_achievement_counters(connection, target.user_id, {'perfect_scores': delta})
+
+
+@event.listens_for(UserActivityLog, 'after_delete')
+def _uncount_activity_log(mapper, connection, target):
+    activity_type = connection.execute(
+        select(Activity.activity_type).where(Activity.id == target.activity_id)
+    ).scalar()
+    deltas = {
+        'activities_completed': -1,
+        'perfect_scores': -int(_is_perfect(target.score, target.max_score))
+    }
+    if activity_type:
+        deltas[f'{activity_type}_completed'] = -1
+    bump_achievement_counters(connection, target.user_id, deltas)
@@ -1,5 +1,26 @@
 from .user import db
 from datetime import datetime, date
+from sqlalchemy import event, DDL
+import re
+import unicodedata
+
+# Invisible format characters that Telugu keyboards and copy/paste insert
+# inconsistently (ZWNJ, ZWJ, ZWSP, word joiner, BOM, soft hyphen).
+_INVISIBLE_CHARS = dict.fromkeys(map(ord, '\u200c\u200d\u200b\u2060\ufeff\u00ad'))
+TELUGU_NUKTA = '\u0c3c'
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_search_text(text):
+    """
+    Fold English/Telugu text into a search key: NFC composition, invisible
+    joiners removed, nukta variants folded onto the base consonant, casefolded.
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', text).translate(_INVISIBLE_CHARS)
+    text = text.replace(TELUGU_NUKTA, '')
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
 
 class UserGoal(db.Model):
     __tablename__ = 'user_goals'
@@ -59,9 +80,47 @@ class VocabularyWord(db.Model):
     discovered_at = db.Column(db.DateTime, default=datetime.utcnow)
     source_activity_type = db.Column(db.String(50))  # chat, reading, role_play, etc.
     
+    # Normalized search keys (see normalize_search_text), maintained on write
+    english_search_key = db.Column(db.String(100))
+    telugu_search_key = db.Column(db.String(200))
+    
+    # Per-user prefix lookups for type-ahead
+    __table_args__ = (
+        db.Index('ix_vocabulary_words_user_english_key', 'user_id', 'english_search_key'),
+        db.Index('ix_vocabulary_words_user_telugu_key', 'user_id', 'telugu_search_key'),
+    )
+    
     def __repr__(self):
         return f'<VocabularyWord {self.english_word} -> {self.telugu_translation}>'
 
+
+@event.listens_for(VocabularyWord, 'before_insert')
+@event.listens_for(VocabularyWord, 'before_update')
+def _refresh_vocabulary_search_keys(mapper, connection, target):
+    target.english_search_key = normalize_search_text(target.english_word)[:100]
+    target.telugu_search_key = normalize_search_text(target.telugu_translation)[:200]
+
+
+# PostgreSQL: trigram GIN indexes for substring search and text_pattern_ops
+# B-trees so LIKE 'prefix%' is index-backed under any database collation.
+VOCABULARY_SEARCH_DDL = {
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_vocabulary_words_english_key_trgm "
+        "ON vocabulary_words USING GIN (english_search_key gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_vocabulary_words_telugu_key_trgm "
+        "ON vocabulary_words USING GIN (telugu_search_key gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_vocabulary_words_user_english_key_pattern "
+        "ON vocabulary_words (user_id, english_search_key text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_vocabulary_words_user_telugu_key_pattern "
+        "ON vocabulary_words (user_id, telugu_search_key text_pattern_ops)",
+    ],
+}
+
+for _dialect, _statements in VOCABULARY_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(VocabularyWord.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
 class MistakePattern(db.Model):
     __tablename__ = 'mistake_patterns'
     
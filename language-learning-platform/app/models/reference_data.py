@@ -0,0 +1,81 @@
+from .user import db
+from .course import LearningPath
+from .gamification import Badge, Achievement, _UPSERT_INSERTS
+from .activity import Activity
+from .personalization import DailyChallenge
+from .chapter import Chapter, ChapterDependency
+from datetime import datetime
+from sqlalchemy import event, update, inspect
+
+
+class ReferenceDataVersion(db.Model):
+    """
+    Change stamp per reference table (badges, chapters, learning paths...),
+    bumped in the writing transaction by the mapper events below, so
+    in-process copies of that table know when to reload.
+    """
+    __tablename__ = 'reference_data_versions'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReferenceDataVersion {self.table_name}={self.version}>'
+
+
+# Versioned tables, with the columns whose updates change the cached copy
+REFERENCE_TABLES = {
+    Badge: ('name', 'description', 'icon_url', 'category', 'requirement_type',
+            'requirement_value', 'points_reward', 'rarity'),
+    Achievement: ('name', 'description', 'achievement_type', 'target_value', 'points_reward', 'is_active'),
+    Chapter: ('title', 'description', 'chapter_number', 'difficulty_level', 'topic', 'subtopics',
+              'estimated_duration_minutes', 'required_score_to_pass', 'is_active'),
+    ChapterDependency: ('chapter_id', 'prerequisite_chapter_id', 'is_strict'),
+    LearningPath: ('title', 'description', 'category', 'difficulty_level', 'estimated_duration_hours',
+                   'prerequisites', 'learning_objectives', 'is_active', 'created_at'),
+    DailyChallenge: ('challenge_date', 'challenge_type', 'challenge_content', 'difficulty_level',
+                     'estimated_time_minutes'),
+    # Not cached itself: the version keys per-path activity totals (see app/api/course_routes.py)
+    Activity: ('learning_path_id',),
+}
+
+
+def bump_reference_version(connection, table_name):
+    """Advance a reference table's version on the given connection."""
+    table = ReferenceDataVersion.__table__
+    now = datetime.utcnow()
+    dialect_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(table_name=table_name, version=1, updated_at=now)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['table_name'],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+        return
+
+    result = connection.execute(update(table).where(
+        table.c.table_name == table_name
+    ).values(version=table.c.version + 1, updated_at=now))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(table_name=table_name, version=1, updated_at=now))
+
+
+def _bump_on_write(columns):
+    def on_insert_or_delete(mapper, connection, target):
+        bump_reference_version(connection, mapper.local_table.name)
+
+    def on_update(mapper, connection, target):
+        # Writes to columns that aren't cached (e.g. an adaptive path's history) don't count
+        state = inspect(target)
+        if any(state.attrs[column].history.has_changes() for column in columns):
+            bump_reference_version(connection, mapper.local_table.name)
+
+    return on_insert_or_delete, on_update
+
+
+for _model, _columns in REFERENCE_TABLES.items():
+    _on_insert_or_delete, _on_update = _bump_on_write(_columns)
+    event.listen(_model, 'after_insert', _on_insert_or_delete)
+    event.listen(_model, 'after_delete', _on_insert_or_delete)
+    event.listen(_model, 'after_update', _on_update)
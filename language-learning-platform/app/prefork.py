@@ -0,0 +1,67 @@
+from app.models import db
+from app.cache_generations import cache_generations
+import gc
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def warm_caches(app):
+    """
+    Load the read-mostly caches (reference data, badge rules, activity
+    catalog, content embeddings) in this process. Failures are logged and
+    left to lazy loading.
+    """
+    from app.services.achievement_service import achievement_rules
+    from app.services.activity_catalog import activity_catalog
+    from app.services.embedding_index import content_embeddings, ACTIVITIES, CHAPTERS
+    from app.services.reference_data import reference_data
+
+    warmers = {
+        'reference data': reference_data.warm,
+        'achievement rules': lambda: achievement_rules.get(app.config.get('ACHIEVEMENT_RULES_TTL_SECONDS', 300)),
+        'activity catalog': activity_catalog.get,
+        'activity embeddings': lambda: content_embeddings.get(ACTIVITIES),
+        'chapter embeddings': lambda: content_embeddings.get(CHAPTERS)
+    }
+    started = time.monotonic()
+    with app.app_context():
+        for name, warm in warmers.items():
+            try:
+                warm()
+            except Exception as e:
+                logger.warning(f"Could not warm {name} before forking: {e}")
+                db.session.rollback()
+        db.session.remove()
+    logger.info(f"Warmed reference caches in {time.monotonic() - started:.2f}s")
+
+
+def prepare_fork(app, workers=1):
+    """
+    Run in the master before the first worker is forked: share cache
+    generation counters, warm the caches, close the master's database
+    connections so no socket is shared with a worker, and freeze the heap so
+    the garbage collector doesn't touch (and copy) the inherited pages.
+    Refuses several workers on per-process session state, as a session
+    started on one worker would be unknown to the others.
+    """
+    if workers > 1 and (app.config.get('SESSION_STATE_BACKEND') or 'memory') == 'memory':
+        raise RuntimeError(
+            f"SESSION_STATE_BACKEND is 'memory' with {workers} workers; "
+            "use a sqlite:/// or redis:// backend, or a single worker"
+        )
+    cache_generations.share()
+    warm_caches(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Run in each worker right after the fork."""
+    with app.app_context():
+        # Drop any pooled connection inherited from the master without closing it under the master's feet
+        for engine in db.engines.values():
+            engine.dispose(close=False)
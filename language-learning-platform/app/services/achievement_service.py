@@ -0,0 +1,200 @@
+from flask import current_app
+from app.models import db, Profile, Badge, UserBadge, UserAchievementCounter
+from app.services.leaderboard_service import LeaderboardService
+from app.cache_generations import cache_generations, mark_changed
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from bisect import bisect_right
+from collections import defaultdict
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_COMPLETED = 'activity_completed'
+POINTS_AWARDED = 'points_awarded'
+STREAK_UPDATED = 'streak_updated'
+ACHIEVEMENT_EVENTS = (ACTIVITY_COMPLETED, POINTS_AWARDED, STREAK_UPDATED)
+
+ACHIEVEMENT_RULES_CACHE = 'achievement_rules'
+
+# Requirements read from the profile rather than user_achievement_counters
+_PROFILE_REQUIREMENTS = {
+    'points_earned': (POINTS_AWARDED, lambda profile: profile.points or 0),
+    'streak_days': (STREAK_UPDATED, lambda profile: profile.current_streak or 0),
+}
+
+
+def _event_for(requirement_type):
+    if requirement_type in _PROFILE_REQUIREMENTS:
+        return _PROFILE_REQUIREMENTS[requirement_type][0]
+    # activities_completed, perfect_scores and <activity_type>_completed
+    return ACTIVITY_COMPLETED
+
+
+class AchievementRuleIndex:
+    """
+    Badge rules compiled once into {event: {requirement_type: rules sorted by
+    threshold}}. Rebuilt when badges change in this process or a sibling
+    pre-forked worker, and otherwise after ACHIEVEMENT_RULES_TTL_SECONDS so
+    other hosts' edits are picked up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        self._rules = None
+
+    def _fresh(self, rules, ttl):
+        return rules is not None and time.monotonic() - self._loaded_at < ttl and \
+            self._generation == cache_generations.current(ACHIEVEMENT_RULES_CACHE)
+
+    def get(self, ttl):
+        rules = self._rules
+        if self._fresh(rules, ttl):
+            return rules
+        with self._lock:
+            if not self._fresh(self._rules, ttl):
+                self._generation = cache_generations.current(ACHIEVEMENT_RULES_CACHE)
+                self._rules = self._compile()
+                self._loaded_at = time.monotonic()
+            return self._rules
+
+    @staticmethod
+    def _compile():
+        index = defaultdict(lambda: defaultdict(list))
+        badges = Badge.query.filter(
+            Badge.requirement_type.isnot(None), Badge.requirement_value.isnot(None)
+        ).all()
+        for badge in badges:
+            index[_event_for(badge.requirement_type)][badge.requirement_type].append({
+                'badge_id': badge.id,
+                'threshold': badge.requirement_value,
+                'name': badge.name,
+                'description': badge.description,
+                'points_reward': badge.points_reward or 0,
+                'rarity': badge.rarity
+            })
+
+        compiled = {}
+        for event_type, by_requirement in index.items():
+            compiled[event_type] = {}
+            for requirement_type, rules in by_requirement.items():
+                rules.sort(key=lambda rule: rule['threshold'])
+                compiled[event_type][requirement_type] = (
+                    [rule['threshold'] for rule in rules], rules
+                )
+        return compiled
+
+
+achievement_rules = AchievementRuleIndex()
+
+
+@event.listens_for(Badge, 'after_insert')
+@event.listens_for(Badge, 'after_update')
+@event.listens_for(Badge, 'after_delete')
+def _invalidate_achievement_rules(mapper, connection, target):
+    achievement_rules.invalidate()
+    mark_changed(ACHIEVEMENT_RULES_CACHE)
+
+
+class AchievementService:
+    """
+    Event-driven badge evaluation. Only rules triggered by the recorded event
+    are checked, against counters maintained incrementally (see
+    UserAchievementCounter) and profile totals, so a check never rescans the
+    user's activity history.
+    """
+
+    @staticmethod
+    def _rules():
+        return achievement_rules.get(current_app.config.get('ACHIEVEMENT_RULES_TTL_SECONDS', 300))
+
+    @staticmethod
+    def _requirement_values(user_id, requirement_types, profile):
+        values = {}
+        counters = [r for r in requirement_types if r not in _PROFILE_REQUIREMENTS]
+        if counters:
+            values.update(db.session.query(UserAchievementCounter.counter, UserAchievementCounter.value).filter(
+                UserAchievementCounter.user_id == user_id,
+                UserAchievementCounter.counter.in_(counters)
+            ).all())
+        for requirement_type in requirement_types:
+            if requirement_type in _PROFILE_REQUIREMENTS:
+                values[requirement_type] = _PROFILE_REQUIREMENTS[requirement_type][1](profile)
+        return values
+
+    @staticmethod
+    def _met_rules(user_id, event_types, profile):
+        rules = AchievementService._rules()
+        affected = {}
+        for event_type in event_types:
+            affected.update(rules.get(event_type, {}))
+        if not affected:
+            return []
+
+        values = AchievementService._requirement_values(user_id, affected.keys(), profile)
+        met = []
+        for requirement_type, (thresholds, requirement_rules) in affected.items():
+            met.extend(requirement_rules[:bisect_right(thresholds, values.get(requirement_type, 0))])
+        return met
+
+    @staticmethod
+    def evaluate(user_id, event_types=ACHIEVEMENT_EVENTS):
+        """
+        Award every badge whose rule is triggered by the given events and now met.
+        Badge bonus points can in turn unlock points badges, which are checked
+        in the same call. Returns the newly awarded badges.
+        """
+        try:
+            profile = Profile.query.filter_by(user_id=user_id).first()
+            if not profile:
+                return []
+
+            newly_awarded = []
+            pending_events = set(event_types)
+            while pending_events:
+                met = AchievementService._met_rules(user_id, pending_events, profile)
+                pending_events = set()
+                if not met:
+                    break
+
+                earned = {
+                    badge_id for (badge_id,) in db.session.query(UserBadge.badge_id).filter(
+                        UserBadge.user_id == user_id,
+                        UserBadge.badge_id.in_([rule['badge_id'] for rule in met])
+                    )
+                }
+                for rule in met:
+                    if rule['badge_id'] in earned:
+                        continue
+                    earned.add(rule['badge_id'])
+                    db.session.add(UserBadge(user_id=user_id, badge_id=rule['badge_id']))
+                    if rule['points_reward']:
+                        profile.points = (profile.points or 0) + rule['points_reward']
+                        LeaderboardService.record_points(user_id, rule['points_reward'])
+                        pending_events.add(POINTS_AWARDED)
+                    newly_awarded.append({
+                        'name': rule['name'],
+                        'description': rule['description'],
+                        'points_reward': rule['points_reward'],
+                        'rarity': rule['rarity']
+                    })
+
+            if newly_awarded:
+                db.session.commit()
+            return newly_awarded
+
+        except IntegrityError:
+            # A concurrent check awarded the same badge first
+            db.session.rollback()
+            return []
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to evaluate achievements for user {user_id}: {e}")
+            return []
@@ -0,0 +1,170 @@
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, event
+from app.models import db, Activity
+from app.services.activity_log_metrics import encode_categories
+from app.cache_generations import cache_generations, mark_changed
+import threading
+import time
+
+# Points per recommendation factor, out of 100
+DIFFICULTY_MATCH_POINTS = 30
+PREFERRED_DIFFICULTY_POINTS = 20
+WEAK_TYPE_POINTS = 25
+PREFERRED_TYPE_POINTS = 15
+KNOWLEDGE_GAP_POINTS = 25
+TIME_FIT_POINTS = 10
+VARIETY_POINTS = 10
+
+# Activity type performance below this makes the type worth practising
+WEAK_TYPE_ACCURACY = 0.6
+
+ACTIVITY_CATALOG_CACHE = 'activity_catalog'
+
+
+class ActivityCatalog:
+    """
+    The whole activity catalog as parallel arrays, with activity type,
+    difficulty and skill area encoded as integer codes, so a user's
+    performance profile can be scored against every activity at once.
+    """
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 7
+        ids, learning_path_ids, order_in_path, activity_types, difficulty_levels, durations, skill_areas = columns
+        self.ids = np.array(ids, dtype=np.int64)
+        self.learning_path_ids = np.array(learning_path_ids, dtype=np.int64)
+        self.durations = np.array(durations, dtype=float)
+        self.type_labels, self.type_codes = self._encode(activity_types)
+        self.difficulty_labels, self.difficulty_codes = self._encode(difficulty_levels)
+        self.skill_labels, self.skill_codes = self._encode(skill_areas)
+
+        # Tie-break ranks: rows arrive ordered by id; within a path, by order_in_path
+        size = len(self.ids)
+        self.id_rank = np.arange(size)
+        self.path_rank = np.empty(size, dtype=np.int64)
+        self.path_rank[np.lexsort((self.ids, np.array(order_in_path, dtype=float), self.learning_path_ids))] = np.arange(size)
+
+    @staticmethod
+    def _encode(values):
+        if not values:
+            return [], np.zeros(0, dtype=np.intp)
+        return encode_categories(np.array(values, dtype=object))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _lookup(labels, points):
+        """Per-code array of points(label)."""
+        return np.array([points(label) for label in labels], dtype=np.int64)
+
+    def score(self, performance, knowledge_gaps, optimal_difficulty, preferences):
+        """
+        Recommendation score of every activity for one user, as integers out
+        of 100: difficulty fit, weak or preferred activity type, knowledge
+        gaps, time availability and variety.
+        """
+        type_performance = performance.get('activity_type_performance', {})
+        preferred_types = preferences.get('preferred_activity_types', [])
+        gap_types = {gap['area'] for gap in knowledge_gaps if gap['type'] == 'activity_type'}
+        gap_difficulties = {gap['area'] for gap in knowledge_gaps if gap['type'] == 'difficulty_level'}
+
+        difficulty_points = self._lookup(self.difficulty_labels, lambda label: (
+            DIFFICULTY_MATCH_POINTS if label == optimal_difficulty
+            else PREFERRED_DIFFICULTY_POINTS if label == preferences.get('preferred_difficulty')
+            else 0
+        ))
+        type_points = self._lookup(self.type_labels, lambda label: (
+            WEAK_TYPE_POINTS if type_performance.get(label, 0.5) < WEAK_TYPE_ACCURACY
+            else PREFERRED_TYPE_POINTS if label in preferred_types
+            else 0
+        ) + (VARIETY_POINTS if label not in type_performance else 0))
+        type_gaps = self._lookup(self.type_labels, lambda label: label in gap_types).astype(bool)
+        difficulty_gaps = self._lookup(self.difficulty_labels, lambda label: label in gap_difficulties).astype(bool)
+
+        scores = difficulty_points[self.difficulty_codes] + type_points[self.type_codes]
+        scores += (type_gaps[self.type_codes] | difficulty_gaps[self.difficulty_codes]) * KNOWLEDGE_GAP_POINTS
+        scores += (self.durations <= preferences.get('time_availability', 30)) * TIME_FIT_POINTS
+        return scores
+
+    def candidates(self, learning_path_id=None, skill_area=None):
+        """Mask of activities in the given path and skill area."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if learning_path_id:
+            mask &= self.learning_path_ids == learning_path_id
+        if skill_area:
+            mask &= self.skill_codes == (self.skill_labels.index(skill_area) if skill_area in self.skill_labels else -1)
+        return mask
+
+    def ranked(self, scores, mask, by_path_order=False):
+        """
+        Yield indices of masked activities from best to worst score in growing
+        batches; ties go to the lower id, or the earlier position in the path.
+        Only the part of the ranking that is consumed gets sorted.
+        """
+        rank = self.path_rank if by_path_order else self.id_rank
+        size = len(self.ids)
+        keys = scores.astype(np.int64) * size + (size - 1 - rank)
+        candidates = np.flatnonzero(mask)
+        keys = keys[candidates]
+
+        start, batch = 0, 16
+        while start < len(candidates):
+            stop = min(start + batch, len(candidates))
+            top = np.argpartition(-keys, stop - 1)[:stop] if stop < len(candidates) else np.arange(len(candidates))
+            top = top[np.argsort(-keys[top], kind='stable')]
+            yield candidates[top[start:stop]]
+            start, batch = stop, batch * 4
+
+
+class ActivityCatalogIndex:
+    """
+    Process-local ActivityCatalog, rebuilt after activities change in this
+    process or a sibling pre-forked worker, and otherwise every
+    ACTIVITY_CATALOG_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        self._catalog = None
+
+    def _fresh(self, catalog, ttl):
+        return catalog is not None and time.monotonic() - self._loaded_at < ttl and \
+            self._generation == cache_generations.current(ACTIVITY_CATALOG_CACHE)
+
+    def get(self):
+        ttl = current_app.config.get('ACTIVITY_CATALOG_TTL_SECONDS', 300)
+        catalog = self._catalog
+        if self._fresh(catalog, ttl):
+            return catalog
+        with self._lock:
+            if not self._fresh(self._catalog, ttl):
+                self._generation = cache_generations.current(ACTIVITY_CATALOG_CACHE)
+                self._catalog = self._build()
+                self._loaded_at = time.monotonic()
+            return self._catalog
+
+    @staticmethod
+    def _build():
+        rows = db.session.execute(select(
+            Activity.id, Activity.learning_path_id, Activity.order_in_path, Activity.activity_type,
+            Activity.difficulty_level, Activity.estimated_duration_minutes, Activity.skill_area
+        ).order_by(Activity.id)).all()
+        return ActivityCatalog(rows)
+
+
+activity_catalog = ActivityCatalogIndex()
+
+
+@event.listens_for(Activity, 'after_insert')
+@event.listens_for(Activity, 'after_update')
+@event.listens_for(Activity, 'after_delete')
+def _invalidate_activity_catalog(mapper, connection, target):
+    activity_catalog.invalidate()
+    mark_changed(ACTIVITY_CATALOG_CACHE)
@@ -1,15 +1,6 @@
-import google.generativeai as genai
-import os
+from app.services.gemini_models import lazy_model
 import json
 import re
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configure the Gemini API key
-# It's recommended to use environment variables for API keys
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
 
 def _extract_json_from_response(text):
     """
@@ -37,8 +28,8 @@ class ActivityGeneratorService:
     """
 
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        self.vision_model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = lazy_model('gemini-2.5-flash')
+        self.vision_model = lazy_model('gemini-2.5-flash')
 
     def generate_quiz(self, topic, level="beginner"):
         """
@@ -0,0 +1,115 @@
+import numpy as np
+from sqlalchemy import select
+from app.models import db, Activity, UserActivityLog
+
+# Epoch day 0 (1970-01-01) was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+def truthy_mask(values):
+    """Rows whose value is present and non-zero, like `if log.score` on the ORM object."""
+    return np.nan_to_num(values) != 0
+
+
+def encode_categories(values):
+    """Integer codes and labels for an object array that may hold None."""
+    missing = np.equal(values, None)
+    labels, codes = np.unique(np.where(missing, '', values).astype(str), return_inverse=True)
+    return [None if label == '' else str(label) for label in labels], codes
+
+
+def group_mean(keys, values):
+    """{key: mean of values} over parallel arrays, as plain floats."""
+    if not len(keys):
+        return {}
+    labels, codes = encode_categories(keys)
+    sums = np.bincount(codes, weights=values, minlength=len(labels))
+    counts = np.bincount(codes, minlength=len(labels))
+    return {label: float(sums[i] / counts[i]) for i, label in enumerate(labels)}
+
+
+def group_sum(keys, values):
+    """(labels, sums, counts) of values grouped by keys, labels sorted ascending."""
+    labels, codes = np.unique(keys, return_inverse=True)
+    sums = np.bincount(codes, weights=values, minlength=len(labels))
+    counts = np.bincount(codes, minlength=len(labels))
+    return labels, sums, counts
+
+
+class ActivityLogColumns:
+    """
+    A user's activity logs as parallel NumPy arrays, newest first. Missing
+    numbers are NaN, missing timestamps NaT, and activity_type is None for logs
+    whose activity no longer exists.
+    """
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 7
+        score, max_score, time_spent, activity_type, difficulty_level, completed_at, attempt_number = columns
+        self.score = np.array(score, dtype=float)
+        self.max_score = np.array(max_score, dtype=float)
+        self.time_spent_minutes = np.array(time_spent, dtype=float)
+        self.activity_type = np.array(activity_type, dtype=object)
+        self.difficulty_level = np.array(difficulty_level, dtype=object)
+        self.completed_at = np.array(completed_at, dtype='datetime64[us]')
+        self.attempt_number = np.array(attempt_number, dtype=float)
+
+    def __len__(self):
+        return len(self.score)
+
+    @property
+    def scored(self):
+        """Logs with a non-zero score and max_score."""
+        return truthy_mask(self.score) & truthy_mask(self.max_score)
+
+    @property
+    def has_activity(self):
+        return ~np.equal(self.activity_type, None)
+
+    @property
+    def accuracy(self):
+        """score / max_score, NaN where max_score is missing or not positive."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.max_score > 0, self.score / self.max_score, np.nan)
+
+    @property
+    def days(self):
+        return self.completed_at.astype('datetime64[D]')
+
+    @property
+    def week_starts(self):
+        """Monday of each log's week."""
+        days = self.days
+        weekday = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        return days - weekday.astype('timedelta64[D]')
+
+    def since(self, moment):
+        """Mask of logs completed at or after moment."""
+        return self.completed_at >= np.datetime64(moment, 'us')
+
+
+def fetch_activity_log_columns(user_id, since=None, skill_area=None, limit=None):
+    """
+    Load (score, max_score, time, activity type, difficulty, completed_at,
+    attempt) for a user's logs as plain tuples, without hydrating ORM objects.
+    """
+    stmt = select(
+        UserActivityLog.score,
+        UserActivityLog.max_score,
+        UserActivityLog.time_spent_minutes,
+        Activity.activity_type,
+        Activity.difficulty_level,
+        UserActivityLog.completed_at,
+        UserActivityLog.attempt_number
+    ).outerjoin(Activity, Activity.id == UserActivityLog.activity_id)\
+        .where(UserActivityLog.user_id == user_id)
+
+    if since is not None:
+        stmt = stmt.where(UserActivityLog.completed_at >= since)
+    if skill_area:
+        stmt = stmt.where(Activity.skill_area == skill_area)
+    stmt = stmt.order_by(UserActivityLog.completed_at.desc())
+    if limit:
+        stmt = stmt.limit(limit)
+
+    return ActivityLogColumns(db.session.execute(stmt).all())
@@ -0,0 +1,148 @@
+from app.models import db, Activity
+from app.models.activity import ACTIVITY_SEARCH_DDL, extract_search_text, build_content_preview
+from sqlalchemy import text, func, literal_column, select, update, Float, Integer
+import logging
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = '**'
+HIGHLIGHT_STOP = '**'
+
+
+class ActivitySearchService:
+    """
+    Full-text search over activities backed by the database engine's own index
+    (PostgreSQL tsvector/GIN with ts_rank, SQLite FTS5 with BM25).
+    """
+
+    @staticmethod
+    def _dialect():
+        return db.engine.dialect.name
+
+    @staticmethod
+    def _fts5_query(keyword):
+        """Quote each term so user input can't inject FTS5 syntax; prefix-match the last term."""
+        terms = [term.replace('"', '') for term in keyword.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    @staticmethod
+    def ranked_matches(keyword):
+        """
+        Return a subquery of (activity_id, rank) rows matching the keyword.
+        Higher rank means more relevant regardless of the underlying engine.
+        """
+        dialect = ActivitySearchService._dialect()
+
+        if dialect == 'postgresql':
+            ts_query = func.websearch_to_tsquery('english', keyword)
+            search_vector = literal_column('activities.search_vector')
+            return select(
+                Activity.id.label('activity_id'),
+                func.ts_rank_cd(search_vector, ts_query).label('rank')
+            ).where(search_vector.op('@@')(ts_query)).subquery('activity_search')
+
+        if dialect == 'sqlite':
+            match = ActivitySearchService._fts5_query(keyword)
+            # bm25() is lower-is-better; negate it so callers can always sort descending.
+            # Column weights favour title over description over body text.
+            return text(
+                "SELECT rowid AS activity_id, -bm25(activities_fts, 10.0, 4.0, 1.0) AS rank "
+                "FROM activities_fts WHERE activities_fts MATCH :match"
+            ).bindparams(match=match or '""').columns(
+                activity_id=Integer, rank=Float
+            ).subquery('activity_search')
+
+        # Engines without a full-text index fall back to substring matching.
+        pattern = f'%{keyword}%'
+        return select(
+            Activity.id.label('activity_id'),
+            Activity.title.ilike(pattern).cast(Float).label('rank')
+        ).where(
+            Activity.title.ilike(pattern) |
+            Activity.description.ilike(pattern) |
+            Activity.search_text.ilike(pattern)
+        ).subquery('activity_search')
+
+    @staticmethod
+    def highlights(keyword, activity_ids):
+        """
+        Generate engine-side highlights for a page of results.
+        Returns {activity_id: {'highlighted_title': ..., 'snippet': ...}}.
+        """
+        if not activity_ids:
+            return {}
+
+        dialect = ActivitySearchService._dialect()
+        try:
+            if dialect == 'postgresql':
+                options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}'
+                rows = db.session.execute(text(
+                    "SELECT id, "
+                    "ts_headline('english', title, q, :title_options), "
+                    "ts_headline('english', coalesce(search_text, description, ''), q, :snippet_options) "
+                    "FROM activities, websearch_to_tsquery('english', :keyword) AS q "
+                    "WHERE id = ANY(:ids)"
+                ), {
+                    'keyword': keyword,
+                    'ids': list(activity_ids),
+                    'title_options': f'{options}, HighlightAll=true',
+                    'snippet_options': f'{options}, MaxWords=25, MinWords=10, MaxFragments=2'
+                }).fetchall()
+            elif dialect == 'sqlite':
+                match = ActivitySearchService._fts5_query(keyword)
+                if not match:
+                    return {}
+                id_params = {f'id_{i}': activity_id for i, activity_id in enumerate(activity_ids)}
+                placeholders = ', '.join(f':{name}' for name in id_params)
+                rows = db.session.execute(text(
+                    "SELECT rowid, "
+                    "highlight(activities_fts, 0, :start, :stop), "
+                    "snippet(activities_fts, 2, :start, :stop, '…', 20) "
+                    f"FROM activities_fts WHERE activities_fts MATCH :match AND rowid IN ({placeholders})"
+                ), {'match': match, 'start': HIGHLIGHT_START, 'stop': HIGHLIGHT_STOP, **id_params}).fetchall()
+            else:
+                return {}
+        except Exception as e:
+            logger.error(f"Failed to generate search highlights: {e}")
+            return {}
+
+        return {
+            row[0]: {'highlighted_title': row[1], 'snippet': row[2] or None}
+            for row in rows
+        }
+
+    @staticmethod
+    def rebuild_index():
+        """
+        Recompute search_text and content_preview for every activity and rebuild the engine index.
+        Used after bulk imports or when enabling search on an existing database.
+        """
+        try:
+            rows = db.session.query(Activity.id, Activity.content).all()
+            if rows:
+                db.session.execute(update(Activity), [
+                    {
+                        'id': activity_id,
+                        'search_text': extract_search_text(content),
+                        'content_preview': build_content_preview(content)
+                    }
+                    for activity_id, content in rows
+                ])
+
+            dialect = ActivitySearchService._dialect()
+            for statement in ACTIVITY_SEARCH_DDL.get(dialect, []):
+                db.session.execute(text(statement))
+            if dialect == 'sqlite':
+                db.session.execute(text("INSERT INTO activities_fts(activities_fts) VALUES ('rebuild')"))
+
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to rebuild activity search index: {e}")
+            return False
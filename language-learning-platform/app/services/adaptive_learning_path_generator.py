@@ -7,11 +7,8 @@ from app.models import (
 )
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.services.comprehensive_assessment_service import ComprehensiveAssessmentService
-import google.generativeai as genai
-from config import Config
-
-# Configure Gemini
-genai.configure(api_key=Config.GEMINI_API_KEY)
+from app.services.service_registry import lazy_service
+from app.services.gemini_models import lazy_model
 
 
 class AdaptiveLearningPathGenerator:
@@ -21,9 +18,9 @@ class AdaptiveLearningPathGenerator:
     """
     
     def __init__(self):
-        self.activity_service = ActivityGeneratorService()
-        self.assessment_service = ComprehensiveAssessmentService()
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.activity_service = lazy_service(ActivityGeneratorService)
+        self.assessment_service = lazy_service(ComprehensiveAssessmentService)
+        self.model = lazy_model('gemini-2.0-flash-exp')
         
         # Learning path configuration
         self.MASTERY_THRESHOLD = 0.85
@@ -1,10 +1,23 @@
 import json
-import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 from app.models import User, Activity, UserActivityLog, LearningPath
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.service_registry import lazy_service
+from app.services.performance_profile_cache import performance_profiles
+from app.services.activity_catalog import activity_catalog
+from app.services.embedding_index import content_embeddings, ACTIVITIES
+from app.services.activity_log_metrics import ActivityLogColumns, fetch_activity_log_columns, group_mean, truthy_mask
 from app.models import db
+from sqlalchemy.orm import load_only
+
+
+# Activity columns read when scoring and describing recommendations
+RECOMMENDATION_COLUMNS = (
+    Activity.id, Activity.learning_path_id, Activity.title, Activity.activity_type,
+    Activity.difficulty_level, Activity.estimated_duration_minutes, Activity.points_reward
+)
 
 
 class AdaptiveLearningAlgorithm:
@@ -14,7 +27,7 @@ class AdaptiveLearningAlgorithm:
     """
     
     def __init__(self):
-        self.activity_service = ActivityGeneratorService()
+        self.activity_service = lazy_service(ActivityGeneratorService)
         
         # Learning algorithm parameters
         self.DIFFICULTY_ADJUSTMENT_THRESHOLD = 0.75  # 75% accuracy threshold
@@ -46,94 +59,56 @@ class AdaptiveLearningAlgorithm:
     def analyze_user_performance(self, user_id: int, days: int = 7) -> Dict:
         """
         Analyze user's recent performance across multiple dimensions.
+        Cached per (user, window) until the user's activity logs change.
         """
-        # Get recent activity logs
+        return performance_profiles.get_or_compute(
+            user_id, days, lambda: self._analyze_user_performance(user_id, days)
+        )
+
+    def _analyze_user_performance(self, user_id: int, days: int) -> Dict:
+        # Get recent activity logs as columns
         start_date = datetime.utcnow() - timedelta(days=days)
-        recent_logs = UserActivityLog.query.filter_by(user_id=user_id)\
-                                         .filter(UserActivityLog.completed_at >= start_date)\
-                                         .order_by(UserActivityLog.completed_at.desc()).all()
+        logs = fetch_activity_log_columns(user_id, since=start_date)
         
-        if not recent_logs:
+        if not len(logs):
             return self._get_default_performance_profile()
         
-        # Get activity details
-        activity_ids = [log.activity_id for log in recent_logs]
-        activities = Activity.query.filter(Activity.id.in_(activity_ids)).all()
-        activity_dict = {a.id: a for a in activities}
-        
-        # Calculate performance metrics
-        total_activities = len(recent_logs)
-        total_score = 0
-        total_max_score = 0
-        activity_type_performance = {}
-        difficulty_performance = {}
-        time_efficiency = []
-        consistency_scores = []
-        
-        for log in recent_logs:
-            activity = activity_dict.get(log.activity_id)
-            if not activity or not log.score or not log.max_score:
-                continue
-            
-            # Overall performance
-            total_score += log.score
-            total_max_score += log.max_score
-            accuracy = log.score / log.max_score
-            
-            # Performance by activity type
-            activity_type = activity.activity_type
-            if activity_type not in activity_type_performance:
-                activity_type_performance[activity_type] = []
-            activity_type_performance[activity_type].append(accuracy)
-            
-            # Performance by difficulty
-            difficulty = activity.difficulty_level
-            if difficulty not in difficulty_performance:
-                difficulty_performance[difficulty] = []
-            difficulty_performance[difficulty].append(accuracy)
-            
-            # Time efficiency (accuracy per minute)
-            if log.time_spent_minutes and log.time_spent_minutes > 0:
-                efficiency = accuracy / log.time_spent_minutes
-                time_efficiency.append(efficiency)
-            
-            # Consistency (daily performance variation)
-            consistency_scores.append(accuracy)
+        # Only logs with an activity and a score count towards the metrics
+        valid = logs.scored & logs.has_activity
+        accuracy = logs.score[valid] / logs.max_score[valid]
         
-        # Calculate averages
-        overall_accuracy = total_score / total_max_score if total_max_score > 0 else 0
+        # Overall performance
+        total_max_score = logs.max_score[valid].sum()
+        overall_accuracy = float(logs.score[valid].sum() / total_max_score) if total_max_score > 0 else 0
         
-        avg_type_performance = {}
-        for activity_type, scores in activity_type_performance.items():
-            avg_type_performance[activity_type] = sum(scores) / len(scores)
+        # Performance by activity type and by difficulty
+        avg_type_performance = group_mean(logs.activity_type[valid], accuracy)
+        avg_difficulty_performance = group_mean(logs.difficulty_level[valid], accuracy)
         
-        avg_difficulty_performance = {}
-        for difficulty, scores in difficulty_performance.items():
-            avg_difficulty_performance[difficulty] = sum(scores) / len(scores)
-        
-        avg_efficiency = sum(time_efficiency) / len(time_efficiency) if time_efficiency else 0
+        # Time efficiency (accuracy per minute)
+        time_spent = logs.time_spent_minutes[valid]
+        timed = time_spent > 0
+        avg_efficiency = float(np.mean(accuracy[timed] / time_spent[timed])) if timed.any() else 0
         
         # Calculate consistency (lower standard deviation = more consistent)
-        if len(consistency_scores) > 1:
-            mean_score = sum(consistency_scores) / len(consistency_scores)
-            variance = sum((x - mean_score) ** 2 for x in consistency_scores) / len(consistency_scores)
-            consistency = 1 - min(math.sqrt(variance), 1)  # Convert to 0-1 scale
+        if len(accuracy) > 1:
+            consistency = 1 - min(float(np.std(accuracy)), 1)  # Convert to 0-1 scale
         else:
             consistency = 1.0
         
         return {
             'overall_accuracy': overall_accuracy,
-            'total_activities': total_activities,
+            'total_activities': len(logs),
             'activity_type_performance': avg_type_performance,
             'difficulty_performance': avg_difficulty_performance,
             'time_efficiency': avg_efficiency,
             'consistency': consistency,
             'analysis_period_days': days,
-            'performance_trend': self._calculate_performance_trend(recent_logs, activity_dict)
+            'performance_trend': self._calculate_performance_trend(logs)
         }
 
     def recommend_next_activities(self, user_id: int, learning_path_id: Optional[int] = None, 
-                                count: int = 5) -> List[Dict]:
+                                count: int = 5, skill_area: Optional[str] = None) -> List[Dict]:
         """
         Recommend the next best activities for the user based on adaptive learning algorithm.
         """
@@ -150,22 +125,26 @@ class AdaptiveLearningAlgorithm:
         # Determine optimal difficulty level
         optimal_difficulty = self._calculate_optimal_difficulty(performance)
         
-        # Get available activities (or generate new ones)
-        if learning_path_id:
-            available_activities = self._get_learning_path_activities(learning_path_id, user_id)
-        else:
-            available_activities = self._get_general_activities(user_id)
+        # Score the whole catalog at once, then walk the ranking best first,
+        # keeping activities the user hasn't completed yet
+        catalog = activity_catalog.get()
+        scores = catalog.score(performance, knowledge_gaps, optimal_difficulty, user_preferences)
+        candidates = catalog.candidates(learning_path_id, skill_area)
         
-        # Score and rank activities
         scored_activities = []
-        for activity in available_activities:
-            score = self._score_activity_recommendation(
-                activity, performance, knowledge_gaps, optimal_difficulty, user_preferences
-            )
-            scored_activities.append((activity, score))
-        
-        # Sort by score and return top recommendations
-        scored_activities.sort(key=lambda x: x[1], reverse=True)
+        for batch in catalog.ranked(scores, candidates, by_path_order=bool(learning_path_id)):
+            available = {
+                activity.id: activity
+                for activity in Activity.query.options(load_only(*RECOMMENDATION_COLUMNS))
+                                              .filter(Activity.id.in_(catalog.ids[batch].tolist()))
+                                              .filter(Activity.not_completed_by(user_id))
+            }
+            for index in batch:
+                activity = available.get(int(catalog.ids[index]))
+                if activity is not None:
+                    scored_activities.append((activity, float(scores[index])))
+            if len(scored_activities) >= count:
+                break
         
         recommendations = []
         for activity, score in scored_activities[:count]:
@@ -186,6 +165,45 @@ class AdaptiveLearningAlgorithm:
         
         return recommendations
 
+    def find_related_activities(self, user_id: int, activity_id: Optional[int] = None,
+                                text: Optional[str] = None, count: int = 5) -> List[Dict]:
+        """
+        Activities closest in content to an activity (or to free text) that the
+        user hasn't completed yet, from the local embedding index.
+        """
+        if activity_id:
+            matches = content_embeddings.similar(ACTIVITIES, activity_id, count * 3)
+        else:
+            matches = content_embeddings.search(ACTIVITIES, text or '', count * 3)
+        if not matches:
+            return []
+        
+        available = {
+            activity.id: activity
+            for activity in Activity.query.options(load_only(*RECOMMENDATION_COLUMNS))
+                                          .filter(Activity.id.in_([match_id for match_id, _ in matches]))
+                                          .filter(Activity.not_completed_by(user_id))
+        }
+        related = []
+        for match_id, similarity in matches:
+            activity = available.get(match_id)
+            if activity is None or similarity <= 0:
+                continue
+            related.append({
+                'activity_id': activity.id,
+                'title': activity.title,
+                'activity_type': activity.activity_type,
+                'difficulty_level': activity.difficulty_level,
+                'estimated_duration_minutes': activity.estimated_duration_minutes,
+                'points_reward': activity.points_reward,
+                'similarity': round(similarity, 3),
+                'learning_path_id': activity.learning_path_id
+            })
+            if len(related) == count:
+                break
+        
+        return related
+
     def assess_concept_mastery(self, user_id: int, skill_area: str, concept: str) -> Dict:
         """
         Assess if user has mastered a concept through comprehensive evaluation.
@@ -248,9 +266,7 @@ class AdaptiveLearningAlgorithm:
         if len(scores) < 2:
             return 1.0
         
-        mean_score = sum(scores) / len(scores)
-        variance = sum((score - mean_score) ** 2 for score in scores) / len(scores)
-        std_dev = math.sqrt(variance)
+        std_dev = float(np.std(np.asarray(scores, dtype=float)))
         
         # Convert to 0-1 scale where 1 is most consistent
         consistency = max(0, 1 - std_dev)
@@ -344,46 +360,42 @@ class AdaptiveLearningAlgorithm:
         """
         try:
             # Get recent performance data
-            query = UserActivityLog.query.filter_by(user_id=user_id)
-            if skill_area:
-                query = query.join(Activity).filter(Activity.skill_area == skill_area)
-                
-            recent_logs = query.order_by(UserActivityLog.completed_at.desc()).limit(20).all()
+            logs = fetch_activity_log_columns(user_id, skill_area=skill_area, limit=20)
             
-            if not recent_logs:
+            if not len(logs):
                 return {'difficulties_detected': False, 'message': 'Insufficient data'}
             
             difficulties = []
             interventions = []
             
             # Analyze performance patterns
-            scores = [log.score / log.max_score for log in recent_logs if log.max_score > 0]
+            scores = logs.accuracy[~np.isnan(logs.accuracy)]
             
             # Check for consistent low performance
-            if scores and sum(scores) / len(scores) < self.STRUGGLE_THRESHOLD:
+            if len(scores) and scores.mean() < self.STRUGGLE_THRESHOLD:
                 difficulties.append('consistently_low_scores')
                 interventions.append('review_fundamentals')
             
             # Check for declining performance
             if len(scores) >= 5:
-                recent_avg = sum(scores[:5]) / 5
-                earlier_avg = sum(scores[5:10]) / min(5, len(scores) - 5) if len(scores) > 5 else recent_avg
+                recent_avg = scores[:5].mean()
+                earlier_avg = scores[5:10].mean() if len(scores) > 5 else recent_avg
                 
                 if recent_avg < earlier_avg - 0.2:  # Significant decline
                     difficulties.append('declining_performance')
                     interventions.append('reduce_difficulty')
             
             # Check for high variability (inconsistent performance)
-            if scores:
+            if len(scores):
                 consistency = self._calculate_score_consistency(scores)
                 if consistency < 0.5:
                     difficulties.append('inconsistent_performance')
                     interventions.append('focus_on_weak_areas')
             
             # Check for time efficiency issues
-            time_spent = [log.time_spent_minutes for log in recent_logs if log.time_spent_minutes]
-            if time_spent:
-                avg_time = sum(time_spent) / len(time_spent)
+            time_spent = logs.time_spent_minutes[truthy_mask(logs.time_spent_minutes)]
+            if len(time_spent):
+                avg_time = time_spent.mean()
                 if avg_time > 30:  # Taking too long
                     difficulties.append('excessive_time_needed')
                     interventions.append('provide_hints_and_guidance')
@@ -666,17 +678,15 @@ class AdaptiveLearningAlgorithm:
             'performance_trend': 'stable'
         }
 
-    def _calculate_performance_trend(self, logs: List, activity_dict: Dict) -> str:
+    def _calculate_performance_trend(self, logs: ActivityLogColumns) -> str:
         """Calculate if performance is improving, declining, or stable."""
         if len(logs) < 3:
             return 'insufficient_data'
         
-        # Compare recent performance to older performance
-        recent_logs = logs[:len(logs)//2]
-        older_logs = logs[len(logs)//2:]
-        
-        recent_avg = self._calculate_average_accuracy(recent_logs, activity_dict)
-        older_avg = self._calculate_average_accuracy(older_logs, activity_dict)
+        # Compare recent performance to older performance (logs are newest first)
+        half = len(logs) // 2
+        recent_avg = self._calculate_average_accuracy(logs.score[:half], logs.max_score[:half])
+        older_avg = self._calculate_average_accuracy(logs.score[half:], logs.max_score[half:])
         
         if recent_avg > older_avg + 0.1:
             return 'improving'
@@ -685,17 +695,11 @@ class AdaptiveLearningAlgorithm:
         else:
             return 'stable'
 
-    def _calculate_average_accuracy(self, logs: List, activity_dict: Dict) -> float:
-        """Calculate average accuracy for a set of logs."""
-        total_score = 0
-        total_max = 0
-        
-        for log in logs:
-            if log.score and log.max_score:
-                total_score += log.score
-                total_max += log.max_score
-        
-        return total_score / total_max if total_max > 0 else 0.5
+    def _calculate_average_accuracy(self, scores: np.ndarray, max_scores: np.ndarray) -> float:
+        """Calculate average accuracy for parallel score / max score arrays."""
+        scored = truthy_mask(scores) & truthy_mask(max_scores)
+        total_max = max_scores[scored].sum()
+        return float(scores[scored].sum() / total_max) if total_max > 0 else 0.5
 
     def _extract_user_preferences(self, user: User) -> Dict:
         """Extract user preferences from user profile and enrollment data."""
@@ -754,68 +758,6 @@ class AdaptiveLearningAlgorithm:
         else:
             return 'beginner'
 
-    def _get_learning_path_activities(self, learning_path_id: int, user_id: int) -> List:
-        """Get available activities from a specific learning path."""
-        # Get activities user hasn't completed yet
-        completed_activity_ids = [
-            log.activity_id for log in 
-            UserActivityLog.query.filter_by(user_id=user_id, learning_path_id=learning_path_id).all()
-        ]
-        
-        activities = Activity.query.filter_by(learning_path_id=learning_path_id)\
-                                 .filter(~Activity.id.in_(completed_activity_ids))\
-                                 .order_by(Activity.order_in_path).limit(10).all()
-        
-        return activities
-
-    def _get_general_activities(self, user_id: int) -> List:
-        """Get general activities suitable for the user."""
-        # Get activities user hasn't completed
-        completed_activity_ids = [
-            log.activity_id for log in UserActivityLog.query.filter_by(user_id=user_id).all()
-        ]
-        
-        activities = Activity.query.filter(~Activity.id.in_(completed_activity_ids))\
-                                 .limit(20).all()
-        
-        return activities
-
-    def _score_activity_recommendation(self, activity: Activity, performance: Dict, 
-                                     knowledge_gaps: List, optimal_difficulty: str, 
-                                     preferences: Dict) -> float:
-        """Score an activity for recommendation based on multiple factors."""
-        score = 0.0
-        
-        # Difficulty match (30% weight)
-        if activity.difficulty_level == optimal_difficulty:
-            score += 30
-        elif activity.difficulty_level == preferences.get('preferred_difficulty'):
-            score += 20
-        
-        # Activity type preference and performance (25% weight)
-        activity_type_performance = performance['activity_type_performance'].get(activity.activity_type, 0.5)
-        if activity_type_performance < 0.6:  # Needs improvement
-            score += 25
-        elif activity.activity_type in preferences.get('preferred_activity_types', []):
-            score += 15
-        
-        # Knowledge gap addressing (25% weight)
-        for gap in knowledge_gaps:
-            if (gap['type'] == 'activity_type' and gap['area'] == activity.activity_type) or \
-               (gap['type'] == 'difficulty_level' and gap['area'] == activity.difficulty_level):
-                score += 25
-                break
-        
-        # Time availability match (10% weight)
-        if activity.estimated_duration_minutes <= preferences.get('time_availability', 30):
-            score += 10
-        
-        # Variety bonus (10% weight) - encourage trying different types
-        if activity.activity_type not in performance.get('activity_type_performance', {}):
-            score += 10
-        
-        return score
-
     def _get_recommendation_reasons(self, activity: Activity, performance: Dict, 
                                   knowledge_gaps: List, optimal_difficulty: str) -> List[str]:
         """Generate human-readable reasons for recommending this activity."""
@@ -1,219 +1,291 @@
 from app.models import (
     db, AssessmentQuestionResponse, ActivityQuestionResponse,
     UserAnalytics, LearningStreak, UserLearningTimeline,
-    PerformanceTrend, AIGeneratedContent
+    PerformanceTrend, AIGeneratedContent, UserActivityLog
 )
+from app.services.streak_service import StreakService
 from datetime import datetime, date, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+class AnalyticsUnitOfWork:
+    """
+    Collects every analytics write for one submission and flushes them in a
+    single transaction: bulk inserts for responses and timeline events,
+    dialect-native upserts for metrics, and StreakService for streak state.
+    """
+    
+    def __init__(self):
+        self._metrics = {}  # (user_id, metric_type, date, activity_type, skill_area) -> [sum, count]
+        self._streaks = {}  # (user_id, activity_type, skill_area) -> activity time (UTC)
+        self._assessment_responses = []
+        self._activity_responses = []
+        self._timeline_events = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            db.session.rollback()
+            return False
+        self.commit()
+        return False
+    
+    def record_assessment_question_response(self, assessment_id, user_id, question_data, user_answer, is_correct, time_spent=0, confidence_level=None):
+        """Queue a detailed question response for an assessment."""
+        response = {
+            'assessment_id': assessment_id,
+            'user_id': user_id,
+            'question_id': question_data.get('id'),
+            'question_text': question_data.get('text'),
+            'question_type': question_data.get('type'),
+            'correct_answer': question_data.get('correct_answer'),
+            'user_answer': user_answer,
+            'is_correct': is_correct,
+            'time_spent_seconds': time_spent,
+            'confidence_level': confidence_level,
+            'difficulty_level': question_data.get('difficulty_level', 'beginner'),
+            'skill_area': question_data.get('skill_area'),
+            'points_earned': question_data.get('points', 0) if is_correct else 0,
+            'hints_used': question_data.get('hints_used', 0),
+            'attempts_before_correct': question_data.get('attempts', 1),
+            'created_at': datetime.utcnow()
+        }
+        self._assessment_responses.append(response)
+        self.update_skill_analytics(user_id, question_data.get('skill_area'), is_correct, time_spent)
+        return response
+    
+    def record_activity_question_response(self, activity_log_id, user_id, activity_id, question_index, question_data, user_answer, is_correct, time_spent=0, ai_feedback=None, activity_log_completed_at=None):
+        """
+        Queue a detailed question response for an activity. Pass the log's
+        completed_at when it is at hand; otherwise it is looked up on flush.
+        """
+        response = {
+            'activity_log_id': activity_log_id,
+            'activity_log_completed_at': activity_log_completed_at,
+            'user_id': user_id,
+            'activity_id': activity_id,
+            'question_index': question_index,
+            'question_text': question_data.get('text'),
+            'question_type': question_data.get('type'),
+            'user_answer': user_answer,
+            'correct_answer': question_data.get('correct_answer'),
+            'is_correct': is_correct,
+            'time_spent_seconds': time_spent,
+            'hints_used': question_data.get('hints_used', 0),
+            'difficulty_level': question_data.get('difficulty_level', 'beginner'),
+            'skill_area': question_data.get('skill_area'),
+            'points_earned': question_data.get('points', 0) if is_correct else 0,
+            'ai_feedback': ai_feedback,
+            'created_at': datetime.utcnow()
+        }
+        self._activity_responses.append(response)
+        self.update_skill_analytics(user_id, question_data.get('skill_area'), is_correct, time_spent)
+        return response
+    
+    def update_skill_analytics(self, user_id, skill_area, is_correct, time_spent=0):
+        """Queue skill-based accuracy and speed metrics."""
+        if not skill_area:
+            return
+        
+        today = date.today()
+        self.add_metric(user_id, 'accuracy', 1.0 if is_correct else 0.0, today, skill_area=skill_area)
+        
+        # Speed metric (questions per minute)
+        if time_spent > 0:
+            self.add_metric(user_id, 'speed', 60.0 / time_spent, today, skill_area=skill_area)
+    
+    def add_metric(self, user_id, metric_type, metric_value, date_recorded, activity_type=None, skill_area=None):
+        """Queue one observation of a metric; observations sharing a key are averaged before flushing."""
+        key = (user_id, metric_type, date_recorded, activity_type or None, skill_area or None)
+        totals = self._metrics.setdefault(key, [0.0, 0])
+        totals[0] += metric_value
+        totals[1] += 1
+    
+    def update_learning_streaks(self, user_id, activity_type=None, skill_area=None):
+        """Queue daily, activity-specific and skill-specific streak updates."""
+        self._streaks[(user_id, activity_type or None, skill_area or None)] = datetime.utcnow()
+    
+    def record_learning_event(self, user_id, event_type, event_subtype=None, event_data=None, 
+                              related_id=None, related_type=None, proficiency_change=0.0, 
+                              points_earned=0, skill_areas_affected=None, difficulty_level=None, 
+                              performance_score=None, time_spent_minutes=None, milestone_achieved=None):
+        """Queue a learning event for the timeline."""
+        event = {
+            'user_id': user_id,
+            'event_type': event_type,
+            'event_subtype': event_subtype,
+            'event_data': event_data,
+            'related_id': related_id,
+            'related_type': related_type,
+            'proficiency_change': proficiency_change,
+            'points_earned': points_earned,
+            'skill_areas_affected': skill_areas_affected,
+            'difficulty_level': difficulty_level,
+            'performance_score': performance_score,
+            'time_spent_minutes': time_spent_minutes,
+            'milestone_achieved': milestone_achieved,
+            'created_at': datetime.utcnow()
+        }
+        self._timeline_events.append(event)
+        return event
+    
+    def flush(self):
+        """Write all queued changes into the current transaction without committing."""
+        if self._assessment_responses:
+            db.session.execute(insert(AssessmentQuestionResponse), self._assessment_responses)
+        if self._activity_responses:
+            self._resolve_activity_log_keys()
+            db.session.execute(insert(ActivityQuestionResponse), self._activity_responses)
+        if self._timeline_events:
+            db.session.execute(insert(UserLearningTimeline), self._timeline_events)
+        if self._metrics:
+            self._flush_metrics()
+        if self._streaks:
+            self._flush_streaks()
+        db.session.flush()
+        
+        self._assessment_responses, self._activity_responses, self._timeline_events = [], [], []
+        self._metrics, self._streaks = {}, {}
+    
+    def commit(self):
+        """Flush and commit everything in one transaction. Returns False and rolls back on failure."""
+        try:
+            self.flush()
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to commit analytics unit of work: {e}")
+            return False
+    
+    def _resolve_activity_log_keys(self):
+        """Fill in activity_log_completed_at, half of the responses' foreign key, in one query."""
+        missing = {r['activity_log_id'] for r in self._activity_responses if r['activity_log_completed_at'] is None}
+        if not missing:
+            return
+        completed_at = dict(db.session.query(UserActivityLog.id, UserActivityLog.completed_at).filter(
+            UserActivityLog.id.in_(missing)
+        ).all())
+        unknown = missing - completed_at.keys()
+        if unknown:
+            raise ValueError(f"Activity logs not found: {sorted(unknown)}")
+        for response in self._activity_responses:
+            if response['activity_log_completed_at'] is None:
+                response['activity_log_completed_at'] = completed_at[response['activity_log_id']]
+    
+    def _flush_metrics(self):
+        now = datetime.utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'metric_type': metric_type,
+                'date_recorded': date_recorded,
+                'activity_type': activity_type,
+                'skill_area': skill_area,
+                'metric_value': total / count,
+                'session_count': count,
+                'created_at': now
+            }
+            for (user_id, metric_type, date_recorded, activity_type, skill_area), (total, count) in self._metrics.items()
+        ]
+        
+        dialect_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+        if dialect_insert is None:
+            for row in rows:
+                self._merge_metric_row(row)
+            return
+        
+        stmt = dialect_insert(UserAnalytics).values(rows)
+        existing_count = func.coalesce(UserAnalytics.session_count, 1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=UserAnalytics.metric_key_elements(),
+            set_={
+                # Merge running averages weighted by session counts
+                'metric_value': (
+                    UserAnalytics.metric_value * existing_count +
+                    stmt.excluded.metric_value * stmt.excluded.session_count
+                ) / (existing_count + stmt.excluded.session_count),
+                'session_count': existing_count + stmt.excluded.session_count
+            }
+        )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def _merge_metric_row(row):
+        """Select-then-update fallback for dialects without ON CONFLICT."""
+        existing = UserAnalytics.query.filter_by(
+            user_id=row['user_id'],
+            metric_type=row['metric_type'],
+            date_recorded=row['date_recorded'],
+            activity_type=row['activity_type'],
+            skill_area=row['skill_area']
+        ).first()
+        
+        if existing:
+            existing_count = existing.session_count or 1
+            new_count = existing_count + row['session_count']
+            existing.metric_value = (
+                existing.metric_value * existing_count + row['metric_value'] * row['session_count']
+            ) / new_count
+            existing.session_count = new_count
+        else:
+            db.session.add(UserAnalytics(**row))
+    
+    def _flush_streaks(self):
+        for (user_id, activity_type, skill_area), occurred_at in self._streaks.items():
+            StreakService.record_activity(user_id, activity_type, skill_area, occurred_at)
+
 class AnalyticsService:
     """Service for handling analytics data generation and management."""
     
+    @staticmethod
+    def unit_of_work():
+        """Start collecting analytics writes to be committed together."""
+        return AnalyticsUnitOfWork()
+    
     @staticmethod
     def record_assessment_question_response(assessment_id, user_id, question_data, user_answer, is_correct, time_spent=0, confidence_level=None):
         """Record a detailed question response for an assessment."""
-        try:
-            response = AssessmentQuestionResponse(
-                assessment_id=assessment_id,
-                user_id=user_id,
-                question_id=question_data.get('id'),
-                question_text=question_data.get('text'),
-                question_type=question_data.get('type'),
-                correct_answer=question_data.get('correct_answer'),
-                user_answer=user_answer,
-                is_correct=is_correct,
-                time_spent_seconds=time_spent,
-                confidence_level=confidence_level,
-                difficulty_level=question_data.get('difficulty_level', 'beginner'),
-                skill_area=question_data.get('skill_area'),
-                points_earned=question_data.get('points', 0) if is_correct else 0,
-                hints_used=question_data.get('hints_used', 0),
-                attempts_before_correct=question_data.get('attempts', 1)
-            )
-            
-            db.session.add(response)
-            db.session.commit()
-            
-            # Update analytics
-            AnalyticsService.update_skill_analytics(user_id, question_data.get('skill_area'), is_correct, time_spent)
-            
-            return response
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to record assessment question response: {e}")
-            return None
+        uow = AnalyticsUnitOfWork()
+        response = uow.record_assessment_question_response(
+            assessment_id, user_id, question_data, user_answer, is_correct, time_spent, confidence_level
+        )
+        return response if uow.commit() else None
     
     @staticmethod
-    def record_activity_question_response(activity_log_id, user_id, activity_id, question_index, question_data, user_answer, is_correct, time_spent=0, ai_feedback=None):
+    def record_activity_question_response(activity_log_id, user_id, activity_id, question_index, question_data, user_answer, is_correct, time_spent=0, ai_feedback=None, activity_log_completed_at=None):
         """Record a detailed question response for an activity."""
-        try:
-            response = ActivityQuestionResponse(
-                activity_log_id=activity_log_id,
-                user_id=user_id,
-                activity_id=activity_id,
-                question_index=question_index,
-                question_text=question_data.get('text'),
-                question_type=question_data.get('type'),
-                user_answer=user_answer,
-                correct_answer=question_data.get('correct_answer'),
-                is_correct=is_correct,
-                time_spent_seconds=time_spent,
-                hints_used=question_data.get('hints_used', 0),
-                difficulty_level=question_data.get('difficulty_level', 'beginner'),
-                skill_area=question_data.get('skill_area'),
-                points_earned=question_data.get('points', 0) if is_correct else 0,
-                ai_feedback=ai_feedback
-            )
-            
-            db.session.add(response)
-            db.session.commit()
-            
-            # Update analytics
-            AnalyticsService.update_skill_analytics(user_id, question_data.get('skill_area'), is_correct, time_spent)
-            
-            return response
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to record activity question response: {e}")
-            return None
+        uow = AnalyticsUnitOfWork()
+        response = uow.record_activity_question_response(
+            activity_log_id, user_id, activity_id, question_index, question_data,
+            user_answer, is_correct, time_spent, ai_feedback, activity_log_completed_at
+        )
+        return response if uow.commit() else None
     
     @staticmethod
     def update_skill_analytics(user_id, skill_area, is_correct, time_spent=0):
         """Update skill-based analytics for a user."""
-        if not skill_area:
-            return
-        
-        try:
-            today = date.today()
-            
-            # Update accuracy metric
-            accuracy_value = 1.0 if is_correct else 0.0
-            AnalyticsService._update_or_create_metric(
-                user_id, 'accuracy', accuracy_value, today, skill_area=skill_area
-            )
-            
-            # Update speed metric (questions per minute)
-            if time_spent > 0:
-                speed_value = 60.0 / time_spent  # questions per minute
-                AnalyticsService._update_or_create_metric(
-                    user_id, 'speed', speed_value, today, skill_area=skill_area
-                )
-            
-        except Exception as e:
-            logger.error(f"Failed to update skill analytics: {e}")
-    
-    @staticmethod
-    def _update_or_create_metric(user_id, metric_type, metric_value, date_recorded, activity_type=None, skill_area=None):
-        """Update or create a user analytics metric."""
-        try:
-            # Check if metric exists for today
-            existing = UserAnalytics.query.filter_by(
-                user_id=user_id,
-                metric_type=metric_type,
-                date_recorded=date_recorded,
-                activity_type=activity_type,
-                skill_area=skill_area
-            ).first()
-            
-            if existing:
-                # Calculate running average
-                new_count = existing.session_count + 1
-                existing.metric_value = ((existing.metric_value * existing.session_count) + metric_value) / new_count
-                existing.session_count = new_count
-            else:
-                # Create new metric
-                new_metric = UserAnalytics(
-                    user_id=user_id,
-                    metric_type=metric_type,
-                    metric_value=metric_value,
-                    date_recorded=date_recorded,
-                    activity_type=activity_type,
-                    skill_area=skill_area,
-                    session_count=1
-                )
-                db.session.add(new_metric)
-            
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to update metric: {e}")
+        uow = AnalyticsUnitOfWork()
+        uow.update_skill_analytics(user_id, skill_area, is_correct, time_spent)
+        uow.commit()
     
     @staticmethod
     def update_learning_streaks(user_id, activity_type=None, skill_area=None):
         """Update learning streaks for a user."""
-        try:
-            today = date.today()
-            
-            # Update daily streak
-            AnalyticsService._update_streak(user_id, 'daily', today, activity_type, skill_area)
-            
-            # Update activity-specific streak if provided
-            if activity_type:
-                AnalyticsService._update_streak(user_id, 'activity_specific', today, activity_type, skill_area)
-            
-            # Update skill-specific streak if provided
-            if skill_area:
-                AnalyticsService._update_streak(user_id, 'skill_specific', today, activity_type, skill_area)
-            
-        except Exception as e:
-            logger.error(f"Failed to update learning streaks: {e}")
-    
-    @staticmethod
-    def _update_streak(user_id, streak_type, activity_date, activity_type=None, skill_area=None):
-        """Update a specific type of learning streak."""
-        try:
-            streak = LearningStreak.query.filter_by(
-                user_id=user_id,
-                streak_type=streak_type,
-                activity_type=activity_type,
-                skill_area=skill_area
-            ).first()
-            
-            if not streak:
-                # Create new streak
-                streak = LearningStreak(
-                    user_id=user_id,
-                    streak_type=streak_type,
-                    activity_type=activity_type,
-                    skill_area=skill_area,
-                    current_streak=1,
-                    longest_streak=1,
-                    last_activity_date=activity_date,
-                    streak_start_date=activity_date
-                )
-                db.session.add(streak)
-            else:
-                # Update existing streak
-                if streak.last_activity_date:
-                    days_diff = (activity_date - streak.last_activity_date).days
-                    
-                    if days_diff == 1:
-                        # Continue streak
-                        streak.current_streak += 1
-                        if streak.current_streak > streak.longest_streak:
-                            streak.longest_streak = streak.current_streak
-                    elif days_diff == 0:
-                        # Same day activity - no change to streak
-                        pass
-                    else:
-                        # Streak broken - restart
-                        streak.current_streak = 1
-                        streak.streak_start_date = activity_date
-                else:
-                    # First activity
-                    streak.current_streak = 1
-                    streak.streak_start_date = activity_date
-                
-                streak.last_activity_date = activity_date
-                streak.updated_at = datetime.utcnow()
-            
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to update streak: {e}")
+        uow = AnalyticsUnitOfWork()
+        uow.update_learning_streaks(user_id, activity_type, skill_area)
+        uow.commit()
     
     @staticmethod
     def record_learning_event(user_id, event_type, event_subtype=None, event_data=None, 
@@ -221,31 +293,13 @@ class AnalyticsService:
                              points_earned=0, skill_areas_affected=None, difficulty_level=None, 
                              performance_score=None, time_spent_minutes=None, milestone_achieved=None):
         """Record a learning event in the timeline."""
-        try:
-            timeline_event = UserLearningTimeline(
-                user_id=user_id,
-                event_type=event_type,
-                event_subtype=event_subtype,
-                event_data=event_data,
-                related_id=related_id,
-                related_type=related_type,
-                proficiency_change=proficiency_change,
-                points_earned=points_earned,
-                skill_areas_affected=skill_areas_affected,
-                difficulty_level=difficulty_level,
-                performance_score=performance_score,
-                time_spent_minutes=time_spent_minutes,
-                milestone_achieved=milestone_achieved
-            )
-            
-            db.session.add(timeline_event)
-            db.session.commit()
-            
-            return timeline_event
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to record learning event: {e}")
-            return None
+        uow = AnalyticsUnitOfWork()
+        event = uow.record_learning_event(
+            user_id, event_type, event_subtype, event_data, related_id, related_type,
+            proficiency_change, points_earned, skill_areas_affected, difficulty_level,
+            performance_score, time_spent_minutes, milestone_achieved
+        )
+        return event if uow.commit() else None
     
     @staticmethod
     def track_ai_generated_content(content_type, content_data, generation_parameters=None, 
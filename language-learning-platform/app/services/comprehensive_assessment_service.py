@@ -5,11 +5,8 @@ from typing import Dict, List, Tuple, Optional
 from app.models import User, Activity, UserActivityLog, LearningPath, ProficiencyAssessment
 from app.services.activity_generator_service import ActivityGeneratorService
 from app.models import db
-import google.generativeai as genai
-from config import Config
-
-# Configure Gemini
-genai.configure(api_key=Config.GEMINI_API_KEY)
+from app.services.service_registry import lazy_service
+from app.services.gemini_models import lazy_model
 
 
 class ComprehensiveAssessmentService:
@@ -19,8 +16,8 @@ class ComprehensiveAssessmentService:
     """
     
     def __init__(self):
-        self.activity_service = ActivityGeneratorService()
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.activity_service = lazy_service(ActivityGeneratorService)
+        self.model = lazy_model('gemini-2.0-flash-exp')
         
         # Assessment configuration
         self.SKILL_AREAS = ['reading', 'writing', 'grammar', 'vocabulary', 'listening', 'speaking']
@@ -0,0 +1,435 @@
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, func, event
+from app.models import db, Activity, Chapter
+import importlib
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+try:
+    import hnswlib
+except ImportError:  # in requirements.txt; without it every index is scanned
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+ACTIVITIES = 'activities'
+CHAPTERS = 'chapters'
+
+# English words plus Telugu script, whose vowel signs Python's \w doesn't cover
+_TOKEN = re.compile(r'[\w\u0C00-\u0C7F]+')
+
+
+class HashingEmbedder:
+    """
+    Offline default embedder: signed feature hashing of words and character
+    trigrams into a fixed-size, L2-normalized vector. Needs no model files, so
+    related content is found by shared vocabulary and word forms rather than
+    meaning. Replace it through EMBEDDING_BACKEND with any object that has
+    `name`, `dimensions` and `embed(texts)`.
+    """
+
+    def __init__(self, dimensions=256):
+        self.dimensions = dimensions
+        self.name = f'hashing-{dimensions}'
+
+    @staticmethod
+    def _features(text):
+        """(feature, weight) pairs: each word, and its trigrams at half weight."""
+        for word in _TOKEN.findall((text or '').lower()):
+            yield f'w:{word}', 1.0
+            padded = f' {word} '
+            for start in range(len(padded) - 2):
+                yield f'c:{padded[start:start + 3]}', 0.5
+
+    def embed(self, texts):
+        rows, buckets, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # crc32 rather than hash(): vectors are persisted, so hashing must be stable across processes
+                code = zlib.crc32(feature.encode('utf-8'))
+                rows.append(row)
+                buckets.append(code % self.dimensions)
+                weights.append(weight if code & 0x80000000 else -weight)
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.intp), np.array(buckets, dtype=np.intp)), weights)
+        # Dampen repeated terms so long texts don't drown out their titles
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def load_embedder(spec, dimensions):
+    """'hashing', or 'package.module:factory' for a custom embedder."""
+    if not spec or spec == 'hashing':
+        return HashingEmbedder(dimensions)
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+class VectorIndex:
+    """
+    Unit vectors keyed by row id, searched by cosine similarity. Small sets
+    are scanned with one matrix product; an HNSW graph, when built, answers
+    large ones approximately. Rows changed since the graph was built
+    (graph_stale) are skipped in its answers, and the current versions of
+    those still present are scanned directly.
+    """
+
+    # Share of rows that may change before the graph is dropped in favour of scanning
+    MAX_GRAPH_STALE_FRACTION = 0.1
+
+    def __init__(self, ids, vectors, graph=None, graph_stale=frozenset()):
+        self.ids = ids
+        self.vectors = vectors
+        self.graph = graph
+        self.graph_stale = graph_stale
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector(self, item_id):
+        """The stored vector for an id, or None."""
+        position = np.searchsorted(self.ids, item_id)
+        if position < len(self.ids) and self.ids[position] == item_id:
+            return np.asarray(self.vectors[position])
+        return None
+
+    def search(self, query, count, exclude=()):
+        """[(id, similarity)] of the closest items, best first."""
+        exclude = set(exclude)
+        wanted = min(count + len(exclude), len(self.ids))
+        if wanted <= 0:
+            return []
+
+        if self.graph is not None:
+            matches = self._graph_search(query, wanted)
+        else:
+            matches = self._scan(self.ids, self.vectors, query, wanted)
+
+        return [(item_id, similarity) for item_id, similarity in matches if item_id not in exclude][:count]
+
+    @staticmethod
+    def _scan(ids, vectors, query, wanted):
+        similarities = vectors @ query
+        wanted = min(wanted, len(ids))
+        top = np.argpartition(similarities, len(similarities) - wanted)[-wanted:]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return list(zip(ids[top].tolist(), similarities[top].tolist()))
+
+    def _graph_search(self, query, wanted):
+        k = min(wanted + len(self.graph_stale), self.graph.get_current_count())
+        self.graph.set_ef(max(k * 2, 64))
+        labels, distances = self.graph.knn_query(query, k=k)
+        matches = [
+            (item_id, similarity) for item_id, similarity in zip(labels[0].tolist(), (1.0 - distances[0]).tolist())
+            if item_id not in self.graph_stale
+        ]
+        if self.graph_stale:
+            positions = np.searchsorted(self.ids, np.fromiter(self.graph_stale, dtype=np.int64))
+            positions = positions[positions < len(self.ids)]
+            positions = positions[np.isin(self.ids[positions], list(self.graph_stale))]
+            if len(positions):
+                matches += self._scan(self.ids[positions], np.asarray(self.vectors[positions]), query, wanted)
+                matches.sort(key=lambda match: -match[1])
+        return matches[:wanted]
+
+    def updated(self, ids, vectors, removed=()):
+        """
+        A copy with the rows for ids replaced (or added) by vectors and the
+        removed ids dropped. Copies the arrays but embeds nothing; the graph
+        is kept, with these rows marked stale, until too many have changed.
+        """
+        changed = np.concatenate([np.asarray(ids, dtype=np.int64), np.asarray(removed, dtype=np.int64)])
+        keep = ~np.isin(self.ids, changed)
+        merged_ids = np.concatenate([self.ids[keep], np.asarray(ids, dtype=np.int64)])
+        merged_vectors = np.concatenate([np.asarray(self.vectors)[keep], vectors.astype(np.float32, copy=False)])
+        order = np.argsort(merged_ids, kind='stable')
+
+        graph, graph_stale = self.graph, frozenset()
+        if graph is not None:
+            graph_stale = self.graph_stale | frozenset(changed.tolist())
+            if len(graph_stale) > self.MAX_GRAPH_STALE_FRACTION * len(merged_ids):
+                graph, graph_stale = None, frozenset()
+        return VectorIndex(merged_ids[order], merged_vectors[order], graph, graph_stale)
+
+    @staticmethod
+    def build_graph(ids, vectors):
+        graph = hnswlib.Index(space='ip', dim=vectors.shape[1])
+        graph.init_index(max_elements=len(ids), ef_construction=200, M=16)
+        graph.set_num_threads(1)
+        graph.add_items(vectors, ids)
+        return graph
+
+
+def _activity_documents(ids=None):
+    query = select(
+        Activity.id, Activity.title, Activity.description, Activity.activity_type,
+        Activity.skill_area, Activity.concept_focus, Activity.search_text
+    ).order_by(Activity.id)
+    if ids is not None:
+        query = query.where(Activity.id.in_(ids))
+    rows = db.session.execute(query).all()
+    return [(row[0], ' '.join(filter(None, row[1:]))) for row in rows]
+
+
+def _chapter_documents(ids=None):
+    query = select(
+        Chapter.id, Chapter.title, Chapter.topic, Chapter.description, Chapter.subtopics
+    ).order_by(Chapter.id)
+    if ids is not None:
+        query = query.where(Chapter.id.in_(ids))
+    rows = db.session.execute(query).all()
+    return [
+        (chapter_id, ' '.join(filter(None, [title, topic, description, chapter_text(subtopics)])))
+        for chapter_id, title, topic, description, subtopics in rows
+    ]
+
+
+def chapter_text(value):
+    """Flatten a chapter's JSON subtopics (strings, lists or dicts) to text."""
+    if isinstance(value, dict):
+        return ' '.join(chapter_text(item) for item in value.values())
+    if isinstance(value, list):
+        return ' '.join(chapter_text(item) for item in value)
+    return value if isinstance(value, str) else ''
+
+
+# kind -> (documents loader for all or the given ids, cheap source fingerprint query)
+_SOURCES = {
+    ACTIVITIES: (_activity_documents, lambda: select(func.count(Activity.id), func.max(Activity.id))),
+    CHAPTERS: (_chapter_documents, lambda: select(func.count(Chapter.id), func.max(Chapter.updated_at)))
+}
+
+
+class EmbeddingIndexStore:
+    """
+    Process-local vector indexes over activity and chapter text, persisted
+    under EMBEDDING_INDEX_DIR and memory-mapped on load, so processes share
+    one copy of the vectors and restarts don't re-embed. Rows committed in
+    this process are re-embedded on their own and patched into the index on
+    next use. Changes made elsewhere show up in the source fingerprint (row
+    count and newest id/update), checked every EMBEDDING_INDEX_CHECK_SECONDS;
+    the index is then reloaded or rebuilt in a background thread while the
+    current one keeps answering.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._checked_at = {}
+        self._pending = {}  # kind -> ids committed in this process, not yet in the index
+        self._refreshing = {}  # kind -> ids committed while a background refresh runs
+        self._embedder = None
+
+    def embedder(self):
+        config = current_app.config
+        if self._embedder is None:
+            self._embedder = load_embedder(config.get('EMBEDDING_BACKEND'), config.get('EMBEDDING_DIMENSIONS', 256))
+        return self._embedder
+
+    def changed(self, kind, ids):
+        """Rows committed in this process: re-embed just these on next use."""
+        with self._lock:
+            self._pending.setdefault(kind, set()).update(ids)
+            if kind in self._refreshing:
+                self._refreshing[kind].update(ids)
+
+    def embed(self, text):
+        return self.embedder().embed([text])[0]
+
+    def get(self, kind):
+        interval = current_app.config.get('EMBEDDING_INDEX_CHECK_SECONDS', 300)
+        index = self._indexes.get(kind)
+        if index is not None and not self._pending.get(kind) and \
+                time.monotonic() - self._checked_at.get(kind, 0.0) < interval:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(kind)
+            if index is None:
+                # First use (normally in the pre-fork master): nothing to serve meanwhile
+                self._pending.pop(kind, None)
+                fingerprint = self._fingerprint(kind)
+                index = self._indexes[kind] = self._load(kind, fingerprint) or self._build(kind, fingerprint)
+                self._checked_at[kind] = time.monotonic()
+                return index
+
+            pending = self._pending.pop(kind, None)
+            if pending:
+                index = self._indexes[kind] = self._patch(kind, index, pending)
+            elif time.monotonic() - self._checked_at.get(kind, 0.0) >= interval:
+                self._checked_at[kind] = time.monotonic()
+                if self._fingerprint(kind) != index.fingerprint:
+                    self._refresh_in_background(kind)
+            return index
+
+    def _patch(self, kind, index, ids):
+        """Re-embed the given rows into a copy of the index; rows no longer in the database are dropped."""
+        documents = _SOURCES[kind][0](sorted(ids))
+        present = [item_id for item_id, _ in documents]
+        vectors = self.embedder().embed([text for _, text in documents]) if documents \
+            else np.zeros((0, self.embedder().dimensions), dtype=np.float32)
+        patched = index.updated(present, vectors, removed=sorted(ids.difference(present)))
+        patched.fingerprint = self._fingerprint(kind)
+        return patched
+
+    def _refresh_in_background(self, kind):
+        if kind in self._refreshing:
+            return
+        self._refreshing[kind] = set()
+        app = current_app._get_current_object()
+        threading.Thread(target=self._refresh, args=(app, kind), name=f'embeddings-{kind}', daemon=True).start()
+
+    def _refresh(self, app, kind):
+        index = None
+        with app.app_context():
+            try:
+                fingerprint = self._fingerprint(kind)
+                index = self._load(kind, fingerprint) or self._build(kind, fingerprint)
+            except Exception as e:
+                logger.error(f"Failed to refresh {kind} embedding index: {e}")
+
+        with self._lock:
+            # Rows committed here while the refresh read the table may be missing from it
+            missed = self._refreshing.pop(kind, set())
+            if index is not None:
+                self._indexes[kind] = index
+                if missed:
+                    self._pending.setdefault(kind, set()).update(missed)
+            self._checked_at[kind] = time.monotonic()
+
+    def similar(self, kind, item_id, count=5, exclude=()):
+        """[(id, similarity)] of the items most like item_id, excluding itself."""
+        index = self.get(kind)
+        vector = index.vector(item_id)
+        if vector is None:
+            return []
+        return index.search(vector, count, exclude={item_id, *exclude})
+
+    def search(self, kind, text, count=5, exclude=()):
+        """[(id, similarity)] of the items most like free text."""
+        return self.get(kind).search(self.embed(text), count, exclude)
+
+    def rebuild(self):
+        """Re-embed every index from the database. Returns {kind: rows}."""
+        with self._lock:
+            for kind in _SOURCES:
+                self._pending.pop(kind, None)
+                self._indexes[kind] = self._build(kind, self._fingerprint(kind))
+                self._checked_at[kind] = time.monotonic()
+        return {kind: len(index) for kind, index in self._indexes.items()}
+
+    def _fingerprint(self, kind):
+        count, newest = db.session.execute(_SOURCES[kind][1]()).one()
+        return f'{self.embedder().name}/{count}/{newest}'
+
+    @staticmethod
+    def _directory():
+        return current_app.config['EMBEDDING_INDEX_DIR']
+
+    def _load(self, kind, fingerprint):
+        manifest_path = os.path.join(self._directory(), f'{kind}.json')
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest['fingerprint'] != fingerprint:
+                return None
+            prefix = os.path.join(self._directory(), manifest['files'])
+            ids = np.load(f'{prefix}.ids.npy', mmap_mode='r')
+            vectors = np.load(f'{prefix}.vectors.npy', mmap_mode='r')
+            graph = None
+            if manifest.get('graph') and hnswlib is not None:
+                graph = hnswlib.Index(space='ip', dim=vectors.shape[1])
+                graph.load_index(f'{prefix}.hnsw', max_elements=len(ids))
+                graph.set_num_threads(1)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load {kind} embedding index, rebuilding: {e}")
+            return None
+
+        index = VectorIndex(ids, vectors, graph)
+        index.fingerprint = fingerprint
+        return index
+
+    def _build(self, kind, fingerprint):
+        started = time.monotonic()
+        documents = _SOURCES[kind][0]()
+        ids = np.array([item_id for item_id, _ in documents], dtype=np.int64)
+        vectors = self.embedder().embed([text for _, text in documents]) if documents \
+            else np.zeros((0, self.embedder().dimensions), dtype=np.float32)
+        graph = None
+        if hnswlib is not None and len(ids) >= current_app.config.get('EMBEDDING_HNSW_THRESHOLD', 10000):
+            graph = VectorIndex.build_graph(ids, vectors)
+
+        try:
+            self._save(kind, fingerprint, ids, vectors, graph)
+        except OSError as e:
+            logger.error(f"Failed to persist {kind} embedding index: {e}")
+        logger.info(f"Embedded {len(ids)} {kind} in {time.monotonic() - started:.2f}s")
+
+        index = VectorIndex(ids, vectors, graph)
+        index.fingerprint = fingerprint
+        return index
+
+    def _save(self, kind, fingerprint, ids, vectors, graph):
+        """
+        Write the arrays under a name unique to this build, then swap the
+        manifest in atomically; readers never see a half-written index.
+        """
+        directory = self._directory()
+        os.makedirs(directory, exist_ok=True)
+        files = f"{kind}-{hashlib.sha1(f'{fingerprint}/{os.getpid()}/{time.time()}'.encode()).hexdigest()[:12]}"
+        prefix = os.path.join(directory, files)
+        np.save(f'{prefix}.ids.npy', ids)
+        np.save(f'{prefix}.vectors.npy', vectors)
+        if graph is not None:
+            graph.save_index(f'{prefix}.hnsw')
+
+        manifest_path = os.path.join(directory, f'{kind}.json')
+        with open(f'{manifest_path}.{os.getpid()}.tmp', 'w') as manifest_file:
+            json.dump({'fingerprint': fingerprint, 'files': files, 'graph': graph is not None}, manifest_file)
+        os.replace(f'{manifest_path}.{os.getpid()}.tmp', manifest_path)
+
+        # Drop superseded builds; processes that still map them keep their open copy
+        for name in os.listdir(directory):
+            if name.startswith(f'{kind}-') and not name.startswith(f'{files}.'):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+content_embeddings = EmbeddingIndexStore()
+
+_CHANGED_EMBEDDINGS_KEY = 'changed_embeddings'
+
+
+def _note_change(kind):
+    def listener(mapper, connection, target):
+        db.session.info.setdefault(_CHANGED_EMBEDDINGS_KEY, {}).setdefault(kind, set()).add(target.id)
+    return listener
+
+
+for _model, _kind in ((Activity, ACTIVITIES), (Chapter, CHAPTERS)):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _note_change(_kind))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_committed_changes(session):
+    for kind, ids in session.info.pop(_CHANGED_EMBEDDINGS_KEY, {}).items():
+        content_embeddings.changed(kind, ids)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop(_CHANGED_EMBEDDINGS_KEY, None)
@@ -0,0 +1,30 @@
+from config import Config
+from app.services.service_registry import LazyProxy
+import functools
+import threading
+
+_configure_lock = threading.Lock()
+_genai = None
+
+
+def _client():
+    """google.generativeai, imported and configured on first use: the SDK alone takes most of a second to import."""
+    global _genai
+    if _genai is None:
+        with _configure_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=Config.GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+
+@functools.lru_cache(maxsize=None)
+def generative_model(model_name):
+    """One shared GenerativeModel per model name."""
+    return _client().GenerativeModel(model_name)
+
+
+def lazy_model(model_name):
+    """A GenerativeModel that is created, with the SDK imported, on first use."""
+    return LazyProxy(lambda: generative_model(model_name))
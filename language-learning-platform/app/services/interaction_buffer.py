@@ -0,0 +1,310 @@
+from flask import current_app
+from sqlalchemy import insert, select, func
+from sqlalchemy.orm import Session
+from app.models import db, UserLearningTimeline, AdaptiveLearningSession, UserActivityLog
+from datetime import datetime
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# UserLearningTimeline event for one answered question in a monitored session
+SESSION_INTERACTION = 'session_interaction'
+SESSION_RELATED_TYPE = 'adaptive_learning_session'
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def consolidate_session_timeline(session, record):
+    """
+    Store the interactions written so far for an AdaptiveLearningSession on
+    it (its interventions) and on the activity log completed during it (the
+    whole timeline). Returns that log, or None. The caller commits.
+    """
+    timeline = list(session.scalars(select(UserLearningTimeline.event_data).where(
+        UserLearningTimeline.related_type == SESSION_RELATED_TYPE,
+        UserLearningTimeline.related_id == record.id,
+        UserLearningTimeline.event_type == SESSION_INTERACTION
+    ).order_by(UserLearningTimeline.created_at, UserLearningTimeline.id)))
+    interventions = [
+        {'timestamp': event['timestamp'], 'interventions': event['interventions']}
+        for event in timeline if event.get('interventions')
+    ]
+    record.interventions_provided = interventions
+
+    log = session.scalars(select(UserActivityLog).where(
+        UserActivityLog.user_id == record.user_id,
+        UserActivityLog.activity_id == record.activity_id,
+        UserActivityLog.completed_at >= record.start_time,
+        (UserActivityLog.session_id == record.session_id) | UserActivityLog.session_id.is_(None)
+    ).order_by(UserActivityLog.completed_at.desc()).limit(1)).first()
+    if log:
+        log.session_id = record.session_id
+        log.interaction_timeline = timeline
+        log.interventions_triggered = interventions
+    return log
+
+
+class InteractionBuffer:
+    """
+    Write-behind buffer for real-time session interactions. Recording one is
+    a list append plus a line in this process's append-only spill file; a
+    background thread writes batches to user_learning_timeline every
+    INTERACTION_BUFFER_FLUSH_SECONDS, or sooner once
+    INTERACTION_BUFFER_MAX_EVENTS are pending. Spill segments are deleted once
+    their events are committed, so segments left behind by a crashed process
+    hold exactly the unwritten events and are replayed by the next process.
+    Interactions that reach the database after their session ended (a late
+    flush in another worker, a retry, a replay) are consolidated into it then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._app = None
+        self._pending = []
+        self._spill = None
+        self._spill_path = None
+        self._segment = 0
+        self._unflushed_segments = []
+        self._unconsolidated = set()
+
+    def append(self, session_record_id, user_id, interaction):
+        """Queue one interaction of an AdaptiveLearningSession for writing."""
+        event = {
+            'user_id': user_id,
+            'event_type': SESSION_INTERACTION,
+            'event_subtype': 'correct' if interaction.get('is_correct') else 'incorrect',
+            'event_data': interaction,
+            'related_id': session_record_id,
+            'related_type': SESSION_RELATED_TYPE,
+            'skill_areas_affected': [interaction['skill_area']] if interaction.get('skill_area') else None,
+            'difficulty_level': interaction.get('difficulty_level'),
+            'performance_score': 1.0 if interaction.get('is_correct') else 0.0,
+            'created_at': interaction.get('timestamp') or datetime.utcnow().isoformat()
+        }
+        line = json.dumps(event) + '\n'
+
+        with self._lock:
+            self._start()
+            if self._spill is None:
+                self._spill_path = self._segment_path(self._segment)
+                self._spill = open(self._spill_path, 'a', encoding='utf-8')
+            self._spill.write(line)
+            self._spill.flush()
+            self._pending.append(event)
+            full = len(self._pending) >= self._app.config.get('INTERACTION_BUFFER_MAX_EVENTS', 500)
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending interaction now. Returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._pid != os.getpid():
+                    return 0
+                batch, self._pending = self._pending, []
+                segments, self._unflushed_segments = self._unflushed_segments, []
+                if self._spill is not None:
+                    self._spill.close()
+                    segments.append(self._spill_path)
+                    self._spill, self._segment = None, self._segment + 1
+            if not batch and not segments:
+                return 0
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} buffered interactions: {e}")
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._unflushed_segments[:0] = segments
+                return 0
+
+            for path in segments:
+                self._remove(path)
+            self._consolidate_ended_sessions(batch)
+            return len(batch)
+
+    def wait_for_session(self, session_record_id, expected, timeout=None):
+        """
+        Flush, then wait for the other processes' flushes until `expected`
+        interactions of the session are written, for at most timeout seconds
+        (default INTERACTION_BUFFER_FLUSH_SECONDS, the longest they hold one).
+        Returns whether they all were.
+        """
+        self.flush()
+        if timeout is None:
+            timeout = current_app.config.get('INTERACTION_BUFFER_FLUSH_SECONDS', 2)
+        deadline = time.monotonic() + timeout
+        while True:
+            written = db.session.query(func.count(UserLearningTimeline.id)).filter(
+                UserLearningTimeline.related_type == SESSION_RELATED_TYPE,
+                UserLearningTimeline.related_id == session_record_id,
+                UserLearningTimeline.event_type == SESSION_INTERACTION
+            ).scalar()
+            remaining = deadline - time.monotonic()
+            if written >= expected or remaining <= 0:
+                return written >= expected
+            time.sleep(min(0.1, remaining))
+
+    @staticmethod
+    def _write(events):
+        if not events:
+            return
+        rows = [dict(event, created_at=datetime.fromisoformat(event['created_at'])) for event in events]
+        # Own connection and transaction, independent of any request's session
+        with db.engine.begin() as connection:
+            connection.execute(insert(UserLearningTimeline), rows)
+
+    def _consolidate_ended_sessions(self, events):
+        """
+        Re-consolidate the sessions of just written events that have already
+        ended. A session being ended holds its row lock from before it reads
+        its timeline, so this either waits and sees it ended, or the end
+        reads these events itself. Failures are retried after the next flush.
+        """
+        with self._lock:
+            record_ids = self._unconsolidated | {event['related_id'] for event in events}
+            self._unconsolidated = set()
+        if not record_ids:
+            return
+        try:
+            with Session(db.engine) as session:
+                for record in session.scalars(select(AdaptiveLearningSession).where(
+                    AdaptiveLearningSession.id.in_(record_ids),
+                    AdaptiveLearningSession.end_time.isnot(None)
+                ).order_by(AdaptiveLearningSession.id).with_for_update()):
+                    consolidate_session_timeline(session, record)
+                session.commit()
+        except Exception as e:
+            logger.error(f"Failed to consolidate late interactions into sessions {sorted(record_ids)}: {e}")
+            with self._lock:
+                self._unconsolidated |= record_ids
+
+    def _start(self):
+        """Per-process setup on first use (and again in a forked child). Caller holds _lock."""
+        if self._pid == os.getpid():
+            return
+        # A forked child must not write its parent's queued events a second time
+        self._pid = os.getpid()
+        self._app = current_app._get_current_object()
+        self._pending, self._unflushed_segments = [], []
+        self._spill, self._spill_path, self._segment = None, None, 0
+        self._wakeup = threading.Event()
+        os.makedirs(self._spill_dir(), exist_ok=True)
+        threading.Thread(target=self._run, name='interaction-buffer', daemon=True).start()
+
+    def _run(self):
+        interval = self._app.config.get('INTERACTION_BUFFER_FLUSH_SECONDS', 2)
+        with self._app.app_context():
+            self.replay_orphaned_spills()
+        while self._pid == os.getpid():
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            with self._app.app_context():
+                self.flush()
+
+    def replay_orphaned_spills(self):
+        """
+        Write events from spill segments of processes that exited without
+        flushing, and from segments claimed for replay by a process that died
+        before finishing it.
+        """
+        replayed = 0
+        with self._flush_lock:
+            spill_dir = self._spill_dir()
+            orphans = []
+            for path in glob.glob(os.path.join(spill_dir, 'interactions-*.jsonl')):
+                try:
+                    pid = int(os.path.basename(path).split('-')[1])
+                except (IndexError, ValueError):
+                    continue
+                # Our own pid on a segment we didn't write is left from a previous container run
+                if self._owns(path) or (pid != os.getpid() and _process_alive(pid)):
+                    continue
+                orphans.append((path, path))
+            for path in glob.glob(os.path.join(spill_dir, 'interactions-*.jsonl.replay-*')):
+                segment, _, owner = path.rpartition('.replay-')
+                try:
+                    owner = int(owner)
+                except ValueError:
+                    continue
+                # We hold the flush lock, so a claim in our own pid is not one in progress
+                if owner != os.getpid() and _process_alive(owner):
+                    continue
+                orphans.append((path, segment))
+
+            for path, segment in orphans:
+                claimed = f'{segment}.replay-{os.getpid()}'
+                try:
+                    os.rename(path, claimed)
+                except OSError:
+                    continue  # another process claimed it first
+
+                events = []
+                with open(claimed, encoding='utf-8') as spill:
+                    for line in spill:
+                        try:
+                            events.append(json.loads(line))
+                        except ValueError:
+                            pass  # torn final line from the crash
+                try:
+                    self._write(events)
+                except Exception as e:
+                    logger.error(f"Failed to replay interaction spill {segment}: {e}")
+                    os.rename(claimed, segment)
+                    continue
+                self._remove(claimed)
+                self._consolidate_ended_sessions(events)
+                replayed += len(events)
+
+        if replayed:
+            logger.info(f"Replayed {replayed} buffered interactions from interrupted processes")
+        return replayed
+
+    def _owns(self, path):
+        with self._lock:
+            return path == self._spill_path or path in self._unflushed_segments
+
+    def _segment_path(self, segment):
+        return os.path.join(self._spill_dir(), f'interactions-{os.getpid()}-{segment}.jsonl')
+
+    def _spill_dir(self):
+        return (self._app or current_app).config['INTERACTION_SPILL_DIR']
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """Flush on interpreter exit; whatever fails stays in the spill file."""
+        if self._app is None or self._pid != os.getpid():
+            return
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush interactions at exit: {e}")
+
+
+interaction_buffer = InteractionBuffer()
+atexit.register(interaction_buffer.shutdown)
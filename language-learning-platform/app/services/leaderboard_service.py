@@ -0,0 +1,328 @@
+from flask import current_app
+from app.models import db, User, Profile, LeaderboardLedger
+from app.services.streak_service import effective_streak, local_date
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, date, timedelta
+from sortedcontainers import SortedList
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALL_TIME = 'all_time'
+WEEKLY = 'weekly'
+DAILY = 'daily'
+LEADERBOARD_PERIODS = (ALL_TIME, WEEKLY, DAILY)
+
+# period_start of the single all-time window
+ALL_TIME_START = date(1970, 1, 1)
+
+# Ledger rows updated this close to the last sync are re-read, covering
+# clock differences between application servers
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+_PENDING_AWARDS_KEY = 'leaderboard_pending_awards'
+
+
+def period_start(period, day):
+    """Start date of the window containing day (weeks start on Monday, UTC)."""
+    if period == DAILY:
+        return day
+    if period == WEEKLY:
+        return day - timedelta(days=day.weekday())
+    return ALL_TIME_START
+
+
+class SortedLeaderboard:
+    """
+    Ranking for one window as a SortedList of (-points, user_id) keys, so score
+    updates, rank, top-N and neighbour lookups are all O(log n) (plus the
+    entries returned). Tied users share a rank.
+    """
+
+    def __init__(self, rows=()):
+        self._points = {user_id: points for user_id, points in rows if points > 0}
+        self._keys = SortedList((-points, user_id) for user_id, points in self._points.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def set(self, user_id, points):
+        current = self._points.pop(user_id, None)
+        if current is not None:
+            self._keys.remove((-current, user_id))
+        if points > 0:
+            self._points[user_id] = points
+            self._keys.add((-points, user_id))
+
+    def add(self, user_id, delta):
+        self.set(user_id, self._points.get(user_id, 0) + delta)
+
+    def points(self, user_id):
+        return self._points.get(user_id)
+
+    def _rank_of(self, points):
+        return self._keys.bisect_left((-points,)) + 1
+
+    def rank(self, user_id):
+        points = self._points.get(user_id)
+        return self._rank_of(points) if points is not None else None
+
+    def entries(self, start, stop):
+        """(rank, user_id, points) for positions start..stop-1."""
+        return [(self._rank_of(-key), user_id, -key) for key, user_id in self._keys.islice(max(start, 0), stop)]
+
+    def top(self, limit):
+        return self.entries(0, limit)
+
+    def around(self, user_id, radius):
+        points = self._points.get(user_id)
+        if points is None:
+            return []
+        position = self._keys.index((-points, user_id))
+        return self.entries(position - radius, position + radius + 1)
+
+
+class _Window:
+    def __init__(self, start, board, synced_at):
+        self.start = start
+        self.board = board
+        self.synced_at = synced_at
+        self.checked_at = time.monotonic()
+
+
+class LeaderboardCache:
+    """
+    Process-local leaderboards for the current all-time, weekly and daily windows.
+    Each is loaded from the ledger once per window and afterwards kept current by
+    reading only ledger rows changed since the previous sync. A window that has
+    rolled over (new day or week) is replaced by an empty board for the new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._windows = {}
+
+    def _window(self, period, sync_interval):
+        start = period_start(period, datetime.utcnow().date())
+        window = self._windows.get(period)
+        if window is None or window.start != start:
+            window = self._load(period, start)
+            self._windows[period] = window
+        elif time.monotonic() - window.checked_at >= sync_interval:
+            self._sync(period, window)
+        return window
+
+    @staticmethod
+    def _load(period, start):
+        synced_at = datetime.utcnow()
+        rows = db.session.query(LeaderboardLedger.user_id, LeaderboardLedger.points).filter(
+            LeaderboardLedger.period == period,
+            LeaderboardLedger.period_start == start
+        ).all()
+        return _Window(start, SortedLeaderboard(rows), synced_at)
+
+    @staticmethod
+    def _sync(period, window):
+        synced_at = datetime.utcnow()
+        rows = db.session.query(LeaderboardLedger.user_id, LeaderboardLedger.points).filter(
+            LeaderboardLedger.period == period,
+            LeaderboardLedger.period_start == window.start,
+            LeaderboardLedger.updated_at >= window.synced_at - _SYNC_OVERLAP
+        ).all()
+        for user_id, points in rows:
+            window.board.set(user_id, points)
+        window.synced_at = synced_at
+        window.checked_at = time.monotonic()
+
+    def read(self, period, sync_interval, reader):
+        """Run reader(board) against the current window under the cache lock."""
+        with self._lock:
+            return reader(self._window(period, sync_interval).board)
+
+    def apply(self, awards):
+        """Apply committed awards to already-loaded windows without waiting for a sync."""
+        with self._lock:
+            for period, start, user_id, points in awards:
+                window = self._windows.get(period)
+                if window is not None and window.start == start:
+                    window.board.add(user_id, points)
+
+    def clear(self):
+        with self._lock:
+            self._windows = {}
+
+
+leaderboard_cache = LeaderboardCache()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_committed_awards(session):
+    awards = session.info.pop(_PENDING_AWARDS_KEY, None)
+    if awards:
+        leaderboard_cache.apply(awards)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_rolled_back_awards(session):
+    session.info.pop(_PENDING_AWARDS_KEY, None)
+
+
+class LeaderboardService:
+    """
+    All-time, weekly and daily points leaderboards. Awards are written to the
+    leaderboard_ledgers table in the caller's transaction; reads are served by
+    the in-memory LeaderboardCache, so they never scan the profiles table.
+    """
+
+    @staticmethod
+    def _sync_interval():
+        return current_app.config.get('LEADERBOARD_SYNC_INTERVAL_SECONDS', 5)
+
+    @staticmethod
+    def record_points(user_id, points, awarded_at=None):
+        """
+        Add points to the user's current windows. Part of the caller's
+        transaction; the caller commits.
+        """
+        if not points:
+            return
+        day = (awarded_at or datetime.utcnow()).date()
+        now = datetime.utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'period': period,
+                'period_start': period_start(period, day),
+                'points': points,
+                'updated_at': now
+            }
+            for period in LEADERBOARD_PERIODS
+        ]
+
+        dialect_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+        if dialect_insert is None:
+            for row in rows:
+                LeaderboardService._merge_ledger_row(row)
+        else:
+            stmt = dialect_insert(LeaderboardLedger).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'period', 'period_start'],
+                set_={
+                    'points': LeaderboardLedger.points + stmt.excluded.points,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            )
+            db.session.execute(stmt)
+
+        db.session.info.setdefault(_PENDING_AWARDS_KEY, []).extend(
+            (row['period'], row['period_start'], user_id, points) for row in rows
+        )
+
+    @staticmethod
+    def _merge_ledger_row(row):
+        """Select-then-update fallback for dialects without ON CONFLICT."""
+        ledger = LeaderboardLedger.query.filter_by(
+            user_id=row['user_id'], period=row['period'], period_start=row['period_start']
+        ).first()
+        if ledger:
+            ledger.points += row['points']
+            ledger.updated_at = row['updated_at']
+        else:
+            db.session.add(LeaderboardLedger(**row))
+
+    @staticmethod
+    def _describe(entries):
+        """Attach usernames and profile fields to (rank, user_id, points) entries."""
+        user_ids = [user_id for _, user_id, _ in entries]
+        if not user_ids:
+            return []
+        details = {
+            user.id: (user, profile)
+            for user, profile in db.session.query(User, Profile).join(Profile).filter(User.id.in_(user_ids))
+        }
+
+        results = []
+        for rank, user_id, points in entries:
+            user, profile = details.get(user_id, (None, None))
+            if user is None:
+                continue
+            results.append({
+                'rank': rank,
+                'user_id': user_id,
+                'username': user.username,
+                'points': points,
+                'current_streak': effective_streak(
+                    profile.current_streak, profile.last_activity_date, local_date(user.timezone)
+                ),
+                'proficiency_level': profile.proficiency_level
+            })
+        return results
+
+    @staticmethod
+    def get_top(period=ALL_TIME, limit=10):
+        try:
+            entries = leaderboard_cache.read(
+                period, LeaderboardService._sync_interval(), lambda board: board.top(limit)
+            )
+            return LeaderboardService._describe(entries)
+        except Exception as e:
+            logger.error(f"Failed to get {period} leaderboard: {e}")
+            return []
+
+    @staticmethod
+    def get_user_rank(user_id, period=ALL_TIME, neighbours=2):
+        """
+        The user's rank and points in the window, plus the entries immediately
+        above and below. Rank is None if the user has no points in the window.
+        """
+        try:
+            rank, points, total, entries = leaderboard_cache.read(
+                period, LeaderboardService._sync_interval(),
+                lambda board: (board.rank(user_id), board.points(user_id), len(board), board.around(user_id, neighbours))
+            )
+            return {
+                'user_id': user_id,
+                'rank': rank,
+                'points': points or 0,
+                'total_ranked_users': total,
+                'neighbours': LeaderboardService._describe(entries)
+            }
+        except Exception as e:
+            logger.error(f"Failed to get {period} leaderboard rank for user {user_id}: {e}")
+            return None
+
+    @staticmethod
+    def prune_expired_windows():
+        """
+        Delete ledgers of daily and weekly windows past their retention period.
+        The current windows reset on their own as the date moves on.
+        """
+        today = datetime.utcnow().date()
+        cutoffs = {
+            DAILY: today - timedelta(days=current_app.config.get('LEADERBOARD_DAILY_RETENTION_DAYS', 14)),
+            WEEKLY: period_start(WEEKLY, today) - timedelta(
+                weeks=current_app.config.get('LEADERBOARD_WEEKLY_RETENTION_WEEKS', 12)
+            ),
+        }
+        try:
+            deleted = {}
+            for period, cutoff in cutoffs.items():
+                deleted[period] = LeaderboardLedger.query.filter(
+                    LeaderboardLedger.period == period,
+                    LeaderboardLedger.period_start < cutoff
+                ).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to prune leaderboard windows: {e}")
+            return {}
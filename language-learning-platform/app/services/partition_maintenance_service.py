@@ -0,0 +1,210 @@
+from flask import current_app
+from app.models import db
+from app.db_partitioning import (
+    PARTITIONED_TABLES, add_months, month_start, list_monthly_partitions,
+    create_monthly_partition, convert_to_partitioned, is_partitioned
+)
+from sqlalchemy import text
+from datetime import datetime
+import csv
+import gzip
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock held for a maintenance run, so that when every host runs the cron job only one does the work
+MAINTENANCE_LOCK_ID = 0x7061727469  # 'parti'
+
+# Per-table aggregate columns for monthly_activity_rollups, in the order
+# (category, event_count, score_sum, max_score_sum, correct_count, time_spent_minutes)
+ROLLUP_SELECTS = {
+    'user_activity_logs': (
+        "coalesce(skill_area, '')", "count(*)",
+        "coalesce(sum(score), 0)", "coalesce(sum(max_score), 0)",
+        "count(*) FILTER (WHERE max_score > 0 AND score >= max_score)",
+        "coalesce(sum(time_spent_minutes), 0)"
+    ),
+    'user_learning_timeline': (
+        "event_type", "count(*)",
+        "coalesce(sum(points_earned), 0)", "0",
+        "0",
+        "coalesce(sum(time_spent_minutes), 0)"
+    ),
+    'activity_question_responses': (
+        "coalesce(skill_area, '')", "count(*)",
+        "coalesce(sum(points_earned), 0)", "0",
+        "count(*) FILTER (WHERE is_correct)",
+        "coalesce(sum(time_spent_seconds), 0) / 60.0"
+    ),
+    'assessment_question_responses': (
+        "coalesce(skill_area, '')", "count(*)",
+        "coalesce(sum(points_earned), 0)", "0",
+        "count(*) FILTER (WHERE is_correct)",
+        "coalesce(sum(time_spent_seconds), 0) / 60.0"
+    ),
+}
+
+
+class PartitionMaintenanceService:
+    """
+    Upkeep for the monthly-partitioned history tables (PostgreSQL only):
+    pre-creates upcoming partitions and archives cold ones. Archiving folds a
+    partition into monthly_activity_rollups, exports its rows to a gzip CSV in
+    PARTITION_ARCHIVE_DIR and drops it. Meant to run daily from cron via
+    maintain_partitions.py; with several hosts, PARTITION_ARCHIVE_DIR should
+    be shared storage, and an advisory lock keeps runs from overlapping.
+    """
+
+    @staticmethod
+    def _is_supported():
+        if db.engine.dialect.name != 'postgresql':
+            logger.info("Partition maintenance skipped: only supported on PostgreSQL")
+            return False
+        return True
+
+    @staticmethod
+    def run():
+        """Convert, extend and archive every partitioned table. Returns a summary dict."""
+        if not PartitionMaintenanceService._is_supported():
+            return {}
+
+        with db.engine.connect() as lock_connection:
+            if not lock_connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {'id': MAINTENANCE_LOCK_ID}).scalar():
+                logger.info("Partition maintenance skipped: already running elsewhere")
+                return {}
+            try:
+                summary = {}
+                for table in PARTITIONED_TABLES:
+                    summary[table] = {
+                        'converted': PartitionMaintenanceService.ensure_partitioned(table),
+                        'created': PartitionMaintenanceService.ensure_future_partitions(table)
+                    }
+                # Referencing tables first: a partition can't be detached while rows still reference it
+                for table in reversed(list(PARTITIONED_TABLES)):
+                    summary[table]['archived'] = PartitionMaintenanceService.archive_cold_partitions(table)
+                return summary
+            finally:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MAINTENANCE_LOCK_ID})
+
+    @staticmethod
+    def ensure_partitioned(table):
+        """Partition a table created unpartitioned (e.g. by db.create_all)."""
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(text("SET LOCAL statement_timeout = 0"))
+                return convert_to_partitioned(
+                    connection, table, current_app.config['PARTITION_PRECREATE_MONTHS']
+                )
+        except Exception as e:
+            logger.error(f"Failed to partition {table}: {e}")
+            return False
+
+    @staticmethod
+    def ensure_future_partitions(table, months_ahead=None):
+        """Create partitions for the current month and the next few. Returns their names."""
+        if months_ahead is None:
+            months_ahead = current_app.config['PARTITION_PRECREATE_MONTHS']
+
+        created = []
+        try:
+            with db.engine.begin() as connection:
+                if not is_partitioned(connection, table):
+                    return []
+                current = month_start(datetime.utcnow())
+                for offset in range(months_ahead + 1):
+                    name = create_monthly_partition(connection, table, add_months(current, offset))
+                    if name:
+                        created.append(name)
+        except Exception as e:
+            logger.error(f"Failed to create partitions for {table}: {e}")
+            return []
+
+        for name in created:
+            logger.info(f"Created partition {name}")
+        return created
+
+    @staticmethod
+    def archive_cold_partitions(table, retention_months=None, archive_dir=None):
+        """
+        Archive partitions whose whole month is older than the retention window.
+        Each partition is rolled up, exported and dropped in its own transaction.
+        Returns the archive file paths written.
+        """
+        if retention_months is None:
+            retention_months = current_app.config['PARTITION_RETENTION_MONTHS']
+        if archive_dir is None:
+            archive_dir = current_app.config['PARTITION_ARCHIVE_DIR']
+
+        cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+        with db.engine.connect() as connection:
+            partitions = list_monthly_partitions(connection, table)
+
+        archived = []
+        for month, partition in partitions.items():
+            if month >= cutoff:
+                break
+            path = PartitionMaintenanceService.archive_partition(table, partition, month, archive_dir)
+            if path is None:
+                break
+            archived.append(path)
+        return archived
+
+    @staticmethod
+    def archive_partition(table, partition, month, archive_dir):
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f'{partition}.csv.gz')
+
+        try:
+            with db.engine.begin() as connection:
+                # Rollup and export scan the whole partition; lift the request-sized timeout
+                connection.execute(text("SET LOCAL statement_timeout = 0"))
+                rows = PartitionMaintenanceService._rollup_partition(connection, table, partition, month)
+                PartitionMaintenanceService._export_partition(connection, partition, path)
+
+                # Detaching checks that no foreign key still references the partition's rows
+                connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+                connection.execute(text(f"DROP TABLE {partition}"))
+        except Exception as e:
+            logger.error(f"Failed to archive partition {partition}: {e}")
+            return None
+
+        logger.info(f"Archived partition {partition} to {path} ({rows} rollup rows)")
+        return path
+
+    @staticmethod
+    def _export_partition(connection, partition, path):
+        """Write the partition's rows to a gzip CSV with a header row."""
+        if connection.dialect.driver == 'psycopg2':
+            # COPY streams the rows server-side; copy_expert is psycopg2's API for it
+            cursor = connection.connection.dbapi_connection.cursor()
+            try:
+                with gzip.open(path, 'wb') as archive_file:
+                    cursor.copy_expert(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)", archive_file)
+            finally:
+                cursor.close()
+            return
+
+        result = connection.execution_options(stream_results=True).execute(text(f"SELECT * FROM {partition}"))
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as archive_file:
+            writer = csv.writer(archive_file)
+            writer.writerow(result.keys())
+            for rows in result.partitions(1000):
+                writer.writerows(rows)
+
+    @staticmethod
+    def _rollup_partition(connection, table, partition, month):
+        category, event_count, score_sum, max_score_sum, correct_count, time_spent = ROLLUP_SELECTS[table]
+        result = connection.execute(text(
+            "INSERT INTO monthly_activity_rollups "
+            "(source_table, period_month, user_id, category, event_count, score_sum, "
+            "max_score_sum, correct_count, time_spent_minutes, created_at) "
+            f"SELECT :source_table, :period_month, user_id, {category}, {event_count}, {score_sum}, "
+            f"{max_score_sum}, {correct_count}, {time_spent}, timezone('utc', now()) "
+            f"FROM {partition} GROUP BY user_id, {category} "
+            "ON CONFLICT (source_table, user_id, period_month, category) DO UPDATE SET "
+            "event_count = EXCLUDED.event_count, score_sum = EXCLUDED.score_sum, "
+            "max_score_sum = EXCLUDED.max_score_sum, correct_count = EXCLUDED.correct_count, "
+            "time_spent_minutes = EXCLUDED.time_spent_minutes"
+        ), {'source_table': table, 'period_month': month})
+        return result.rowcount
@@ -0,0 +1,60 @@
+from flask import current_app
+from app.models import db, UserActivityLog
+from sqlalchemy import func
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+
+def activity_log_version(user_id):
+    """
+    The user's activity log change stamp: count, highest id and latest
+    completed_at of their logs, read from the (user_id, completed_at) index
+    when asked for. Inserts and deletes change the count or highest id, and
+    a retry, the only in-place update of scores, moves completed_at. Nothing
+    is written on the log's write path.
+    """
+    return tuple(db.session.query(
+        func.count(UserActivityLog.id), func.max(UserActivityLog.id), func.max(UserActivityLog.completed_at)
+    ).filter(UserActivityLog.user_id == user_id).one())
+
+
+class PerformanceProfileCache:
+    """
+    Process-local LRU of analyze_user_performance results keyed by
+    (user_id, days). An entry is reused while the user's activity log version
+    is unchanged, so writes from any process invalidate it, and for at most
+    PERFORMANCE_PROFILE_TTL_SECONDS, as the analysis window slides with time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, user_id, days, compute):
+        config = current_app.config
+        key = (user_id, days)
+        version = activity_log_version(user_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[2])
+
+        profile = compute()
+        expires_at = time.monotonic() + config.get('PERFORMANCE_PROFILE_TTL_SECONDS', 300)
+        with self._lock:
+            self._entries[key] = (version, expires_at, profile)
+            self._entries.move_to_end(key)
+            while len(self._entries) > config.get('PERFORMANCE_PROFILE_CACHE_SIZE', 10000):
+                self._entries.popitem(last=False)
+        return copy.deepcopy(profile)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+performance_profiles = PerformanceProfileCache()
@@ -4,8 +4,13 @@ from app.models import (
     DailyChallenge, UserDailyChallengeCompletion
 )
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.service_registry import lazy_service
+from app.services.reference_data import reference_data
+from app.services.streak_service import StreakService
+from app.services.user_lookups import active_goal
 from datetime import datetime, date, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import load_only
 import json
 import re
 
@@ -15,7 +20,7 @@ class PersonalizationService:
     """
     
     def __init__(self):
-        self.activity_service = ActivityGeneratorService()
+        self.activity_service = lazy_service(ActivityGeneratorService)
     
     # Phase 1: Personalization Setup
     
@@ -236,12 +241,14 @@ class PersonalizationService:
                 return {'error': 'User not found'}
             
             # Get user goals and streak
-            goal = UserGoal.query.filter_by(user_id=user_id, is_active=True).first()
-            streak = user.profile.current_streak if user.profile else 0
+            goal = active_goal(user_id)
+            streak = StreakService.get_daily_streak(user)['current_streak']
             
             # Get today's progress
             today = date.today()
-            today_sessions = LearningSession.query.filter(
+            today_sessions = LearningSession.query.options(
+                load_only(LearningSession.id, LearningSession.duration_minutes)
+            ).filter(
                 LearningSession.user_id == user_id,
                 func.date(LearningSession.start_time) == today
             ).all()
@@ -439,7 +446,7 @@ class PersonalizationService:
     def _get_or_create_daily_challenge(self, user_id):
         """Get or create today's daily challenge"""
         today = date.today()
-        challenge = DailyChallenge.query.filter_by(challenge_date=today).first()
+        challenge = reference_data.daily_challenge(today)
         
         if not challenge:
             # Create today's challenge
@@ -3,8 +3,10 @@ from app.models import (
     TestAssessment, VocabularyWord, MistakePattern
 )
 from app.services.activity_generator_service import ActivityGeneratorService
+from app.services.service_registry import lazy_service
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import load_only
 import json
 import random
 
@@ -15,7 +17,7 @@ class PracticeAgentService:
     """
     
     def __init__(self):
-        self.activity_service = ActivityGeneratorService()
+        self.activity_service = lazy_service(ActivityGeneratorService)
     
     def generate_adaptive_practice_questions(self, user_id, chapter_id, num_questions=5, session_type='practice'):
         """
@@ -301,7 +303,9 @@ class PracticeAgentService:
         """
         try:
             # Get recent practice sessions
-            recent_sessions = PracticeSession.query.filter_by(
+            recent_sessions = PracticeSession.query.options(load_only(
+                PracticeSession.id, PracticeSession.duration_minutes, PracticeSession.total_questions
+            )).filter_by(
                 user_id=user_id, is_completed=True
             ).filter(
                 PracticeSession.start_time >= datetime.utcnow() - timedelta(days=7)
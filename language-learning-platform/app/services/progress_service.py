@@ -1,6 +1,8 @@
 
 from app.models import db, User, Profile, UserActivityLog, LearningPath, Activity
-from datetime import datetime, date
+from app.services.leaderboard_service import LeaderboardService
+from app.services.streak_service import StreakService
+from datetime import datetime
 from sqlalchemy import func
 
 class ProgressService:
@@ -50,7 +52,7 @@ class ProgressService:
 
     def _update_user_points_and_streak(self, user_id, activity_id, score, max_score):
         """
-        Updates user points and daily streak.
+        Updates user points and streaks.
         """
         profile = Profile.query.filter_by(user_id=user_id).first()
         if not profile:
@@ -67,25 +69,14 @@ class ProgressService:
                 points_earned = int((percentage / 100) * activity.points_reward)
             
             profile.points += points_earned
+            LeaderboardService.record_points(user_id, points_earned)
         
-        # Update streak
-        today = date.today()
-        if profile.last_activity_date:
-            if profile.last_activity_date == today:
-                # Already completed activity today, don't update streak
-                pass
-            elif profile.last_activity_date == date.fromordinal(today.toordinal() - 1):
-                # Completed activity yesterday, increment streak
-                profile.current_streak += 1
-                profile.last_activity_date = today
-            else:
-                # Gap in activities, reset streak
-                profile.current_streak = 1
-                profile.last_activity_date = today
-        else:
-            # First activity ever
-            profile.current_streak = 1
-            profile.last_activity_date = today
+        # Update streaks in the user's timezone
+        StreakService.record_activity(
+            user_id,
+            activity.activity_type if activity else None,
+            activity.skill_area if activity else None
+        )
 
     def get_learning_path_progress(self, user_id, path_id):
         """
@@ -147,7 +138,7 @@ class ProgressService:
                 'native_language': profile.native_language,
                 'target_language': profile.target_language,
                 'proficiency_level': profile.proficiency_level,
-                'current_streak': profile.current_streak,
+                'current_streak': StreakService.get_daily_streak(user)['current_streak'],
                 'points': profile.points,
                 'last_activity_date': profile.last_activity_date.isoformat() if profile.last_activity_date else None,
                 'total_activities_completed': total_activities,
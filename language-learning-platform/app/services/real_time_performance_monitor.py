@@ -3,14 +3,17 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from app.models import (
     db, User, Activity, UserActivityLog, LearningPath,
-    ProficiencyAssessment
+    ProficiencyAssessment, AdaptiveLearningSession
 )
 from app.services.adaptive_learning_service import AdaptiveLearningAlgorithm
-import google.generativeai as genai
-from config import Config
+from app.services.session_state_store import session_states, append_bounded
+from app.services.interaction_buffer import interaction_buffer, consolidate_session_timeline
+from app.services.service_registry import lazy_service
+from app.services.gemini_models import lazy_model
+from flask import current_app
+import logging
 
-# Configure Gemini
-genai.configure(api_key=Config.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
 
 class RealTimePerformanceMonitor:
@@ -20,8 +23,8 @@ class RealTimePerformanceMonitor:
     """
     
     def __init__(self):
-        self.adaptive_algorithm = AdaptiveLearningAlgorithm()
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.adaptive_algorithm = lazy_service(AdaptiveLearningAlgorithm)
+        self.model = lazy_model('gemini-2.0-flash-exp')
         
         # Performance thresholds
         self.STRUGGLE_THRESHOLD = 0.5
@@ -34,8 +37,28 @@ class RealTimePerformanceMonitor:
         self.METHOD_SWITCH_TRIGGER = 3  # Consecutive poor performances
         self.BREAK_SUGGESTION_TIME = 30  # Minutes of continuous struggle
         
-        # Real-time tracking state
-        self.active_sessions = {}  # user_id -> session_data
+        # Real-time tracking state lives in the shared session store, keyed by user_id,
+        # so any worker can continue a session another one started
+        self.active_sessions = session_states
+
+    @staticmethod
+    def _history_length() -> int:
+        return current_app.config.get('SESSION_HISTORY_LENGTH', 50)
+
+    @staticmethod
+    def _load_session(state: Dict) -> Dict:
+        """Stored (JSON) session state to the working dict, with datetimes restored."""
+        session = dict(state)
+        for field in ('start_time', 'last_interaction'):
+            session[field] = datetime.fromisoformat(session[field])
+        return session
+
+    @staticmethod
+    def _dump_session(session: Dict) -> Dict:
+        state = dict(session)
+        for field in ('start_time', 'last_interaction'):
+            state[field] = session[field].isoformat()
+        return state
 
     def start_learning_session(self, user_id: int, activity_id: int) -> Dict:
         """
@@ -46,90 +69,177 @@ class RealTimePerformanceMonitor:
             if not activity:
                 return {'error': 'Activity not found'}
             
+            start_time = datetime.utcnow()
+            record = AdaptiveLearningSession(
+                session_id=f"{user_id}_{activity_id}_{int(start_time.timestamp() * 1000)}",
+                user_id=user_id,
+                activity_id=activity_id,
+                learning_path_id=activity.learning_path_id,
+                start_time=start_time,
+                session_status='active'
+            )
+            db.session.add(record)
+            db.session.flush()
+            
+            # Per-question lists are ring buffers of the last SESSION_HISTORY_LENGTH
+            # entries; totals are kept alongside so session averages stay exact
             session_data = {
                 'user_id': user_id,
                 'activity_id': activity_id,
-                'start_time': datetime.utcnow(),
+                'session_id': record.session_id,
+                'session_record_id': record.id,
+                'start_time': start_time,
                 'interaction_count': 0,
                 'correct_answers': 0,
                 'incorrect_answers': 0,
                 'hint_requests': 0,
+                'total_response_time': 0.0,
                 'time_spent_per_question': [],
                 'error_patterns': [],
                 'struggle_indicators': [],
-                'last_interaction': datetime.utcnow(),
-                'performance_history': []
+                'struggle_indicator_count': 0,
+                'last_interaction': start_time,
+                'performance_history': [],
+                'live_events': [],
+                'live_event_seq': 0
             }
             
-            self.active_sessions[user_id] = session_data
+            # A session started over an unfinished one replaces it
+            replaced = self.active_sessions.update(
+                user_id, lambda previous: (self._dump_session(session_data), previous)
+            )
+            if replaced and replaced.get('session_record_id'):
+                AdaptiveLearningSession.query.filter_by(id=replaced['session_record_id'], session_status='active')\
+                    .update({'session_status': 'abandoned', 'completion_reason': 'new_session_started'})
+            db.session.commit()
             
             return {
-                'session_id': f"{user_id}_{activity_id}_{int(datetime.utcnow().timestamp())}",
+                'session_id': record.session_id,
                 'monitoring_active': True,
                 'adaptive_features_enabled': True,
                 'initial_difficulty': activity.difficulty_level
             }
             
         except Exception as e:
+            db.session.rollback()
             return {'error': f'Session monitoring failed: {str(e)}'}
 
     def track_user_interaction(self, user_id: int, interaction_data: Dict) -> Dict:
         """
         Track user interaction and provide real-time feedback/adaptation.
         """
+        return self.track_live_interaction(user_id, interaction_data)[0]
+
+    def track_live_interaction(self, user_id: int, interaction_data: Dict) -> Tuple[Dict, List[Dict]]:
+        """
+        Track an interaction and also return the live events (interventions and
+        adaptive content) it raised, for pushing to a connected client.
+        """
         try:
-            if user_id not in self.active_sessions:
-                return {'error': 'No active monitoring session'}
-            
-            session = self.active_sessions[user_id]
-            current_time = datetime.utcnow()
-            
-            # Update session data
-            session['interaction_count'] += 1
-            session['last_interaction'] = current_time
-            
-            # Track response data
-            is_correct = interaction_data.get('is_correct', False)
-            response_time = interaction_data.get('response_time_seconds', 0)
-            difficulty = interaction_data.get('difficulty_level', 'medium')
+            recorded = {}
             
-            if is_correct:
-                session['correct_answers'] += 1
-            else:
-                session['incorrect_answers'] += 1
-                self._track_error_pattern(session, interaction_data)
+            def record(state):
+                new_state, result = self._record_interaction(state, interaction_data)
+                recorded['session'] = new_state
+                if new_state:
+                    recorded['live_events'] = [
+                        event for event in new_state['live_events']
+                        if event['seq'] > state.get('live_event_seq', 0)
+                    ]
+                return new_state, result
             
-            session['time_spent_per_question'].append(response_time)
-            
-            # Calculate current performance metrics
-            current_accuracy = session['correct_answers'] / session['interaction_count']
-            avg_response_time = sum(session['time_spent_per_question']) / len(session['time_spent_per_question'])
-            
-            # Real-time analysis and interventions
-            interventions = self._analyze_and_intervene(session, current_accuracy, avg_response_time)
-            
-            # Update performance history
-            session['performance_history'].append({
-                'timestamp': current_time.isoformat(),
-                'accuracy': current_accuracy,
-                'response_time': response_time,
-                'is_correct': is_correct
-            })
+            result = self.active_sessions.update(user_id, record)
             
-            return {
-                'session_performance': {
-                    'current_accuracy': round(current_accuracy, 2),
-                    'average_response_time': round(avg_response_time, 2),
-                    'total_interactions': session['interaction_count'],
-                    'correct_answers': session['correct_answers'],
-                    'incorrect_answers': session['incorrect_answers']
-                },
-                'interventions': interventions,
-                'continue_monitoring': True
-            }
+            # Written behind: the timeline reaches the database in batches
+            session = recorded.get('session')
+            if session and session.get('session_record_id'):
+                interaction_buffer.append(session['session_record_id'], user_id, {
+                    'timestamp': session['last_interaction'],
+                    'is_correct': bool(interaction_data.get('is_correct', False)),
+                    'response_time_seconds': interaction_data.get('response_time_seconds', 0),
+                    'question_type': interaction_data.get('question_type'),
+                    'skill_area': interaction_data.get('skill_area'),
+                    'difficulty_level': interaction_data.get('difficulty_level'),
+                    'error_type': interaction_data.get('error_type'),
+                    'accuracy': result['session_performance']['current_accuracy'],
+                    'interventions': [intervention['type'] for intervention in result['interventions']]
+                })
+                return result, recorded.get('live_events', [])
+            return result, []
             
         except Exception as e:
-            return {'error': f'Interaction tracking failed: {str(e)}'}
+            return {'error': f'Interaction tracking failed: {str(e)}'}, []
+
+    def _record_interaction(self, state: Optional[Dict], interaction_data: Dict) -> Tuple[Optional[Dict], Dict]:
+        """
+        Apply one interaction to a stored session. Returns (new state, tracking result).
+        """
+        if state is None:
+            return None, {'error': 'No active monitoring session'}
+        
+        session = self._load_session(state)
+        session.setdefault('live_events', [])
+        session.setdefault('live_event_seq', 0)
+        history_length = self._history_length()
+        current_time = datetime.utcnow()
+        
+        # Update session data
+        session['interaction_count'] += 1
+        session['last_interaction'] = current_time
+        
+        # Track response data
+        is_correct = interaction_data.get('is_correct', False)
+        response_time = interaction_data.get('response_time_seconds', 0)
+        difficulty = interaction_data.get('difficulty_level', 'medium')
+        
+        if is_correct:
+            session['correct_answers'] += 1
+        else:
+            session['incorrect_answers'] += 1
+            self._track_error_pattern(session, interaction_data)
+        
+        append_bounded(session['time_spent_per_question'], response_time, history_length)
+        session['total_response_time'] += response_time
+        
+        # Calculate current performance metrics
+        current_accuracy = session['correct_answers'] / session['interaction_count']
+        avg_response_time = session['total_response_time'] / session['interaction_count']
+        
+        # Real-time analysis and interventions
+        interventions = self._analyze_and_intervene(session, current_accuracy, avg_response_time)
+        
+        # Update performance history
+        append_bounded(session['performance_history'], {
+            'timestamp': current_time.isoformat(),
+            'accuracy': current_accuracy,
+            'response_time': response_time,
+            'is_correct': is_correct
+        }, history_length)
+        
+        # Queue interventions, and fresh adaptive content after high-priority ones,
+        # for clients listening on the live channel
+        live_events = [{'type': 'intervention', 'intervention': intervention} for intervention in interventions]
+        if any(intervention.get('priority') == 'high' for intervention in interventions):
+            live_events.append({'type': 'adaptive_content', **self._adapt_content(session, current_accuracy)})
+        for live_event in live_events:
+            session['live_event_seq'] += 1
+            append_bounded(session['live_events'], {
+                'seq': session['live_event_seq'],
+                'timestamp': current_time.isoformat(),
+                **live_event
+            }, history_length)
+        
+        return self._dump_session(session), {
+            'session_performance': {
+                'current_accuracy': round(current_accuracy, 2),
+                'average_response_time': round(avg_response_time, 2),
+                'total_interactions': session['interaction_count'],
+                'correct_answers': session['correct_answers'],
+                'incorrect_answers': session['incorrect_answers']
+            },
+            'interventions': interventions,
+            'continue_monitoring': True
+        }
 
     def _track_error_pattern(self, session: Dict, interaction_data: Dict):
         """
@@ -148,17 +258,18 @@ class RealTimePerformanceMonitor:
             'correct_answer': interaction_data.get('correct_answer', '')
         }
         
-        session['error_patterns'].append(error_info)
+        append_bounded(session['error_patterns'], error_info, self._history_length())
         
         # Detect consecutive errors in same area
         recent_errors = session['error_patterns'][-3:]  # Last 3 errors
         if len(recent_errors) == 3:
             if all(error['skill_area'] == skill_area for error in recent_errors):
-                session['struggle_indicators'].append({
+                append_bounded(session['struggle_indicators'], {
                     'type': 'consecutive_errors_same_skill',
                     'skill_area': skill_area,
                     'timestamp': datetime.utcnow().isoformat()
-                })
+                }, self._history_length())
+                session['struggle_indicator_count'] += 1
 
     def _analyze_and_intervene(self, session: Dict, current_accuracy: float, 
                              avg_response_time: float) -> List[Dict]:
@@ -343,44 +454,49 @@ class RealTimePerformanceMonitor:
         Generate adaptive content based on real-time performance analysis.
         """
         try:
-            if user_id not in self.active_sessions:
+            state = self.active_sessions.get(user_id)
+            if state is None:
                 return {'error': 'No active session to adapt content'}
             
-            session = self.active_sessions[user_id]
-            current_accuracy = performance_data.get('accuracy', 0.5)
-            common_errors = self._identify_common_error_patterns(session['error_patterns'])
-            
-            # Determine content adaptation strategy
-            if current_accuracy < 0.4:
-                # Significant struggle - simplify and provide foundation
-                adaptation_strategy = 'simplify_and_reinforce'
-            elif current_accuracy < 0.7:
-                # Moderate struggle - provide targeted practice
-                adaptation_strategy = 'targeted_practice'
-            else:
-                # Good performance - can increase challenge
-                adaptation_strategy = 'progressive_challenge'
-            
-            # Generate adapted content using AI
-            content_prompt = self._create_content_adaptation_prompt(
-                session, adaptation_strategy, common_errors
-            )
-            
-            # For now, return structured adaptation without AI call
-            adapted_content = self._generate_structured_adaptation(
-                adaptation_strategy, common_errors, session
-            )
-            
-            return {
-                'adaptation_strategy': adaptation_strategy,
-                'adapted_content': adapted_content,
-                'reasoning': f"Based on {current_accuracy:.1%} accuracy and error patterns",
-                'confidence': 0.8
-            }
+            return self._adapt_content(self._load_session(state), performance_data.get('accuracy', 0.5))
             
         except Exception as e:
             return {'error': f'Adaptive content generation failed: {str(e)}'}
 
+    def _adapt_content(self, session: Dict, current_accuracy: float) -> Dict:
+        """
+        Choose an adaptation strategy for the session's accuracy and errors.
+        """
+        common_errors = self._identify_common_error_patterns(session['error_patterns'])
+        
+        # Determine content adaptation strategy
+        if current_accuracy < 0.4:
+            # Significant struggle - simplify and provide foundation
+            adaptation_strategy = 'simplify_and_reinforce'
+        elif current_accuracy < 0.7:
+            # Moderate struggle - provide targeted practice
+            adaptation_strategy = 'targeted_practice'
+        else:
+            # Good performance - can increase challenge
+            adaptation_strategy = 'progressive_challenge'
+        
+        # Generate adapted content using AI
+        content_prompt = self._create_content_adaptation_prompt(
+            session, adaptation_strategy, common_errors
+        )
+        
+        # For now, return structured adaptation without AI call
+        adapted_content = self._generate_structured_adaptation(
+            adaptation_strategy, common_errors, session
+        )
+        
+        return {
+            'adaptation_strategy': adaptation_strategy,
+            'adapted_content': adapted_content,
+            'reasoning': f"Based on {current_accuracy:.1%} accuracy and error patterns",
+            'confidence': 0.8
+        }
+
     def _create_content_adaptation_prompt(self, session: Dict, strategy: str, 
                                         common_errors: List[Dict]) -> str:
         """
@@ -459,16 +575,17 @@ class RealTimePerformanceMonitor:
         End the monitoring session and provide summary analytics.
         """
         try:
-            if user_id not in self.active_sessions:
+            state = self.active_sessions.pop(user_id)
+            if state is None:
                 return {'error': 'No active session to end'}
             
-            session = self.active_sessions[user_id]
+            session = self._load_session(state)
             end_time = datetime.utcnow()
             total_duration = (end_time - session['start_time']).total_seconds() / 60
             
             # Calculate final metrics
             final_accuracy = session['correct_answers'] / session['interaction_count'] if session['interaction_count'] > 0 else 0
-            avg_response_time = sum(session['time_spent_per_question']) / len(session['time_spent_per_question']) if session['time_spent_per_question'] else 0
+            avg_response_time = session['total_response_time'] / session['interaction_count'] if session['interaction_count'] > 0 else 0
             
             # Generate session summary
             session_summary = {
@@ -479,23 +596,67 @@ class RealTimePerformanceMonitor:
                 'correct_answers': session['correct_answers'],
                 'incorrect_answers': session['incorrect_answers'],
                 'hint_requests': session['hint_requests'],
-                'error_patterns_identified': len(session['error_patterns']),
-                'struggle_indicators': len(session['struggle_indicators'])
+                'error_patterns_identified': session['incorrect_answers'],
+                'struggle_indicators': session['struggle_indicator_count']
             }
             
-            # Clean up session
-            del self.active_sessions[user_id]
+            recommendations = self._generate_next_session_recommendations(session)
+            if session.get('session_record_id'):
+                self._save_session_record(session, end_time, session_summary, recommendations)
             
             return {
                 'session_ended': True,
                 'session_summary': session_summary,
                 'performance_insights': self._generate_performance_insights(session),
-                'recommendations_for_next_session': self._generate_next_session_recommendations(session)
+                'recommendations_for_next_session': recommendations
             }
             
         except Exception as e:
             return {'error': f'Session ending failed: {str(e)}'}
 
+    def _save_session_record(self, session: Dict, end_time: datetime, summary: Dict,
+                             recommendations: List[str]):
+        """
+        Persist a finished session in one transaction: wait (briefly) for
+        every process to write its buffered interactions, then store the
+        whole timeline on the AdaptiveLearningSession and on the activity log
+        completed during it. Interactions written later still reach both (see
+        app/services/interaction_buffer.py).
+        """
+        try:
+            if not interaction_buffer.wait_for_session(session['session_record_id'], session['interaction_count']):
+                logger.warning(f"Session {session['session_id']} ended before all its interactions were written; "
+                               f"the rest are added as they arrive")
+            # Locked before the timeline is read, so a late write either waits for this end or is read by it
+            record = db.session.get(AdaptiveLearningSession, session['session_record_id'], with_for_update=True)
+            if record is None:
+                return
+            
+            duration = summary['duration_minutes']
+            record.end_time = end_time
+            record.total_duration_minutes = duration
+            record.interaction_count = summary['total_interactions']
+            record.correct_answers = summary['correct_answers']
+            record.incorrect_answers = summary['incorrect_answers']
+            record.hint_requests = summary['hint_requests']
+            record.final_accuracy = summary['final_accuracy']
+            record.average_response_time = summary['average_response_time']
+            record.time_efficiency = summary['final_accuracy'] / duration if duration else None
+            record.error_patterns = session['error_patterns']
+            record.struggle_indicators = session['struggle_indicators']
+            record.session_status = 'completed'
+            record.completion_reason = 'natural'
+            record.generated_recommendations = recommendations
+            
+            log = consolidate_session_timeline(db.session, record)
+            if log:
+                log.hint_count = summary['hint_requests']
+            
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to save learning session {session.get('session_id')}: {e}")
+
     def _generate_performance_insights(self, session: Dict) -> Dict:
         """
         Generate insights from the completed session.
@@ -514,8 +675,8 @@ class RealTimePerformanceMonitor:
         if session['hint_requests'] > session['interaction_count'] * 0.5:
             insights.append("You requested many hints - consider reviewing the basics.")
         
-        if session['struggle_indicators']:
-            insights.append(f"Identified {len(session['struggle_indicators'])} areas needing focused practice.")
+        if session['struggle_indicator_count']:
+            insights.append(f"Identified {session['struggle_indicator_count']} areas needing focused practice.")
         
         return {
             'performance_level': 'excellent' if accuracy >= 0.8 else ('good' if accuracy >= 0.6 else 'needs_improvement'),
@@ -0,0 +1,258 @@
+from flask import current_app
+from sqlalchemy import select, event
+from app.models import db, Badge, Achievement, Chapter, ChapterDependency, LearningPath, DailyChallenge
+from app.models.reference_data import ReferenceDataVersion, REFERENCE_TABLES
+from app.cache_generations import cache_generations, mark_changed
+from datetime import date, datetime
+from typing import NamedTuple, Optional, Tuple
+import math
+import threading
+import time
+
+REFERENCE_DATA_CACHE = 'reference_data'
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes: snapshot JSON values are shared by every request."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Reference data snapshots are read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """Deep-freeze a JSON column value: dicts become FrozenDicts and lists tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class BadgeInfo(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    icon_url: Optional[str]
+    category: Optional[str]
+    requirement_type: Optional[str]
+    requirement_value: Optional[int]
+    points_reward: Optional[int]
+    rarity: Optional[str]
+
+
+class AchievementInfo(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    achievement_type: Optional[str]
+    target_value: Optional[int]
+    points_reward: Optional[int]
+    is_active: bool
+
+
+class ChapterInfo(NamedTuple):
+    id: int
+    title: str
+    description: Optional[str]
+    chapter_number: int
+    difficulty_level: Optional[str]
+    topic: str
+    subtopics: object
+    estimated_duration_minutes: Optional[int]
+    required_score_to_pass: Optional[float]
+    is_active: bool
+
+
+class ChapterDependencyInfo(NamedTuple):
+    chapter_id: int
+    prerequisite_chapter_id: int
+    is_strict: bool
+
+
+class ChapterGraph(NamedTuple):
+    edges: Tuple[ChapterDependencyInfo, ...]
+    strict_prerequisites: FrozenDict  # chapter_id -> tuple of chapter ids that must be completed first
+
+
+class LearningPathInfo(NamedTuple):
+    id: int
+    title: str
+    description: Optional[str]
+    category: Optional[str]
+    difficulty_level: Optional[str]
+    estimated_duration_hours: Optional[int]
+    prerequisites: object
+    learning_objectives: object
+    is_active: bool
+    created_at: Optional[datetime]
+
+
+class DailyChallengeInfo(NamedTuple):
+    id: int
+    challenge_date: date
+    challenge_type: str
+    challenge_content: object
+    difficulty_level: Optional[str]
+    estimated_time_minutes: Optional[int]
+
+
+class Page(NamedTuple):
+    """One page of a snapshot, with the attributes of a Flask-SQLAlchemy pagination."""
+    items: tuple
+    page: int
+    per_page: int
+    total: int
+    pages: int
+    has_next: bool
+    has_prev: bool
+
+
+def paginate(rows, page, per_page):
+    """Slice rows like query.paginate(error_out=False)."""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    total = len(rows)
+    pages = math.ceil(total / per_page) if total else 0
+    return Page(tuple(rows[(page - 1) * per_page:page * per_page]), page, per_page, total, pages,
+                page < pages, page > 1)
+
+
+def _rows(snapshot_type, model, order_by, *criteria):
+    columns = [getattr(model, field) for field in snapshot_type._fields]
+    return tuple(
+        snapshot_type(*(freeze(value) for value in row))
+        for row in db.session.execute(select(*columns).where(*criteria).order_by(*order_by)).all()
+    )
+
+
+def _load_chapter_graph():
+    edges = _rows(ChapterDependencyInfo, ChapterDependency, [ChapterDependency.id])
+    strict = {}
+    for edge in edges:
+        if edge.is_strict:
+            strict.setdefault(edge.chapter_id, []).append(edge.prerequisite_chapter_id)
+    return ChapterGraph(edges, FrozenDict((chapter_id, tuple(ids)) for chapter_id, ids in strict.items()))
+
+
+def _load_daily_challenge(day):
+    challenges = _rows(DailyChallengeInfo, DailyChallenge, [DailyChallenge.id], DailyChallenge.challenge_date == day)
+    return challenges[0] if challenges else None
+
+
+class ReferenceDataCache:
+    """
+    Process-local, immutable snapshots of the reference tables (badges,
+    achievements, chapters and their dependencies, learning paths, today's
+    daily challenge). A snapshot is reused while its table's version in
+    reference_data_versions is unchanged. Versions are re-read at most every
+    REFERENCE_DATA_CHECK_SECONDS, and straight away after this process or a
+    sibling pre-forked worker commits a change to any of the tables.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}  # table -> (version, key, value)
+        self._versions = None
+        self._checked_at = 0.0
+        self._generation = None
+
+    def _versions_current(self):
+        return self._versions is not None and \
+            self._generation == cache_generations.current(REFERENCE_DATA_CACHE) and \
+            time.monotonic() - self._checked_at < current_app.config.get('REFERENCE_DATA_CHECK_SECONDS', 30)
+
+    def _refresh_versions(self):
+        """Re-read every table version if they're due. Caller holds _lock."""
+        if not self._versions_current():
+            self._generation = cache_generations.current(REFERENCE_DATA_CACHE)
+            self._versions = dict(db.session.execute(
+                select(ReferenceDataVersion.table_name, ReferenceDataVersion.version)
+            ).all())
+            self._checked_at = time.monotonic()
+        return self._versions
+
+    def versions(self, *tables):
+        """Current versions of the given tables, as cheap to call as reading a snapshot."""
+        versions = self._versions
+        if not self._versions_current():
+            with self._lock:
+                versions = self._refresh_versions()
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def _snapshot(self, table, load, key=None):
+        snapshot = self._snapshots.get(table)
+        if snapshot is not None and snapshot[1] == key and self._versions_current() and \
+                snapshot[0] == self._versions.get(table, 0):
+            return snapshot[2]
+
+        with self._lock:
+            version = self._refresh_versions().get(table, 0)
+            snapshot = self._snapshots.get(table)
+            if snapshot is None or snapshot[0] != version or snapshot[1] != key:
+                snapshot = self._snapshots[table] = (version, key, load())
+            return snapshot[2]
+
+    def badges(self):
+        return self._snapshot(Badge.__tablename__, lambda: _rows(BadgeInfo, Badge, [Badge.id]))
+
+    def achievements(self):
+        return self._snapshot(Achievement.__tablename__, lambda: _rows(AchievementInfo, Achievement, [Achievement.id]))
+
+    def active_achievements(self):
+        return tuple(achievement for achievement in self.achievements() if achievement.is_active)
+
+    def chapters(self):
+        """Every chapter, in chapter_number order (content excluded)."""
+        return self._snapshot(Chapter.__tablename__, lambda: _rows(
+            ChapterInfo, Chapter, [Chapter.chapter_number, Chapter.id]
+        ))
+
+    def active_chapters(self, difficulty=None):
+        return tuple(
+            chapter for chapter in self.chapters()
+            if chapter.is_active and (not difficulty or chapter.difficulty_level == difficulty)
+        )
+
+    def chapter_graph(self):
+        return self._snapshot(ChapterDependency.__tablename__, _load_chapter_graph)
+
+    def learning_paths(self):
+        return self._snapshot(LearningPath.__tablename__, lambda: _rows(
+            LearningPathInfo, LearningPath, [LearningPath.id]
+        ))
+
+    def daily_challenge(self, day=None):
+        """The challenge for a day (default today), or None if it hasn't been created."""
+        day = day or date.today()
+        return self._snapshot(DailyChallenge.__tablename__, lambda: _load_daily_challenge(day), key=day)
+
+    def warm(self):
+        self.badges()
+        self.achievements()
+        self.chapters()
+        self.chapter_graph()
+        self.learning_paths()
+        self.daily_challenge()
+
+    def clear(self):
+        with self._lock:
+            self._snapshots = {}
+            self._versions = None
+
+
+reference_data = ReferenceDataCache()
+
+
+def _reference_data_changed(mapper, connection, target):
+    mark_changed(REFERENCE_DATA_CACHE)
+
+
+for _model in REFERENCE_TABLES:
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _reference_data_changed)
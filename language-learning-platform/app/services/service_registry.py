@@ -0,0 +1,52 @@
+import threading
+
+_lock = threading.RLock()
+_instances = {}
+
+
+def get_service(service_class):
+    """The process-wide instance of a service class, constructed on first call."""
+    instance = _instances.get(service_class)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(service_class)
+            if instance is None:
+                instance = _instances[service_class] = service_class()
+    return instance
+
+
+class LazyProxy:
+    """
+    Stands in for an object that is only built when first used: attribute
+    access and assignment go to factory(), which must return the same object
+    on every call.
+    """
+
+    __slots__ = ('_factory',)
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._factory(), name, value)
+
+    def __repr__(self):
+        return f'<LazyProxy for {self._factory!r}>'
+
+
+def lazy_service(service_class):
+    """
+    Module-level handle on a service's process-wide instance. Importing a
+    route module or constructing another service no longer builds the
+    service (and its Gemini models); the first call on it does.
+    """
+    return LazyProxy(lambda: get_service(service_class))
+
+
+def reset_services():
+    """Forget every constructed service, e.g. after changing configuration in a script."""
+    with _lock:
+        _instances.clear()
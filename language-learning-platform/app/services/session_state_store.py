@@ -0,0 +1,202 @@
+from flask import current_app
+from collections import OrderedDict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # optional: only needed for redis:// session backends
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+def append_bounded(items, item, limit):
+    """Append to a list kept as a ring buffer of the newest `limit` entries."""
+    items.append(item)
+    del items[:-limit]
+
+
+class MemorySessionBackend:
+    """
+    Per-process sessions, evicted after SESSION_STATE_TTL_SECONDS idle or
+    least recently used beyond SESSION_STATE_MAX_SESSIONS. Only correct with a
+    single worker process.
+    """
+
+    def __init__(self, ttl, max_sessions):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, json)
+
+    def read(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return json.loads(entry[1]) if entry and entry[0] > time.monotonic() else None
+
+    def update(self, key, mutate):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.pop(key, None)
+            state = json.loads(entry[1]) if entry and entry[0] > now else None
+            state, result = mutate(state)
+            if state is not None:
+                self._entries[key] = (now + self.ttl, json.dumps(state))
+            while self._entries and (len(self._entries) > self.max_sessions or
+                                     next(iter(self._entries.values()))[0] <= now):
+                self._entries.popitem(last=False)
+            return result
+
+
+class SQLiteSessionBackend:
+    """
+    Sessions in a local SQLite file, shared by every worker on the host.
+    Updates run in BEGIN IMMEDIATE transactions, so concurrent requests for
+    one user are serialized instead of losing writes.
+    """
+
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._purged_at = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS session_state "
+                "(key TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def read(self, key):
+        row = self._connection().execute(
+            "SELECT state FROM session_state WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, key, mutate):
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                "SELECT state FROM session_state WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            state, result = mutate(json.loads(row[0]) if row else None)
+            if state is None:
+                connection.execute("DELETE FROM session_state WHERE key = ?", (key,))
+            else:
+                connection.execute(
+                    "INSERT OR REPLACE INTO session_state (key, state, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(state), now + self.ttl)
+                )
+            if now - self._purged_at > self.PURGE_INTERVAL_SECONDS:
+                connection.execute("DELETE FROM session_state WHERE expires_at <= ?", (now,))
+                self._purged_at = now
+            connection.execute('COMMIT')
+            return result
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+
+class RedisSessionBackend:
+    """
+    Sessions in Redis (or any server speaking its protocol), shared across
+    hosts. Keys expire after SESSION_STATE_TTL_SECONDS idle; updates use
+    WATCH/MULTI and retry on conflicting writes.
+    """
+
+    def __init__(self, url, ttl):
+        if redis is None:
+            raise RuntimeError("SESSION_STATE_BACKEND uses Redis but the redis package is not installed")
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    def read(self, key):
+        raw = self._client.get(f'session_state:{key}')
+        return json.loads(raw) if raw else None
+
+    def update(self, key, mutate):
+        key = f'session_state:{key}'
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    state, result = mutate(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    if state is None:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(key, json.dumps(state), ex=int(self.ttl))
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    continue
+
+
+class SessionStateStore:
+    """
+    JSON session state keyed by string, on the backend named by
+    SESSION_STATE_BACKEND: 'memory' (default), 'sqlite:///path/to/file.db'
+    or 'redis://host:port/db'. The backend is created on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backend = None
+
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._create_backend(current_app.config)
+        return self._backend
+
+    @staticmethod
+    def _create_backend(config):
+        spec = config.get('SESSION_STATE_BACKEND') or 'memory'
+        ttl = config.get('SESSION_STATE_TTL_SECONDS', 7200)
+        if spec == 'memory':
+            return MemorySessionBackend(ttl, config.get('SESSION_STATE_MAX_SESSIONS', 10000))
+        if spec.startswith('sqlite:///'):
+            return SQLiteSessionBackend(spec[len('sqlite:///'):], ttl)
+        if spec.startswith(('redis://', 'rediss://', 'unix://')):
+            return RedisSessionBackend(spec, ttl)
+        raise ValueError(f"Unsupported SESSION_STATE_BACKEND: {spec}")
+
+    def update(self, key, mutate):
+        """
+        Atomically read-modify-write one session. mutate(state or None)
+        returns (new state or None to delete, result); it may be retried.
+        """
+        return self.backend().update(str(key), mutate)
+
+    def get(self, key):
+        """Current state without refreshing its idle timeout."""
+        return self.backend().read(str(key))
+
+    def put(self, key, state):
+        self.update(key, lambda _: (state, None))
+
+    def pop(self, key):
+        return self.update(key, lambda state: (None, state))
+
+
+session_states = SessionStateStore()
@@ -0,0 +1,177 @@
+from app.models import db, User, LearningStreak
+from sqlalchemy import or_, and_
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAILY = 'daily'
+ACTIVITY_SPECIFIC = 'activity_specific'
+SKILL_SPECIFIC = 'skill_specific'
+
+# Matches the User.timezone column default
+DEFAULT_TIMEZONE = 'Asia/Kolkata'
+
+
+@lru_cache(maxsize=256)
+def _zone(name):
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {name!r}, using UTC for streaks")
+        return timezone.utc
+
+
+def local_date(timezone_name, moment=None):
+    """Calendar date in the given timezone at moment (naive UTC, default now)."""
+    moment = moment or datetime.utcnow()
+    return moment.replace(tzinfo=timezone.utc).astimezone(_zone(timezone_name)).date()
+
+
+def effective_streak(current_streak, last_activity_date, today):
+    """A stored streak only counts while its last activity was today or yesterday."""
+    if not last_activity_date or (today - last_activity_date).days > 1:
+        return 0
+    return current_streak or 0
+
+
+def _advance(streak, day):
+    """
+    Apply one local day of activity to a streak holder (Profile or LearningStreak).
+    Returns False if the day was already counted.
+    """
+    last = streak.last_activity_date
+    if last is not None and day <= last:
+        return False
+
+    if last is not None and (day - last).days == 1:
+        streak.current_streak = (streak.current_streak or 0) + 1
+    else:
+        streak.current_streak = 1
+        if hasattr(streak, 'streak_start_date'):
+            streak.streak_start_date = day
+    streak.longest_streak = max(streak.longest_streak or 0, streak.current_streak)
+    streak.last_activity_date = day
+    return True
+
+
+def _streak_keys(activity_type, skill_area):
+    """(streak_type, activity_type, skill_area) keys touched by one activity."""
+    keys = [(DAILY, None, None)]
+    if activity_type:
+        keys.append((ACTIVITY_SPECIFIC, activity_type, None))
+    if skill_area:
+        keys.append((SKILL_SPECIFIC, None, skill_area))
+    return keys
+
+
+class StreakService:
+    """
+    The single source of streak state. Each completed activity advances the
+    user's daily streak (mirrored on Profile) and their activity-type and
+    skill-area streaks in learning_streaks, touching at most three rows.
+    Days are counted in the user's own timezone (User.timezone), and reads
+    treat a streak whose last activity is older than yesterday as broken, so
+    no endpoint needs to re-derive streaks from activity history.
+    """
+
+    @staticmethod
+    def today_for(user):
+        return local_date(user.timezone if user else None)
+
+    @staticmethod
+    def record_activity(user_id, activity_type=None, skill_area=None, occurred_at=None):
+        """
+        Count an activity towards the user's streaks. Part of the caller's
+        transaction; the caller commits. Returns True if the daily streak grew.
+        """
+        user = db.session.get(User, user_id)
+        if not user:
+            return False
+        day = local_date(user.timezone, occurred_at)
+
+        keys = _streak_keys(activity_type, skill_area)
+        existing = {
+            (streak.streak_type, streak.activity_type, streak.skill_area): streak
+            for streak in LearningStreak.query.filter(
+                LearningStreak.user_id == user_id,
+                or_(*[
+                    and_(
+                        LearningStreak.streak_type == streak_type,
+                        LearningStreak.activity_type == key_activity if key_activity else LearningStreak.activity_type.is_(None),
+                        LearningStreak.skill_area == key_skill if key_skill else LearningStreak.skill_area.is_(None)
+                    )
+                    for streak_type, key_activity, key_skill in keys
+                ])
+            )
+        }
+
+        now = datetime.utcnow()
+        for key in keys:
+            streak = existing.get(key)
+            if streak is None:
+                streak_type, key_activity, key_skill = key
+                streak = LearningStreak(
+                    user_id=user_id,
+                    streak_type=streak_type,
+                    activity_type=key_activity,
+                    skill_area=key_skill,
+                    current_streak=0,
+                    longest_streak=0
+                )
+                db.session.add(streak)
+            if _advance(streak, day):
+                streak.is_active = True
+                streak.updated_at = now
+
+        profile = user.profile
+        return _advance(profile, day) if profile else False
+
+    @staticmethod
+    def refresh(user_id):
+        """
+        Zero out streaks that have lapsed in the user's timezone so stored
+        values match what readers see. Part of the caller's transaction.
+        Returns False if the user has no profile.
+        """
+        user = db.session.get(User, user_id)
+        if not user or not user.profile:
+            return False
+        today = StreakService.today_for(user)
+
+        profile = user.profile
+        if profile.current_streak and not effective_streak(profile.current_streak, profile.last_activity_date, today):
+            profile.current_streak = 0
+
+        for streak in LearningStreak.query.filter_by(user_id=user_id, is_active=True):
+            if not effective_streak(streak.current_streak, streak.last_activity_date, today):
+                streak.current_streak = 0
+                streak.is_active = False
+        return True
+
+    @staticmethod
+    def get_daily_streak(user, today=None):
+        """{'current_streak', 'longest_streak', 'last_activity_date'} for the user's daily streak."""
+        profile = user.profile if user else None
+        if not profile:
+            return {'current_streak': 0, 'longest_streak': 0, 'last_activity_date': None}
+        today = today or StreakService.today_for(user)
+        return {
+            'current_streak': effective_streak(profile.current_streak, profile.last_activity_date, today),
+            'longest_streak': profile.longest_streak or 0,
+            'last_activity_date': profile.last_activity_date
+        }
+
+    @staticmethod
+    def get_active_streaks(user_id):
+        """The user's LearningStreak rows that are still unbroken today."""
+        user = db.session.get(User, user_id)
+        if not user:
+            return []
+        today = StreakService.today_for(user)
+        return [
+            streak for streak in LearningStreak.query.filter_by(user_id=user_id, is_active=True)
+            if effective_streak(streak.current_streak, streak.last_activity_date, today)
+        ]
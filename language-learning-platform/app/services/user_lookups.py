@@ -0,0 +1,43 @@
+from flask import g
+from sqlalchemy.orm import joinedload
+from app.models import db, User, UserGoal
+
+
+class UserLookups:
+    """
+    A user (with profile) and their active goal, loaded once per request and
+    shared with the threads working on that request, e.g. the composite
+    dashboard's sections. bind() merges copies into the calling thread's
+    session without querying, so User.query.get(user_id) and user.profile
+    are answered from its identity map, and active_goal() from the shared
+    goal.
+    """
+
+    def __init__(self, user_id, user, goal):
+        self.user_id = user_id
+        self.user = user
+        self._goal = goal
+
+    @classmethod
+    def load(cls, user_id):
+        user = db.session.get(User, user_id, options=[joinedload(User.profile)])
+        goal = UserGoal.query.filter_by(user_id=user_id, is_active=True).first() if user else None
+        return cls(user_id, user, goal)
+
+    def bind(self):
+        """Make these lookups the current thread's, for the rest of its app context."""
+        g.user_lookups = self
+        if self.user is not None:
+            # Held here, as the session's identity map only keeps weak references
+            g.bound_user = db.session.merge(self.user, load=False)
+
+    def goal(self):
+        return db.session.merge(self._goal, load=False) if self._goal is not None else None
+
+
+def active_goal(user_id):
+    """The user's active goal, from the bound lookups when there are any."""
+    lookups = g.get('user_lookups')
+    if lookups is not None and lookups.user_id == user_id:
+        return lookups.goal()
+    return UserGoal.query.filter_by(user_id=user_id, is_active=True).first()
@@ -0,0 +1,123 @@
+from app.models import db, VocabularyWord
+from app.models.personalization import VOCABULARY_SEARCH_DDL, normalize_search_text
+from sqlalchemy import or_, case, func, text, update
+from sqlalchemy.orm import load_only
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sorts after every real code point, closing the half-open prefix range.
+_PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class VocabularySearchService:
+    """
+    Bilingual (English/Telugu) search over a learner's vocabulary list using
+    normalized search keys. Substring search is backed by pg_trgm indexes on
+    PostgreSQL; prefix (type-ahead) search by per-user B-tree indexes.
+    """
+
+    @staticmethod
+    def _dialect():
+        return db.engine.dialect.name
+
+    @staticmethod
+    def _prefix_filter(column, prefix):
+        if VocabularySearchService._dialect() == 'postgresql':
+            # Served by the text_pattern_ops indexes
+            return column.like(f'{_escape_like(prefix)}%', escape='\\')
+        # Binary-collated B-tree range scan (SQLite default collation)
+        return column.between(prefix, prefix + _PREFIX_UPPER_BOUND)
+
+    @staticmethod
+    def search_filter(term):
+        """
+        Build a filter clause matching the term anywhere in the English word,
+        the Telugu translation or the context sentence. Returns None for blank terms.
+        """
+        key = normalize_search_text(term)
+        if not key:
+            return None
+        pattern = f'%{_escape_like(key)}%'
+        return or_(
+            VocabularyWord.english_search_key.like(pattern, escape='\\'),
+            VocabularyWord.telugu_search_key.like(pattern, escape='\\'),
+            VocabularyWord.context_sentence.ilike(f'%{_escape_like(term.strip())}%', escape='\\')
+        )
+
+    @staticmethod
+    def relevance_order(term):
+        """Order exact matches first, then prefix matches, then substring matches."""
+        key = normalize_search_text(term)
+        prefix = f'{_escape_like(key)}%'
+        return case(
+            (or_(VocabularyWord.english_search_key == key,
+                 VocabularyWord.telugu_search_key == key), 0),
+            (or_(VocabularyWord.english_search_key.like(prefix, escape='\\'),
+                 VocabularyWord.telugu_search_key.like(prefix, escape='\\')), 1),
+            else_=2
+        )
+
+    @staticmethod
+    def suggest(user_id, prefix, limit=10):
+        """
+        Type-ahead over a user's word list. Matches the normalized prefix against
+        English and Telugu keys using index range scans only.
+        """
+        key = normalize_search_text(prefix)
+        if not key:
+            return []
+
+        columns = load_only(
+            VocabularyWord.id, VocabularyWord.english_word, VocabularyWord.telugu_translation,
+            VocabularyWord.mastery_level, VocabularyWord.english_search_key
+        )
+        suggestions = {}
+        for column, matched_on in ((VocabularyWord.english_search_key, 'english'),
+                                   (VocabularyWord.telugu_search_key, 'telugu')):
+            words = VocabularyWord.query.options(columns).filter(
+                VocabularyWord.user_id == user_id,
+                VocabularySearchService._prefix_filter(column, key)
+            ).order_by(func.length(column), column).limit(limit).all()
+
+            for word in words:
+                suggestions.setdefault(word.id, {
+                    'id': word.id,
+                    'english_word': word.english_word,
+                    'telugu_translation': word.telugu_translation,
+                    'mastery_level': word.mastery_level,
+                    'matched_on': matched_on
+                })
+
+        return list(suggestions.values())[:limit]
+
+    @staticmethod
+    def rebuild_keys():
+        """Recompute normalized search keys for all words (e.g. after changing normalization rules)."""
+        try:
+            rows = db.session.query(
+                VocabularyWord.id, VocabularyWord.english_word, VocabularyWord.telugu_translation
+            ).all()
+            if rows:
+                db.session.execute(update(VocabularyWord), [
+                    {
+                        'id': word_id,
+                        'english_search_key': normalize_search_text(english_word)[:100],
+                        'telugu_search_key': normalize_search_text(telugu_translation)[:200]
+                    }
+                    for word_id, english_word, telugu_translation in rows
+                ])
+
+            for statement in VOCABULARY_SEARCH_DDL.get(VocabularySearchService._dialect(), []):
+                db.session.execute(text(statement))
+
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to rebuild vocabulary search keys: {e}")
+            return False
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare Flask's stdlib JSON provider with app.json_provider.FastJSONProvider
+on a Telugu-heavy activity listing: serialization time per response and
+body size, e.g.
+    python benchmark_json.py --activities 200 --runs 50
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import FastJSONProvider, orjson
+
+TELUGU = 'నేను ప్రతిరోజు ఇంగ్లీష్ నేర్చుకుంటున్నాను, మీరు ఎలా ఉన్నారు? '
+
+
+def sample_payload(activities):
+    started = datetime(2025, 1, 1)
+    return {
+        'message': 'Activities retrieved successfully!',
+        'telugu_message': 'కార్యకలాపాలు విజయవంతంగా తీసుకోబడ్డాయి!',
+        'activities': [{
+            'id': i,
+            'title': f'Activity {i}',
+            'activity_type': 'conversation',
+            'content': {
+                'instructions': TELUGU * 3,
+                'questions': [{
+                    'question': f'Translate sentence {q}',
+                    'telugu_text': TELUGU,
+                    'options': [TELUGU[:20 + k] for k in range(4)],
+                    'correct_answer': 0,
+                    'explanation': TELUGU * 2
+                } for q in range(5)],
+                'messages': [{'role': 'assistant', 'text': TELUGU, 'sent_at': started + timedelta(minutes=m)}
+                             for m in range(4)]
+            },
+            'created_at': started + timedelta(days=i),
+            'score': 87.5
+        } for i in range(activities)]
+    }
+
+
+def measure(provider, payload, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = provider.response(payload).get_data()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--activities', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payload = sample_payload(args.activities)
+    if orjson is None:
+        print('orjson is not installed; FastJSONProvider falls back to the stdlib encoder')
+
+    with app.app_context():
+        results = {
+            'stdlib': measure(DefaultJSONProvider(app), payload, args.runs),
+            'fast': measure(FastJSONProvider(app), payload, args.runs)
+        }
+
+    for name, (seconds, size) in results.items():
+        print(f"{name:>7}: {seconds * 1000:8.2f} ms  {size / 1024:8.1f} KiB")
+    (stdlib_seconds, stdlib_size), (fast_seconds, fast_size) = results['stdlib'], results['fast']
+    print(f"speedup {stdlib_seconds / fast_seconds:.1f}x, body {100 * (1 - fast_size / stdlib_size):.0f}% smaller")
+
+
+if __name__ == '__main__':
+    main()
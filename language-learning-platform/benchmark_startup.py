@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start time: importing the app package, create_app() and the
+first request, each in a fresh interpreter, plus which heavy SDKs were
+loaded by then (they should only be imported when first used), e.g.
+    python benchmark_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['google.generativeai', 'PIL', 'mem0', 'numpy', 'alembic']
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app(sys.argv[1])
+created = time.perf_counter()
+flask_app.test_client().get('/health')
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'loaded': [name for name in sys.argv[2:] if name in sys.modules]
+}))
+"""
+
+def run_probe(config_name):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, config_name, *HEAVY_MODULES],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark_startup(runs, config_name):
+    """Print median and best timings over the given number of cold starts."""
+    samples = [run_probe(config_name) for _ in range(runs)]
+    for phase in ('import', 'create_app', 'first_request'):
+        timings = [sample[phase] for sample in samples]
+        print(f"{phase:>14}: median {statistics.median(timings) * 1000:7.1f} ms, best {min(timings) * 1000:7.1f} ms")
+    totals = [sample['import'] + sample['create_app'] + sample['first_request'] for sample in samples]
+    print(f"{'total':>14}: median {statistics.median(totals) * 1000:7.1f} ms over {runs} runs")
+    print(f"Loaded at startup: {', '.join(samples[-1]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'testing'))
+    args = parser.parse_args()
+    benchmark_startup(args.runs, args.config)
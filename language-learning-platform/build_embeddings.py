@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Re-embed activity and chapter text into the content-similarity indexes under
+EMBEDDING_INDEX_DIR. Processes rebuild on their own when rows are added or
+removed; run this after bulk imports or edits to existing activity text, e.g.
+    python build_embeddings.py
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.embedding_index import content_embeddings
+
+def build_embeddings():
+    """Rebuild every embedding index and print its size."""
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    with app.app_context():
+        for kind, rows in content_embeddings.rebuild().items():
+            print(f"{kind}: embedded {rows} rows")
+
+if __name__ == '__main__':
+    build_embeddings()
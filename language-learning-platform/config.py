@@ -30,6 +30,126 @@ class Config:
     # Pagination
     POSTS_PER_PAGE = 10
     ACTIVITIES_PER_PAGE = 20
+    
+    # Read replica routing for @read_only endpoints (see app/db_routing.py)
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL_SECONDS', 10))
+    
+    # Connection pool telemetry (see app/db_pool.py)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    DB_POOL_SLOW_CHECKOUT_SECONDS = float(os.environ.get('DB_POOL_SLOW_CHECKOUT_SECONDS', 0.5))
+    DB_PGBOUNCER_TRANSACTION_MODE = False
+    DB_POOL_METRICS_ENABLED = os.environ.get('DB_POOL_METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Monthly partitioning of history tables on PostgreSQL (see app/db_partitioning.py)
+    PARTITION_PRECREATE_MONTHS = int(os.environ.get('PARTITION_PRECREATE_MONTHS', 3))
+    PARTITION_RETENTION_MONTHS = int(os.environ.get('PARTITION_RETENTION_MONTHS', 12))
+    PARTITION_ARCHIVE_DIR = os.environ.get('PARTITION_ARCHIVE_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'archive')
+    
+    # Leaderboards (see app/services/leaderboard_service.py)
+    LEADERBOARD_SYNC_INTERVAL_SECONDS = float(os.environ.get('LEADERBOARD_SYNC_INTERVAL_SECONDS', 5))
+    LEADERBOARD_DAILY_RETENTION_DAYS = int(os.environ.get('LEADERBOARD_DAILY_RETENTION_DAYS', 14))
+    LEADERBOARD_WEEKLY_RETENTION_WEEKS = int(os.environ.get('LEADERBOARD_WEEKLY_RETENTION_WEEKS', 12))
+    
+    # Badge rule index refresh for changes made by other processes (see app/services/achievement_service.py)
+    ACHIEVEMENT_RULES_TTL_SECONDS = float(os.environ.get('ACHIEVEMENT_RULES_TTL_SECONDS', 300))
+    
+    # Cached adaptive performance profiles (see app/services/performance_profile_cache.py)
+    PERFORMANCE_PROFILE_TTL_SECONDS = float(os.environ.get('PERFORMANCE_PROFILE_TTL_SECONDS', 300))
+    PERFORMANCE_PROFILE_CACHE_SIZE = int(os.environ.get('PERFORMANCE_PROFILE_CACHE_SIZE', 10000))
+    
+    # Array-backed activity catalog for recommendation scoring (see app/services/activity_catalog.py)
+    ACTIVITY_CATALOG_TTL_SECONDS = float(os.environ.get('ACTIVITY_CATALOG_TTL_SECONDS', 300))
+    
+    # Content-similarity embedding indexes (see app/services/embedding_index.py)
+    EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'hashing')
+    EMBEDDING_DIMENSIONS = int(os.environ.get('EMBEDDING_DIMENSIONS', 256))
+    EMBEDDING_INDEX_DIR = os.environ.get('EMBEDDING_INDEX_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'embeddings')
+    EMBEDDING_INDEX_CHECK_SECONDS = float(os.environ.get('EMBEDDING_INDEX_CHECK_SECONDS', 300))
+    EMBEDDING_HNSW_THRESHOLD = int(os.environ.get('EMBEDDING_HNSW_THRESHOLD', 10000))
+    
+    # Real-time learning session state (see app/services/session_state_store.py)
+    SESSION_STATE_BACKEND = os.environ.get('SESSION_STATE_BACKEND', 'memory')
+    SESSION_STATE_TTL_SECONDS = float(os.environ.get('SESSION_STATE_TTL_SECONDS', 7200))
+    SESSION_STATE_MAX_SESSIONS = int(os.environ.get('SESSION_STATE_MAX_SESSIONS', 10000))
+    SESSION_HISTORY_LENGTH = int(os.environ.get('SESSION_HISTORY_LENGTH', 50))
+    
+    # Write-behind buffer for session interactions (see app/services/interaction_buffer.py)
+    INTERACTION_BUFFER_FLUSH_SECONDS = float(os.environ.get('INTERACTION_BUFFER_FLUSH_SECONDS', 2))
+    INTERACTION_BUFFER_MAX_EVENTS = int(os.environ.get('INTERACTION_BUFFER_MAX_EVENTS', 500))
+    INTERACTION_SPILL_DIR = os.environ.get('INTERACTION_SPILL_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'spill')
+    
+    # Versioned reference data snapshots (see app/services/reference_data.py)
+    REFERENCE_DATA_CHECK_SECONDS = float(os.environ.get('REFERENCE_DATA_CHECK_SECONDS', 30))
+    
+    # Conditional GET and response bodies (see app/http_cache.py)
+    RESPONSE_CACHE_MAX_AGE_SECONDS = int(os.environ.get('RESPONSE_CACHE_MAX_AGE_SECONDS', 60))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RELEASE_ID = os.environ.get('RELEASE_ID', '')
+    
+    # Response compression (see app/compression.py)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+    COMPRESSION_STREAM_BYTES = int(os.environ.get('COMPRESSION_STREAM_BYTES', 1024 * 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+    
+    # Composite dashboard (see app/api/dashboard_routes.py)
+    DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.environ.get('DASHBOARD_SECTION_TIMEOUT_SECONDS', 5))
+    DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', 8))
+    DASHBOARD_MAX_PARALLEL_SECTIONS = int(os.environ.get('DASHBOARD_MAX_PARALLEL_SECTIONS', 3))
+    
+    # Live session channels (see app/api/adaptive_learning_routes.py)
+    LIVE_SESSION_IDLE_SECONDS = float(os.environ.get('LIVE_SESSION_IDLE_SECONDS', 600))
+    LIVE_EVENTS_POLL_SECONDS = float(os.environ.get('LIVE_EVENTS_POLL_SECONDS', 0.5))
+    LIVE_EVENTS_MAX_STREAM_SECONDS = float(os.environ.get('LIVE_EVENTS_MAX_STREAM_SECONDS', 300))
+    LIVE_EVENTS_TICKET_SECONDS = int(os.environ.get('LIVE_EVENTS_TICKET_SECONDS', 60))
+
+def _env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _uses_transaction_pooler(database_uri):
+    """PgBouncer/Supavisor in transaction mode (Supabase serves it on port 6543)."""
+    return _env_flag('DB_PGBOUNCER_TRANSACTION_MODE', default=bool(database_uri and ':6543' in database_uri))
+
+def _engine_options(database_uri, pool_size, max_overflow, pool_timeout, pool_recycle, statement_timeout_ms):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a pooled PostgreSQL connection. Each setting
+    can be overridden through the matching DB_* environment variable.
+    """
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', pool_timeout)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', pool_recycle)),
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', default=True),
+    }
+    
+    # Transaction-mode poolers reject startup parameters; the timeout is then
+    # applied per transaction with SET LOCAL instead (see app/db_pool.py).
+    if statement_timeout_ms and not _uses_transaction_pooler(database_uri):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout_ms)}'}
+    
+    return options
+
+def _replica_binds():
+    """SQLALCHEMY_BINDS entry for the read replica, if one is configured."""
+    replica_uri = os.environ.get('DATABASE_REPLICA_URL')
+    if not replica_uri:
+        return {}
+    if replica_uri.startswith('postgres://'):
+        replica_uri = replica_uri.replace('postgres://', 'postgresql://', 1)
+    return {'replica': replica_uri}
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -41,6 +161,17 @@ class DevelopmentConfig(Config):
     # Ensure postgres:// URLs are converted to postgresql://
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
+    
+    SQLALCHEMY_BINDS = _replica_binds()
+    DB_PGBOUNCER_TRANSACTION_MODE = _uses_transaction_pooler(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=5,
+        max_overflow=5,
+        pool_timeout=10,
+        pool_recycle=1800,
+        statement_timeout_ms=Config.DB_STATEMENT_TIMEOUT_MS
+    )
 
 class TestingConfig(Config):
     TESTING = True
@@ -53,6 +184,23 @@ class ProductionConfig(Config):
     
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
+    
+    SQLALCHEMY_BINDS = _replica_binds()
+    DB_PGBOUNCER_TRANSACTION_MODE = _uses_transaction_pooler(SQLALCHEMY_DATABASE_URI)
+    # Pool internals stay off the public surface unless explicitly enabled
+    DB_POOL_METRICS_ENABLED = _env_flag('DB_POOL_METRICS_ENABLED')
+    # Served by several pre-forked workers (see gunicorn.conf.py), so session state is shared between them
+    SESSION_STATE_BACKEND = os.environ.get('SESSION_STATE_BACKEND') or \
+        'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'sessions.db')
+    # Supabase's pooler closes idle server connections; recycle well before that
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=5,
+        pool_recycle=300,
+        statement_timeout_ms=Config.DB_STATEMENT_TIMEOUT_MS
+    )
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,27 @@
+"""
+Pre-fork serving: the master imports the app, loads the reference caches
+and freezes them (see app/prefork.py), then forks workers that share those
+pages copy-on-write instead of each loading its own copy, e.g.
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Threads keep live session WebSockets and event streams from tying up a whole worker
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+
+def when_ready(server):
+    from app.prefork import prepare_fork
+    prepare_fork(server.app.wsgi(), server.cfg.workers)
+
+
+def post_fork(server, worker):
+    from app.prefork import after_fork
+    after_fork(server.app.wsgi())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Daily partition maintenance for the activity history tables (PostgreSQL only).
+Creates upcoming monthly partitions and archives cold ones. Run from cron, e.g.
+    15 3 * * * cd /path/to/language-learning-platform && python maintain_partitions.py
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.partition_maintenance_service import PartitionMaintenanceService
+
+def maintain_partitions():
+    """Run partition maintenance and print what changed."""
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    with app.app_context():
+        summary = PartitionMaintenanceService.run()
+        if not summary:
+            print("Nothing to do: partitioning is only used on PostgreSQL.")
+            return
+
+        for table, result in summary.items():
+            print(f"{table}:")
+            if result['converted']:
+                print("  converted to monthly partitions")
+            for name in result['created']:
+                print(f"  created {name}")
+            for path in result['archived']:
+                print(f"  archived to {path}")
+
+if __name__ == '__main__':
+    maintain_partitions()
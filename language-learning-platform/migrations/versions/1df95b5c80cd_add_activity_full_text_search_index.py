@@ -0,0 +1,57 @@
+"""Add activity full-text search index
+
+Revision ID: 1df95b5c80cd
+Revises: 76dfc0989a3b
+Create Date: 2026-10-19 09:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.activity import ACTIVITY_SEARCH_DDL, extract_search_text
+
+
+# revision identifiers, used by Alembic.
+revision = '1df95b5c80cd'
+down_revision = '76dfc0989a3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Backfill extracted content text for existing activities
+    bind = op.get_bind()
+    activities = sa.table('activities',
+        sa.column('id', sa.Integer()),
+        sa.column('content', sa.JSON()),
+        sa.column('search_text', sa.Text())
+    )
+    for activity_id, content in bind.execute(sa.select(activities.c.id, activities.c.content)).fetchall():
+        bind.execute(
+            activities.update().where(activities.c.id == activity_id).values(
+                search_text=extract_search_text(content)
+            )
+        )
+
+    for statement in ACTIVITY_SEARCH_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+
+    if bind.dialect.name == 'sqlite':
+        op.execute("INSERT INTO activities_fts(activities_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_activities_search_vector")
+        op.execute("ALTER TABLE activities DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('activities_fts_ai', 'activities_fts_ad', 'activities_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS activities_fts")
+
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
@@ -0,0 +1,42 @@
+"""Add leaderboard ledgers for all-time, weekly and daily windows
+
+Revision ID: 3f6b9d2e8c47
+Revises: e4a1c8d0b5f2
+Create Date: 2026-10-19 15:40:08.917263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b9d2e8c47'
+down_revision = 'e4a1c8d0b5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_ledgers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=20), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'period', 'period_start', name='unique_user_leaderboard_window')
+    )
+    op.create_index('ix_leaderboard_ledgers_window_updated', 'leaderboard_ledgers', ['period', 'period_start', 'updated_at'])
+
+    # Seed the all-time window from profile points; weekly and daily windows start empty
+    op.execute(
+        "INSERT INTO leaderboard_ledgers (user_id, period, period_start, points, updated_at) "
+        "SELECT user_id, 'all_time', '1970-01-01', points, CURRENT_TIMESTAMP FROM profiles WHERE points > 0"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_leaderboard_ledgers_window_updated', table_name='leaderboard_ledgers')
+    op.drop_table('leaderboard_ledgers')
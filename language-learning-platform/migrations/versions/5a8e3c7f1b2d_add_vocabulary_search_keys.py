@@ -0,0 +1,61 @@
+"""Add normalized vocabulary search keys and indexes
+
+Revision ID: 5a8e3c7f1b2d
+Revises: 1df95b5c80cd
+Create Date: 2026-10-19 10:03:17.228415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.personalization import VOCABULARY_SEARCH_DDL, normalize_search_text
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8e3c7f1b2d'
+down_revision = '1df95b5c80cd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('vocabulary_words', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('english_search_key', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('telugu_search_key', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_vocabulary_words_user_english_key', ['user_id', 'english_search_key'], unique=False)
+        batch_op.create_index('ix_vocabulary_words_user_telugu_key', ['user_id', 'telugu_search_key'], unique=False)
+
+    # Backfill normalized keys for existing words
+    bind = op.get_bind()
+    words = sa.table('vocabulary_words',
+        sa.column('id', sa.Integer()),
+        sa.column('english_word', sa.String()),
+        sa.column('telugu_translation', sa.String()),
+        sa.column('english_search_key', sa.String()),
+        sa.column('telugu_search_key', sa.String())
+    )
+    rows = bind.execute(sa.select(words.c.id, words.c.english_word, words.c.telugu_translation)).fetchall()
+    for word_id, english_word, telugu_translation in rows:
+        bind.execute(
+            words.update().where(words.c.id == word_id).values(
+                english_search_key=normalize_search_text(english_word)[:100],
+                telugu_search_key=normalize_search_text(telugu_translation)[:200]
+            )
+        )
+
+    for statement in VOCABULARY_SEARCH_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for index in ('ix_vocabulary_words_english_key_trgm', 'ix_vocabulary_words_telugu_key_trgm',
+                      'ix_vocabulary_words_user_english_key_pattern', 'ix_vocabulary_words_user_telugu_key_pattern'):
+            op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    with op.batch_alter_table('vocabulary_words', schema=None) as batch_op:
+        batch_op.drop_index('ix_vocabulary_words_user_telugu_key')
+        batch_op.drop_index('ix_vocabulary_words_user_english_key')
+        batch_op.drop_column('telugu_search_key')
+        batch_op.drop_column('english_search_key')
@@ -0,0 +1,51 @@
+"""Add incrementally maintained user achievement counters
+
+Revision ID: 8d5e1f7a3b96
+Revises: 3f6b9d2e8c47
+Create Date: 2026-10-19 16:52:30.114207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d5e1f7a3b96'
+down_revision = '3f6b9d2e8c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_achievement_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('counter', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'counter', name='unique_user_achievement_counter')
+    )
+
+    # Seed counters from existing activity history
+    op.execute(
+        "INSERT INTO user_achievement_counters (user_id, counter, value, updated_at) "
+        "SELECT user_id, 'activities_completed', count(*), CURRENT_TIMESTAMP "
+        "FROM user_activity_logs GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO user_achievement_counters (user_id, counter, value, updated_at) "
+        "SELECT user_id, 'perfect_scores', count(*), CURRENT_TIMESTAMP "
+        "FROM user_activity_logs WHERE max_score > 0 AND score = max_score GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO user_achievement_counters (user_id, counter, value, updated_at) "
+        "SELECT l.user_id, a.activity_type || '_completed', count(*), CURRENT_TIMESTAMP "
+        "FROM user_activity_logs l JOIN activities a ON a.id = l.activity_id "
+        "GROUP BY l.user_id, a.activity_type"
+    )
+
+
+def downgrade():
+    op.drop_table('user_achievement_counters')
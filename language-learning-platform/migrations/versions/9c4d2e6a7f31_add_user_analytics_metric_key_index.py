@@ -0,0 +1,69 @@
+"""Add unique metric key index to user_analytics for upserts
+
+Revision ID: 9c4d2e6a7f31
+Revises: 5a8e3c7f1b2d
+Create Date: 2026-10-19 11:26:05.913842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d2e6a7f31'
+down_revision = '5a8e3c7f1b2d'
+branch_labels = None
+depends_on = None
+
+
+_METRIC_KEY = "user_id, metric_type, date_recorded, coalesce(activity_type, ''), coalesce(skill_area, '')"
+_SAME_KEY = """
+    d.user_id = user_analytics.user_id
+    AND d.metric_type = user_analytics.metric_type
+    AND d.date_recorded = user_analytics.date_recorded
+    AND coalesce(d.activity_type, '') = coalesce(user_analytics.activity_type, '')
+    AND coalesce(d.skill_area, '') = coalesce(user_analytics.skill_area, '')
+"""
+
+
+def _merge_duplicate_metrics():
+    """
+    Fold rows sharing a metric key into the group's lowest id, the way the
+    upsert merges them: values averaged weighted by session_count, counts
+    summed. The old select-then-insert could race into duplicates, and rows
+    with NULL activity_type/skill_area were never unique.
+    """
+    op.execute(f"""
+        UPDATE user_analytics SET
+            metric_value = (
+                SELECT SUM(d.metric_value * coalesce(d.session_count, 1)) / SUM(coalesce(d.session_count, 1))
+                FROM user_analytics d WHERE {_SAME_KEY}
+            ),
+            session_count = (
+                SELECT SUM(coalesce(d.session_count, 1)) FROM user_analytics d WHERE {_SAME_KEY}
+            )
+        WHERE id IN (
+            SELECT MIN(id) FROM user_analytics GROUP BY {_METRIC_KEY} HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute(f"""
+        DELETE FROM user_analytics
+        WHERE id NOT IN (SELECT MIN(id) FROM user_analytics GROUP BY {_METRIC_KEY})
+    """)
+
+
+def upgrade():
+    _merge_duplicate_metrics()
+    op.create_index(
+        'ux_user_analytics_metric_key',
+        'user_analytics',
+        [
+            'user_id', 'metric_type', 'date_recorded',
+            sa.text("coalesce(activity_type, '')"), sa.text("coalesce(skill_area, '')")
+        ],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('ux_user_analytics_metric_key', table_name='user_analytics')
@@ -0,0 +1,73 @@
+"""Partition activity history tables by month and add monthly rollups
+
+Revision ID: b7e2f49c1a08
+Revises: 9c4d2e6a7f31
+Create Date: 2026-10-19 13:02:17.448120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db_partitioning import PARTITIONED_TABLES, convert_to_partitioned, convert_to_unpartitioned
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2f49c1a08'
+down_revision = '9c4d2e6a7f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_activity_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_table', sa.String(length=50), nullable=False),
+    sa.Column('period_month', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=True),
+    sa.Column('score_sum', sa.Float(), nullable=True),
+    sa.Column('max_score_sum', sa.Float(), nullable=True),
+    sa.Column('correct_count', sa.Integer(), nullable=True),
+    sa.Column('time_spent_minutes', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_table', 'user_id', 'period_month', 'category', name='unique_monthly_activity_rollup')
+    )
+    op.create_index('ix_monthly_activity_rollups_user_month', 'monthly_activity_rollups', ['user_id', 'period_month'])
+
+    # Partition key of the referenced log, for the composite foreign key (see PARTITIONED_REFERENCES)
+    op.add_column('activity_question_responses', sa.Column('activity_log_completed_at', sa.DateTime(), nullable=True))
+
+    # Range partitioning is PostgreSQL-only; other engines keep plain tables
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.execute(
+            "UPDATE activity_question_responses SET activity_log_completed_at = "
+            "(SELECT completed_at FROM user_activity_logs WHERE user_activity_logs.id = activity_log_id)"
+        )
+    else:
+        op.execute("SET LOCAL statement_timeout = 0")
+        for table in PARTITIONED_TABLES:
+            convert_to_partitioned(bind, table)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("SET LOCAL statement_timeout = 0")
+        op.execute("ALTER TABLE activity_question_responses DROP CONSTRAINT IF EXISTS "
+                   "activity_question_responses_activity_log_id_fkey")
+        for table in reversed(list(PARTITIONED_TABLES)):
+            convert_to_unpartitioned(bind, table)
+        # Archived partitions may have removed referenced logs, so don't validate existing rows
+        op.execute(
+            "ALTER TABLE activity_question_responses ADD CONSTRAINT activity_question_responses_activity_log_id_fkey "
+            "FOREIGN KEY (activity_log_id) REFERENCES user_activity_logs (id) NOT VALID"
+        )
+    with op.batch_alter_table('activity_question_responses', schema=None) as batch_op:
+        batch_op.drop_column('activity_log_completed_at')
+
+    op.drop_index('ix_monthly_activity_rollups_user_month', table_name='monthly_activity_rollups')
+    op.drop_table('monthly_activity_rollups')
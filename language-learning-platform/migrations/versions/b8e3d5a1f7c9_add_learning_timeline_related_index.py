@@ -0,0 +1,28 @@
+"""Index learning timeline events by related record
+
+Revision ID: b8e3d5a1f7c9
+Revises: d1f6a2b8c9e4
+Create Date: 2026-10-19 21:05:12.604519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e3d5a1f7c9'
+down_revision = 'd1f6a2b8c9e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Session interactions are written behind and gathered per session when it ends
+    op.create_index(
+        'ix_user_learning_timeline_related_type_related_id', 'user_learning_timeline',
+        ['related_type', 'related_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_learning_timeline_related_type_related_id', table_name='user_learning_timeline')
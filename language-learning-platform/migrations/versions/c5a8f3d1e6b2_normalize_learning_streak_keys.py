@@ -0,0 +1,55 @@
+"""Normalize learning streak keys to one row per daily, activity and skill streak
+
+Revision ID: c5a8f3d1e6b2
+Revises: 8d5e1f7a3b96
+Create Date: 2026-10-19 18:05:12.640391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8f3d1e6b2'
+down_revision = '8d5e1f7a3b96'
+branch_labels = None
+depends_on = None
+
+# Daily streaks were keyed by (activity_type, skill_area) and activity/skill
+# streaks by both columns; StreakService keys them by the relevant column only
+_STREAK_GROUP = (
+    "user_id, streak_type, "
+    "CASE WHEN streak_type = 'activity_specific' THEN activity_type END, "
+    "CASE WHEN streak_type = 'skill_specific' THEN skill_area END"
+)
+_NORMALIZED_TYPES = "('daily', 'activity_specific', 'skill_specific')"
+
+
+def upgrade():
+    # Carry each group's best longest_streak onto every row before collapsing it
+    op.execute(
+        "UPDATE learning_streaks SET longest_streak = ("
+        "SELECT max(other.longest_streak) FROM learning_streaks other "
+        "WHERE other.user_id = learning_streaks.user_id "
+        "AND other.streak_type = learning_streaks.streak_type "
+        "AND (learning_streaks.streak_type <> 'activity_specific' OR other.activity_type = learning_streaks.activity_type) "
+        "AND (learning_streaks.streak_type <> 'skill_specific' OR other.skill_area = learning_streaks.skill_area)"
+        f") WHERE streak_type IN {_NORMALIZED_TYPES}"
+    )
+
+    # Keep the most recently active row of each group
+    op.execute(
+        "DELETE FROM learning_streaks WHERE streak_type IN " + _NORMALIZED_TYPES + " AND id NOT IN ("
+        "SELECT id FROM (SELECT id, row_number() OVER ("
+        f"PARTITION BY {_STREAK_GROUP} "
+        "ORDER BY CASE WHEN last_activity_date IS NULL THEN 1 ELSE 0 END, last_activity_date DESC, id DESC"
+        ") AS position FROM learning_streaks) ranked WHERE position = 1)"
+    )
+
+    op.execute("UPDATE learning_streaks SET activity_type = NULL WHERE streak_type IN ('daily', 'skill_specific')")
+    op.execute("UPDATE learning_streaks SET skill_area = NULL WHERE streak_type IN ('daily', 'activity_specific')")
+
+
+def downgrade():
+    # The collapsed rows can't be restored; the normalized keys remain valid
+    pass
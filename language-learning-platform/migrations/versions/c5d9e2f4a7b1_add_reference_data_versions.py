@@ -0,0 +1,31 @@
+"""Add reference data version stamps
+
+Revision ID: c5d9e2f4a7b1
+Revises: b8e3d5a1f7c9
+Create Date: 2026-10-19 22:40:31.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d9e2f4a7b1'
+down_revision = 'b8e3d5a1f7c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per cached reference table, bumped by ORM writes to it
+    op.create_table(
+        'reference_data_versions',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('reference_data_versions')
@@ -0,0 +1,33 @@
+"""Add indexes for recommendation candidate anti-joins
+
+Revision ID: d1f6a2b8c9e4
+Revises: c5a8f3d1e6b2
+Create Date: 2026-10-19 19:40:27.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f6a2b8c9e4'
+down_revision = 'c5a8f3d1e6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Probed by Activity.not_completed_by; on PostgreSQL the partitioned parent
+    # cascades it to every partition (maintain_partitions.py may have created it already)
+    op.create_index(
+        'ix_user_activity_logs_user_id_activity_id', 'user_activity_logs',
+        ['user_id', 'activity_id'], if_not_exists=True
+    )
+    op.create_index('ix_activities_learning_path_id_order_in_path', 'activities', ['learning_path_id', 'order_in_path'])
+    op.create_index('ix_activities_difficulty_level_skill_area', 'activities', ['difficulty_level', 'skill_area'])
+
+
+def downgrade():
+    op.drop_index('ix_activities_difficulty_level_skill_area', table_name='activities')
+    op.drop_index('ix_activities_learning_path_id_order_in_path', table_name='activities')
+    op.drop_index('ix_user_activity_logs_user_id_activity_id', table_name='user_activity_logs')
@@ -0,0 +1,42 @@
+"""Add precomputed content_preview to activities
+
+Revision ID: e4a1c8d0b5f2
+Revises: b7e2f49c1a08
+Create Date: 2026-10-19 14:21:53.208411
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.activity import build_content_preview
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a1c8d0b5f2'
+down_revision = 'b7e2f49c1a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_preview', sa.String(length=255), nullable=True))
+
+    # Backfill previews for existing activities
+    bind = op.get_bind()
+    activities = sa.table('activities',
+        sa.column('id', sa.Integer()),
+        sa.column('content', sa.JSON()),
+        sa.column('content_preview', sa.String())
+    )
+    for activity_id, content in bind.execute(sa.select(activities.c.id, activities.c.content)).fetchall():
+        bind.execute(
+            activities.update().where(activities.c.id == activity_id).values(
+                content_preview=build_content_preview(content)
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.drop_column('content_preview')
@@ -0,0 +1,29 @@
+"""Add updated_at to user_chapter_progress
+
+Revision ID: f2a7c4e9d1b3
+Revises: c5d9e2f4a7b1
+Create Date: 2026-10-19 23:52:07.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c4e9d1b3'
+down_revision = 'c5d9e2f4a7b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_chapter_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Existing rows were last written when they were last accessed
+    op.execute('UPDATE user_chapter_progress SET updated_at = last_accessed')
+
+
+def downgrade():
+    with op.batch_alter_table('user_chapter_progress', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
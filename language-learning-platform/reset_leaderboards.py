@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Daily leaderboard window maintenance. Weekly and daily boards switch to a new
+window on their own at UTC midnight; this prunes ledgers of expired windows.
+Run from cron shortly after midnight UTC, e.g.
+    5 0 * * * cd /path/to/language-learning-platform && python reset_leaderboards.py
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.leaderboard_service import LeaderboardService
+
+def reset_leaderboards():
+    """Prune expired daily and weekly leaderboard windows."""
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    with app.app_context():
+        deleted = LeaderboardService.prune_expired_windows()
+        for period, count in deleted.items():
+            print(f"{period}: removed {count} expired ledger rows")
+
+if __name__ == '__main__':
+    reset_leaderboards()
@@ -0,0 +1,75 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from config import TestingConfig
+from app.models import db, User
+from app.http_cache import response_store
+from app.services import real_time_performance_monitor
+from app.services.interaction_buffer import InteractionBuffer
+from app.services.achievement_service import achievement_rules
+from app.services.activity_catalog import activity_catalog
+from app.services.leaderboard_service import leaderboard_cache
+from app.services.reference_data import reference_data
+from app.services.session_state_store import session_states
+
+
+def _clear_process_caches():
+    # Process-local caches outlive an app; each test starts from its own database
+    reference_data.clear()
+    response_store.clear()
+    activity_catalog.invalidate()
+    achievement_rules.invalidate()
+    leaderboard_cache.clear()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A file, not :memory:, so threads working on a request (e.g. dashboard sections) share it
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    _clear_process_caches()
+    # Live sessions too: the store's backend is built from the first app's config
+    monkeypatch.setattr(session_states, '_backend', None)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    _clear_process_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='ravi', email='ravi@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def spill_dir(app, tmp_path):
+    app.config.update(INTERACTION_SPILL_DIR=str(tmp_path / 'spill'), INTERACTION_BUFFER_FLUSH_SECONDS=60,
+                      INTERACTION_BUFFER_MAX_EVENTS=500)
+    return tmp_path / 'spill'
+
+
+@pytest.fixture
+def buffer(spill_dir, monkeypatch):
+    """A fresh interaction buffer for the session monitor, bound to this test's app."""
+    buffer = InteractionBuffer()
+    monkeypatch.setattr(real_time_performance_monitor, 'interaction_buffer', buffer)
+    yield buffer
+    # Let the background thread go instead of flushing into the next test's database
+    buffer._pid = None
+    buffer._wakeup.set()
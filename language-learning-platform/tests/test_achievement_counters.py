@@ -0,0 +1,125 @@
+import pytest
+from app.models import db, Activity, Badge, LearningPath, Profile, UserActivityLog, UserAchievementCounter, UserBadge
+from app.models import gamification
+from app.services.achievement_service import ACTIVITY_COMPLETED
+from app.services.gamification_service import GamificationService
+
+
+@pytest.fixture(params=['on_conflict', 'update_then_insert'])
+def upsert(request, monkeypatch):
+    if request.param == 'update_then_insert':
+        monkeypatch.setattr(gamification, '_UPSERT_INSERTS', {})
+    return request.param
+
+
+@pytest.fixture
+def activities(user):
+    db.session.add(Profile(user_id=user.id, points=0))
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activities = {
+        activity_type: Activity(learning_path_id=path.id, activity_type=activity_type, title=activity_type,
+                                content={}, order_in_path=position)
+        for position, activity_type in enumerate(('quiz', 'flashcard'), 1)
+    }
+    db.session.add_all(activities.values())
+    db.session.commit()
+    return activities
+
+
+def _log(user, activity, score, max_score=5, attempt_number=1):
+    log = UserActivityLog(user_id=user.id, activity_id=activity.id, score=score, max_score=max_score,
+                          attempt_number=attempt_number)
+    db.session.add(log)
+    db.session.commit()
+    return log
+
+
+def _counters(user):
+    return {
+        counter: value for counter, value in db.session.query(
+            UserAchievementCounter.counter, UserAchievementCounter.value
+        ).filter_by(user_id=user.id) if value
+    }
+
+
+def _recount(user):
+    """The statistics the full-history check used to compute on every call."""
+    logs = UserActivityLog.query.filter_by(user_id=user.id)
+    stats = {
+        'activities_completed': logs.count(),
+        'perfect_scores': logs.filter(UserActivityLog.score == UserActivityLog.max_score,
+                                      UserActivityLog.max_score > 0).count(),
+    }
+    for activity_type in ('quiz', 'flashcard'):
+        stats[f'{activity_type}_completed'] = logs.join(Activity).filter(Activity.activity_type == activity_type).count()
+    return {counter: value for counter, value in stats.items() if value}
+
+
+def test_counters_match_a_full_recount(user, activities, upsert):
+    quiz, flashcard = activities['quiz'], activities['flashcard']
+    first = _log(user, quiz, 3)
+    assert _counters(user) == _recount(user) == {'activities_completed': 1, 'quiz_completed': 1}
+
+    # A retry is another log, and a perfect one
+    _log(user, quiz, 5, attempt_number=2)
+    perfect = _log(user, flashcard, 4, max_score=4)
+    assert _counters(user) == _recount(user) == {
+        'activities_completed': 3, 'quiz_completed': 2, 'flashcard_completed': 1, 'perfect_scores': 2
+    }
+
+    # Regrading moves a log in and out of perfect_scores
+    first.score = 5
+    perfect.max_score = 5
+    db.session.commit()
+    assert _counters(user) == _recount(user)
+    assert _counters(user)['perfect_scores'] == 2
+
+    db.session.delete(first)
+    db.session.delete(perfect)
+    db.session.commit()
+    assert _counters(user) == _recount(user) == {
+        'activities_completed': 1, 'quiz_completed': 1, 'perfect_scores': 1
+    }
+
+
+def test_zero_max_score_is_never_perfect(user, activities):
+    _log(user, activities['quiz'], 0, max_score=0)
+    assert 'perfect_scores' not in _counters(user)
+    assert _counters(user) == _recount(user)
+
+
+def test_rolled_back_logs_are_not_counted(user, activities):
+    db.session.add(UserActivityLog(user_id=user.id, activity_id=activities['quiz'].id, score=5, max_score=5))
+    db.session.flush()
+    db.session.rollback()
+    assert _counters(user) == {}
+
+
+def test_badges_follow_the_counters(user, activities, upsert):
+    db.session.add_all([
+        Badge(name='Three done', requirement_type='activities_completed', requirement_value=3, points_reward=0),
+        Badge(name='Quiz whiz', requirement_type='quiz_completed', requirement_value=2, points_reward=0),
+        Badge(name='Flawless', requirement_type='perfect_scores', requirement_value=2, points_reward=0),
+    ])
+    db.session.commit()
+    gamification_service = GamificationService()
+
+    def check():
+        return [badge['name'] for badge in gamification_service.check_for_new_achievements(user.id, [ACTIVITY_COMPLETED])]
+
+    quiz, flashcard = activities['quiz'], activities['flashcard']
+    retry = _log(user, quiz, 5)
+    _log(user, quiz, 5, attempt_number=2)
+    assert check() == ['Quiz whiz', 'Flawless']
+
+    # Deleted logs stop counting, so the third completion overall is still needed
+    db.session.delete(retry)
+    db.session.commit()
+    _log(user, flashcard, 1)
+    assert check() == []
+    _log(user, flashcard, 2)
+    assert check() == ['Three done']
+    assert check() == []
+    assert UserBadge.query.filter_by(user_id=user.id).count() == 3
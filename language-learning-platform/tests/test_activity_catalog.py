@@ -0,0 +1,87 @@
+import numpy as np
+from app.models import db, Activity, LearningPath
+from app.services.activity_catalog import (
+    ActivityCatalog, activity_catalog, DIFFICULTY_MATCH_POINTS, PREFERRED_DIFFICULTY_POINTS,
+    WEAK_TYPE_POINTS, PREFERRED_TYPE_POINTS, KNOWLEDGE_GAP_POINTS, TIME_FIT_POINTS, VARIETY_POINTS
+)
+
+# (id, learning_path_id, order_in_path, activity_type, difficulty_level, duration, skill_area)
+ROWS = [
+    (1, 1, 2, 'quiz', 'beginner', 10, 'vocabulary'),
+    (2, 1, 1, 'flashcard', 'intermediate', 45, 'vocabulary'),
+    (3, 2, 1, 'reading', 'advanced', 20, 'reading'),
+    (4, 2, 2, 'quiz', 'intermediate', 15, 'grammar'),
+]
+
+
+def _ranking(catalog, scores, mask, **kwargs):
+    return [int(catalog.ids[index]) for batch in catalog.ranked(scores, mask, **kwargs) for index in batch]
+
+
+def test_score_adds_up_each_factor():
+    catalog = ActivityCatalog(ROWS)
+    performance = {'activity_type_performance': {'quiz': 0.4, 'flashcard': 0.9}}
+    knowledge_gaps = [{'type': 'difficulty_level', 'area': 'advanced'}]
+    preferences = {'preferred_difficulty': 'intermediate', 'preferred_activity_types': ['flashcard'],
+                   'time_availability': 30}
+
+    scores = catalog.score(performance, knowledge_gaps, 'beginner', preferences)
+
+    assert scores.tolist() == [
+        DIFFICULTY_MATCH_POINTS + WEAK_TYPE_POINTS + TIME_FIT_POINTS,
+        PREFERRED_DIFFICULTY_POINTS + PREFERRED_TYPE_POINTS,
+        # No history with a type counts as 0.5 accuracy, so it is weak as well as new
+        WEAK_TYPE_POINTS + VARIETY_POINTS + KNOWLEDGE_GAP_POINTS + TIME_FIT_POINTS,
+        PREFERRED_DIFFICULTY_POINTS + WEAK_TYPE_POINTS + TIME_FIT_POINTS,
+    ]
+
+
+def test_empty_catalog():
+    catalog = ActivityCatalog([])
+    assert len(catalog) == 0
+    scores = catalog.score({}, [], 'beginner', {})
+    assert _ranking(catalog, scores, catalog.candidates()) == []
+
+
+def test_candidates_filter_by_path_and_skill_area():
+    catalog = ActivityCatalog(ROWS)
+    assert catalog.candidates(learning_path_id=2).tolist() == [False, False, True, True]
+    assert catalog.candidates(skill_area='vocabulary').tolist() == [True, True, False, False]
+    assert not catalog.candidates(skill_area='speaking').any()
+
+
+def test_ranked_breaks_ties_by_id_or_path_order():
+    catalog = ActivityCatalog(ROWS)
+    scores = np.array([50, 50, 70, 50])
+    mask = catalog.candidates()
+
+    assert _ranking(catalog, scores, mask) == [3, 1, 2, 4]
+    # Within path 1, activity 2 comes first
+    assert _ranking(catalog, scores, mask, by_path_order=True) == [3, 2, 1, 4]
+
+
+def test_ranked_yields_every_candidate_once_in_growing_batches():
+    rows = [(i, 1, i, 'quiz', 'beginner', 10, 'grammar') for i in range(1, 101)]
+    catalog = ActivityCatalog(rows)
+    scores = np.arange(100) % 7
+
+    batches = list(catalog.ranked(scores, catalog.candidates()))
+    ranking = [int(catalog.ids[index]) for batch in batches for index in batch]
+
+    assert [len(batch) for batch in batches] == [16, 64, 20]
+    assert ranking == sorted(range(1, 101), key=lambda activity_id: (-scores[activity_id - 1], activity_id))
+
+
+def test_index_rebuilds_after_an_activity_changes(app):
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    db.session.add(Activity(learning_path_id=path.id, activity_type='quiz', title='One', content={},
+                            order_in_path=1))
+    db.session.commit()
+    assert activity_catalog.get().ids.tolist() == [1]
+
+    db.session.add(Activity(learning_path_id=path.id, activity_type='reading', title='Two', content={},
+                            order_in_path=2))
+    db.session.commit()
+    assert activity_catalog.get().ids.tolist() == [1, 2]
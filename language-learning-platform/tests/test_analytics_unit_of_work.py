@@ -0,0 +1,143 @@
+from datetime import date
+import pytest
+from app.models import (
+    db, Activity, ActivityQuestionResponse, LearningPath, LearningStreak, Profile,
+    UserActivityLog, UserAnalytics, UserLearningTimeline
+)
+from app.services import analytics_service
+from app.services.analytics_service import AnalyticsService, AnalyticsUnitOfWork
+
+QUESTION = {'text': 'How do you say "thank you"?', 'type': 'multiple_choice', 'correct_answer': 'ధన్యవాదాలు',
+            'skill_area': 'vocabulary'}
+
+
+@pytest.fixture
+def activity_log(user):
+    db.session.add(Profile(user_id=user.id))
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activity = Activity(learning_path_id=path.id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1)
+    db.session.add(activity)
+    db.session.flush()
+    log = UserActivityLog(user_id=user.id, activity_id=activity.id, learning_path_id=path.id, score=1, max_score=2)
+    db.session.add(log)
+    db.session.commit()
+    return log
+
+
+@pytest.fixture(params=['on_conflict', 'select_then_update'])
+def upsert(request, monkeypatch):
+    if request.param == 'select_then_update':
+        monkeypatch.setattr(analytics_service, '_UPSERT_INSERTS', {})
+    return request.param
+
+
+def _metric(user, metric_type='accuracy'):
+    return UserAnalytics.query.filter_by(user_id=user.id, metric_type=metric_type, skill_area='vocabulary').one()
+
+
+def test_metrics_merge_as_weighted_averages(user, upsert):
+    with AnalyticsUnitOfWork() as uow:
+        for value in (1.0, 1.0, 0.0):
+            uow.add_metric(user.id, 'accuracy', value, date.today(), skill_area='vocabulary')
+    metric = _metric(user)
+    assert metric.metric_value == pytest.approx(2 / 3)
+    assert metric.session_count == 3
+
+    with AnalyticsUnitOfWork() as uow:
+        uow.add_metric(user.id, 'accuracy', 0.0, date.today(), skill_area='vocabulary')
+    db.session.expire_all()
+    metric = _metric(user)
+    assert metric.metric_value == pytest.approx(2 / 4)
+    assert metric.session_count == 4
+
+
+def test_metrics_with_null_keys_merge_into_one_row(user, upsert):
+    for value in (0.5, 1.0):
+        with AnalyticsUnitOfWork() as uow:
+            uow.add_metric(user.id, 'consistency', value, date.today())
+    metric = UserAnalytics.query.filter_by(user_id=user.id, metric_type='consistency').one()
+    assert metric.activity_type is None and metric.skill_area is None
+    assert metric.metric_value == pytest.approx(0.75)
+
+
+def test_on_conflict_and_fallback_agree(user, monkeypatch):
+    observations = [(1.0, 'vocabulary'), (0.0, 'vocabulary'), (1.0, 'grammar')]
+
+    def record():
+        for batch in (observations, observations[:1]):
+            with AnalyticsUnitOfWork() as uow:
+                for value, skill_area in batch:
+                    uow.add_metric(user.id, 'accuracy', value, date.today(), skill_area=skill_area)
+        db.session.expire_all()
+        rows = UserAnalytics.query.filter_by(user_id=user.id).order_by(UserAnalytics.skill_area)
+        return [(row.skill_area, round(row.metric_value, 9), row.session_count) for row in rows]
+
+    upserted = record()
+    UserAnalytics.query.delete()
+    db.session.commit()
+    monkeypatch.setattr(analytics_service, '_UPSERT_INSERTS', {})
+    assert record() == upserted == [('grammar', 1.0, 1), ('vocabulary', round(2 / 3, 9), 3)]
+
+
+def test_one_commit_covers_every_write(user, activity_log, monkeypatch):
+    commits = []
+    real_commit = db.session.commit
+    monkeypatch.setattr(db.session, 'commit', lambda: (commits.append(1), real_commit())[1])
+
+    with AnalyticsUnitOfWork() as uow:
+        for index, answer in enumerate(['ధన్యవాదాలు', 'నమస్కారం']):
+            uow.record_activity_question_response(
+                activity_log.id, user.id, activity_log.activity_id, index, QUESTION, answer,
+                is_correct=index == 0, time_spent=30
+            )
+        uow.record_learning_event(user.id, 'activity_completed', related_id=activity_log.activity_id,
+                                  related_type='activity', points_earned=10)
+        uow.update_learning_streaks(user.id, 'quiz', 'vocabulary')
+
+    assert commits == [1]
+    responses = ActivityQuestionResponse.query.order_by(ActivityQuestionResponse.question_index).all()
+    assert [response.is_correct for response in responses] == [True, False]
+    assert responses[0].activity_log_completed_at == activity_log.completed_at
+    assert UserLearningTimeline.query.filter_by(user_id=user.id, event_type='activity_completed').count() == 1
+    assert _metric(user).metric_value == pytest.approx(0.5)
+    assert _metric(user, 'speed').metric_value == pytest.approx(2.0)
+    assert sorted(streak.streak_type for streak in LearningStreak.query.filter_by(user_id=user.id)) == \
+        ['activity_specific', 'daily', 'skill_specific']
+    assert user.profile.current_streak == 1
+
+
+def test_failed_commit_leaves_no_partial_rows(user, activity_log):
+    uow = AnalyticsUnitOfWork()
+    uow.record_learning_event(user.id, 'activity_completed')
+    uow.update_learning_streaks(user.id, 'quiz')
+    uow.record_activity_question_response(activity_log.id, user.id, activity_log.activity_id, 0, QUESTION,
+                                          'ధన్యవాదాలు', is_correct=True)
+    # The second response points at a log that does not exist, failing the flush
+    uow.record_activity_question_response(activity_log.id + 1, user.id, activity_log.activity_id, 1, QUESTION,
+                                          'ధన్యవాదాలు', is_correct=True)
+
+    assert uow.commit() is False
+    assert ActivityQuestionResponse.query.count() == 0
+    assert UserLearningTimeline.query.count() == 0
+    assert UserAnalytics.query.count() == 0
+    assert LearningStreak.query.count() == 0
+
+
+def test_exception_inside_the_block_rolls_back(user):
+    with pytest.raises(RuntimeError):
+        with AnalyticsUnitOfWork() as uow:
+            uow.record_learning_event(user.id, 'activity_completed')
+            uow.flush()
+            raise RuntimeError('grading failed')
+    assert UserLearningTimeline.query.count() == 0
+
+
+def test_single_write_helpers_return_none_on_failure(user, activity_log):
+    assert AnalyticsService.record_activity_question_response(
+        activity_log.id + 1, user.id, activity_log.activity_id, 0, QUESTION, 'x', is_correct=False
+    ) is None
+    assert AnalyticsService.record_learning_event(user.id, 'activity_completed')['event_type'] == 'activity_completed'
+    assert UserLearningTimeline.query.count() == 1
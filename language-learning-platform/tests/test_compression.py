@@ -0,0 +1,96 @@
+import gzip
+import pytest
+from flask import Response, jsonify
+from app.models import db, Badge
+
+BADGES_URL = '/api/gamification/badges/available'
+
+
+@pytest.fixture
+def badges(app):
+    db.session.add_all(Badge(name=f'Badge {i}', description='మొదటి పాఠం పూర్తి చేశారు ' * 5) for i in range(30))
+    db.session.commit()
+
+
+@pytest.fixture
+def routes(app):
+    @app.route('/test/small')
+    def small():
+        return jsonify(ok=True)
+
+    @app.route('/test/large')
+    def large():
+        return jsonify(words=['నమస్కారం'] * 5000)
+
+    @app.route('/test/stream')
+    def stream():
+        return Response((f'line {i}\n' for i in range(2000)), mimetype='text/plain')
+
+    @app.route('/test/events')
+    def events():
+        return Response(iter(['data: {}\n\n' * 200]), mimetype='text/event-stream')
+
+
+def test_gzip_is_negotiated(client, badges):
+    identity = client.get(BADGES_URL)
+    response = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.data) == identity.data
+    assert len(response.data) < len(identity.data)
+    assert 'Accept-Encoding' in identity.vary
+    assert 'Content-Encoding' not in identity.headers
+
+
+def test_compressed_variant_has_its_own_etag(client, badges):
+    identity_etag, _ = client.get(BADGES_URL).get_etag()
+    response = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip'})
+    assert response.get_etag() == (f'{identity_etag}-gzip', False)
+
+
+def test_compressed_variant_revalidates_with_its_own_etag(client, badges):
+    etag = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    revalidated = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert 'Accept-Encoding' in revalidated.vary
+
+
+def test_refused_coding_gets_identity(client, badges):
+    response = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_small_bodies_are_not_compressed(client, routes):
+    response = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.json == {'ok': True}
+
+
+def test_large_bodies_are_compressed_as_a_stream(client, app, routes):
+    app.config['COMPRESSION_STREAM_BYTES'] = 4096
+    response = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == client.get('/test/large').data
+
+
+def test_streamed_bodies_are_compressed(client, routes):
+    response = client.get('/test/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).count(b'\n') == 2000
+
+
+def test_event_streams_are_never_compressed(client, routes):
+    response = client.get('/test/events', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data.startswith(b'data: {}')
+
+
+def test_compression_can_be_disabled(client, app, badges):
+    app.config['COMPRESSION_ENABLED'] = False
+    response = client.get(BADGES_URL, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
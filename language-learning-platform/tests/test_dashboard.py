@@ -0,0 +1,127 @@
+import threading
+import time
+import pytest
+from flask import g
+from flask_jwt_extended import create_access_token
+from app.models import db, Profile, UserGoal
+from app.api.dashboard_routes import SECTIONS, _executor_size
+
+DASHBOARD_URL = '/api/dashboard/'
+
+
+@pytest.fixture
+def learner(user):
+    db.session.add(Profile(user_id=user.id))
+    db.session.add(UserGoal(user_id=user.id, is_active=True, daily_time_goal_minutes=20))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def stub_section(monkeypatch):
+    def stub(name, load):
+        monkeypatch.setitem(SECTIONS, name, (load, False))
+    return stub
+
+
+def test_returns_only_the_requested_sections_in_order(client, learner, auth_headers):
+    response = client.get(f'{DASHBOARD_URL}?sections=statistics,badges,statistics', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert list(response.json['sections']) == ['statistics', 'badges']
+    assert response.json['errors'] == {}
+    assert response.json['partial'] is False
+
+
+def test_unknown_sections_are_rejected(client, learner, auth_headers):
+    response = client.get(f'{DASHBOARD_URL}?sections=badges,leaderboard,streaks', headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Unknown sections: leaderboard, streaks'
+    assert response.json['available_sections'] == list(SECTIONS)
+
+
+def test_unknown_user_is_not_found(client, app):
+    headers = {'Authorization': f'Bearer {create_access_token(identity="999")}'}
+    assert client.get(f'{DASHBOARD_URL}?sections=badges', headers=headers).status_code == 404
+
+
+def test_sections_share_the_request_lookups(client, learner, auth_headers, stub_section):
+    stub_section('badges', lambda user_id: {'goal_minutes': g.user_lookups.goal().daily_time_goal_minutes})
+
+    response = client.get(f'{DASHBOARD_URL}?sections=badges', headers=auth_headers)
+    assert response.json['sections'] == {'badges': {'goal_minutes': 20}}
+
+
+def test_overrunning_section_is_reported_as_timeout(client, app, learner, auth_headers, stub_section):
+    release = threading.Event()
+    stub_section('notifications', lambda user_id: release.wait(10) and {})
+    stub_section('badges', lambda user_id: ['First steps'])
+    app.config['DASHBOARD_SECTION_TIMEOUT_SECONDS'] = 0.5
+
+    started = time.monotonic()
+    try:
+        response = client.get(f'{DASHBOARD_URL}?sections=badges,notifications', headers=auth_headers)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 5
+    assert response.status_code == 200
+    assert response.json['sections'] == {'badges': ['First steps']}
+    assert response.json['errors'] == {'notifications': 'timeout'}
+    assert response.json['partial'] is True
+
+
+def test_sections_queued_past_the_deadline_time_out(client, app, learner, auth_headers, stub_section):
+    release = threading.Event()
+    for name in ('personalization', 'analytics', 'statistics'):
+        stub_section(name, lambda user_id: release.wait(10) and {})
+    stub_section('badges', lambda user_id: [])
+    app.config.update(DASHBOARD_SECTION_TIMEOUT_SECONDS=0.5, DASHBOARD_MAX_PARALLEL_SECTIONS=3)
+
+    try:
+        response = client.get(f'{DASHBOARD_URL}?sections=personalization,analytics,statistics,badges',
+                              headers=auth_headers)
+    finally:
+        release.set()
+
+    assert response.json['errors'] == {name: 'timeout' for name in
+                                       ('personalization', 'analytics', 'statistics', 'badges')}
+
+
+def test_failing_section_is_reported(client, learner, auth_headers, stub_section):
+    stub_section('notifications', lambda user_id: 1 / 0)
+
+    response = client.get(f'{DASHBOARD_URL}?sections=statistics,notifications', headers=auth_headers)
+    assert response.status_code == 200
+    assert list(response.json['sections']) == ['statistics']
+    assert response.json['errors'] == {'notifications': 'failed'}
+
+
+def test_parallel_sections_are_capped(client, app, learner, auth_headers, stub_section):
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def load(user_id):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {}
+
+    for name in SECTIONS:
+        stub_section(name, load)
+    app.config['DASHBOARD_MAX_PARALLEL_SECTIONS'] = 2
+
+    response = client.get(DASHBOARD_URL, headers=auth_headers)
+    assert list(response.json['sections']) == list(SECTIONS)
+    assert peak[0] == 2
+
+
+def test_executor_size_is_capped_by_the_database_pool():
+    assert _executor_size({'DASHBOARD_WORKERS': 8}) == 8
+    assert _executor_size({'DASHBOARD_WORKERS': 8,
+                           'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 5, 'max_overflow': 5}}) == 5
+    assert _executor_size({'DASHBOARD_WORKERS': 8, 'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 1}}) == 1
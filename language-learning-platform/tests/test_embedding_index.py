@@ -0,0 +1,181 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from app.models import db, Activity, LearningPath
+from app.services import embedding_index
+from app.services.embedding_index import (
+    ACTIVITIES, EmbeddingIndexStore, HashingEmbedder, VectorIndex, chapter_text, hnswlib
+)
+
+TEXT = 'నమస్కారం greetings and introductions'
+needs_hnswlib = pytest.mark.skipif(hnswlib is None, reason='hnswlib is not installed')
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def index():
+    # Row i points along axis i, so item i is the best match for axis i
+    return VectorIndex(np.array([10, 20, 30, 40], dtype=np.int64), np.eye(4, dtype=np.float32))
+
+
+@pytest.fixture
+def store(app, tmp_path, monkeypatch):
+    app.config.update(EMBEDDING_INDEX_DIR=str(tmp_path / 'embeddings'), EMBEDDING_INDEX_CHECK_SECONDS=300)
+    store = EmbeddingIndexStore()
+    # Commit listeners report changes to the module's store
+    monkeypatch.setattr(embedding_index, 'content_embeddings', store)
+    return store
+
+
+@pytest.fixture
+def activities(app):
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    titles = ['Greetings and introductions', 'Market vocabulary: vegetables and fruit',
+              'Past tense verbs', 'Introductions at work']
+    activities = [Activity(learning_path_id=path.id, activity_type='quiz', title=title, content={},
+                           order_in_path=position) for position, title in enumerate(titles, 1)]
+    db.session.add_all(activities)
+    db.session.commit()
+    return activities
+
+
+def test_hashing_embedder_is_stable_across_processes():
+    script = ('import sys; from app.services.embedding_index import HashingEmbedder; '
+              f'sys.stdout.write(HashingEmbedder(64).embed([{TEXT!r}])[0].tobytes().hex())')
+    vectors = []
+    for seed in ('1', '2'):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(__file__)),
+                                env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+        vectors.append(np.frombuffer(bytes.fromhex(output), dtype=np.float32))
+
+    assert np.array_equal(vectors[0], vectors[1])
+    assert np.array_equal(vectors[0], HashingEmbedder(64).embed([TEXT])[0])
+
+
+def test_hashing_embedder_makes_unit_vectors():
+    vectors = HashingEmbedder(64).embed([TEXT, ''])
+    assert vectors.shape == (2, 64)
+    assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+    assert not vectors[1].any()
+
+
+def test_hashing_embedder_relates_shared_words():
+    greeting, market, introductions = HashingEmbedder().embed(
+        ['greetings and introductions', 'vegetables at the market', 'introductions at work']
+    )
+    assert introductions @ greeting > introductions @ market
+
+
+def test_chapter_text_flattens_subtopics():
+    assert chapter_text({'basics': ['hello', {'formal': 'namaskaram'}], 'level': 1}) == 'hello namaskaram '
+
+
+def test_search_ranks_by_similarity_and_excludes(index):
+    query = _unit([[0.1, 0.9, 0.5, 0]])[0]
+    assert [item_id for item_id, _ in index.search(query, 2)] == [20, 30]
+    assert [item_id for item_id, _ in index.search(query, 2, exclude={20})] == [30, 10]
+    assert index.search(query, 0) == []
+
+
+def test_updated_replaces_adds_and_removes_rows(index):
+    updated = index.updated([20, 50], _unit([[0, 0, 0, 1], [1, 1, 0, 0]]), removed=[30])
+
+    assert updated.ids.tolist() == [10, 20, 40, 50]
+    assert index.ids.tolist() == [10, 20, 30, 40]  # a copy; readers of the old index are unaffected
+    assert np.array_equal(updated.vector(20), [0, 0, 0, 1])
+    assert updated.vector(30) is None
+    assert [item_id for item_id, _ in updated.search(np.array([0, 0, 0, 1], dtype=np.float32), 2)] in \
+        ([20, 40], [40, 20])
+    assert 30 not in [item_id for item_id, _ in updated.search(np.array([0, 0, 1, 0], dtype=np.float32), 4)]
+
+
+@needs_hnswlib
+def test_graph_search_skips_stale_rows():
+    rng = np.random.default_rng(7)
+    ids = np.arange(1, 201, dtype=np.int64)
+    vectors = _unit(rng.normal(size=(200, 16)))
+    index = VectorIndex(ids, vectors, VectorIndex.build_graph(ids, vectors))
+    query = vectors[41]
+    assert index.search(query, 1)[0][0] == 42
+
+    # Row 42 moves away and row 7 takes its place; row 99 is deleted
+    updated = index.updated([7, 42], np.stack([vectors[41], -vectors[41]]), removed=[99])
+    assert updated.graph is index.graph
+    assert updated.graph_stale == {7, 42, 99}
+    matches = [item_id for item_id, _ in updated.search(query, 5)]
+    assert matches[0] == 7
+    assert 42 not in matches
+    assert 99 not in [item_id for item_id, _ in updated.search(vectors[98], 5)]
+
+
+@needs_hnswlib
+def test_graph_is_dropped_once_too_many_rows_changed():
+    rng = np.random.default_rng(7)
+    ids = np.arange(1, 51, dtype=np.int64)
+    vectors = _unit(rng.normal(size=(50, 8)))
+    index = VectorIndex(ids, vectors, VectorIndex.build_graph(ids, vectors))
+
+    updated = index.updated(ids[:10], vectors[:10])
+    assert updated.graph is None
+    assert updated.search(vectors[3], 1)[0][0] == 4
+
+
+def test_index_is_persisted_and_memory_mapped_on_reload(store, activities):
+    built = store.get(ACTIVITIES)
+    assert built.ids.tolist() == [activity.id for activity in activities]
+
+    reloaded = EmbeddingIndexStore()
+    index = reloaded.get(ACTIVITIES)
+    assert isinstance(index.vectors, np.memmap)
+    assert np.array_equal(index.vectors, built.vectors)
+    assert reloaded.similar(ACTIVITIES, activities[0].id, count=1)[0][0] == activities[3].id
+
+
+@needs_hnswlib
+def test_graph_is_persisted_with_the_vectors(app, store, activities):
+    app.config['EMBEDDING_HNSW_THRESHOLD'] = 1
+    assert store.get(ACTIVITIES).graph is not None
+
+    index = EmbeddingIndexStore().get(ACTIVITIES)
+    assert isinstance(index.vectors, np.memmap)
+    assert index.graph is not None
+    assert index.search(index.vector(activities[0].id), 1)[0][0] == activities[0].id
+
+
+def test_stale_manifest_is_not_loaded(store, activities):
+    store.get(ACTIVITIES)
+    fingerprint = store._fingerprint(ACTIVITIES)
+    assert store._load(ACTIVITIES, fingerprint) is not None
+    assert store._load(ACTIVITIES, fingerprint + '-other') is None
+
+
+def test_committed_rows_are_patched_in(store, activities):
+    store.get(ACTIVITIES)
+
+    activities[2].title = 'Introductions for new colleagues'
+    db.session.add(Activity(learning_path_id=activities[0].learning_path_id, activity_type='quiz',
+                            title='Vegetables and fruit at the market', content={}, order_in_path=5))
+    db.session.delete(activities[3])
+    db.session.commit()
+
+    index = store.get(ACTIVITIES)
+    assert index.ids.tolist() == [activities[0].id, activities[1].id, activities[2].id, 5]
+    assert store.similar(ACTIVITIES, 5, count=1)[0][0] == activities[1].id
+    assert store.search(ACTIVITIES, 'introductions colleagues', count=1)[0][0] == activities[2].id
+
+
+def test_rolled_back_rows_are_not_patched(store, activities):
+    index = store.get(ACTIVITIES)
+    activities[0].title = 'Not saved'
+    db.session.flush()
+    db.session.rollback()
+    assert store.get(ACTIVITIES) is index
@@ -0,0 +1,20 @@
+from app import create_app
+from config import TestingConfig
+
+
+def test_health_is_public(client):
+    assert client.get('/health').json['status'] == 'healthy'
+
+
+def test_db_pool_metrics_need_a_token(client, auth_headers):
+    assert client.get('/health/db-pool').status_code == 401
+
+    response = client.get('/health/db-pool', headers=auth_headers)
+    assert response.status_code == 200
+    assert 'pools' in response.json
+
+
+def test_db_pool_metrics_can_be_turned_off(app, auth_headers, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'DB_POOL_METRICS_ENABLED', False)
+    client = create_app('testing').test_client()
+    assert client.get('/health/db-pool', headers=auth_headers).status_code == 404
@@ -0,0 +1,142 @@
+from sqlalchemy import event
+from app.models import db, Badge, Chapter, UserChapterProgress, LearningPath, Activity, UserAchievementCounter
+from app.http_cache import response_store
+
+BADGES_URL = '/api/gamification/badges/available'
+CHAPTERS_URL = '/api/chapters/chapters'
+LEARNING_PATHS_URL = '/api/courses/learning-paths'
+
+
+def test_matching_etag_gets_304_without_a_body(client, app):
+    db.session.add(Badge(name='First steps'))
+    db.session.commit()
+
+    response = client.get(BADGES_URL)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert response.cache_control.public
+
+    revalidated = client.get(BADGES_URL, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+
+
+def test_stale_etag_gets_the_new_body(client, app):
+    db.session.add(Badge(name='First steps'))
+    db.session.commit()
+    etag = client.get(BADGES_URL).headers['ETag']
+
+    db.session.add(Badge(name='Week streak'))
+    db.session.commit()
+
+    response = client.get(BADGES_URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [badge['name'] for badge in response.json['available_badges']] == ['First steps', 'Week streak']
+
+
+def test_rendered_body_is_served_from_the_store(client, app):
+    db.session.add(Badge(name='First steps'))
+    db.session.commit()
+    first = client.get(BADGES_URL)
+
+    etag, _ = first.get_etag()
+    assert response_store.get(etag).body == first.data
+
+    response_store.clear()
+    assert client.get(BADGES_URL).data == first.data
+    assert response_store.get(etag).body == first.data
+
+
+def test_per_user_responses_are_private(client, auth_headers):
+    db.session.add(Chapter(title='Greetings', chapter_number=1, topic='greetings'))
+    db.session.commit()
+
+    response = client.get(CHAPTERS_URL, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.cache_control.private
+    assert response.cache_control.no_cache
+    assert 'Authorization' in response.vary
+
+    revalidated = client.get(CHAPTERS_URL, headers={**auth_headers, 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert 'Authorization' in revalidated.vary
+
+
+def test_user_progress_changes_the_etag(client, user, auth_headers):
+    chapter = Chapter(title='Greetings', chapter_number=1, topic='greetings')
+    db.session.add(chapter)
+    db.session.commit()
+    etag = client.get(CHAPTERS_URL, headers=auth_headers).headers['ETag']
+
+    db.session.add(UserChapterProgress(user_id=user.id, chapter_id=chapter.id, status='completed'))
+    db.session.commit()
+
+    response = client.get(CHAPTERS_URL, headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['chapters'][0]['user_progress']['status'] == 'completed'
+
+
+def test_progress_edited_in_place_changes_the_etag(client, user, auth_headers):
+    chapter = Chapter(title='Greetings', chapter_number=1, topic='greetings')
+    db.session.add(chapter)
+    db.session.flush()
+    progress = UserChapterProgress(user_id=user.id, chapter_id=chapter.id, status='in_progress')
+    db.session.add(progress)
+    db.session.commit()
+    etag = client.get(CHAPTERS_URL, headers=auth_headers).headers['ETag']
+
+    progress.status = 'completed'
+    db.session.commit()
+
+    response = client.get(CHAPTERS_URL, headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['chapters'][0]['user_progress']['status'] == 'completed'
+    # The stamp is read, never written
+    assert UserAchievementCounter.query.count() == 0
+
+
+def test_moving_an_activity_between_paths_changes_the_etag(client, auth_headers):
+    paths = [LearningPath(title='Basics'), LearningPath(title='Travel')]
+    db.session.add_all(paths)
+    db.session.flush()
+    activity = Activity(learning_path_id=paths[0].id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1)
+    db.session.add(activity)
+    db.session.commit()
+    etag = client.get(LEARNING_PATHS_URL, headers=auth_headers).headers['ETag']
+
+    activity.title = 'Hello and goodbye'
+    db.session.commit()
+    assert client.get(LEARNING_PATHS_URL, headers={**auth_headers, 'If-None-Match': etag}).status_code == 304
+
+    activity.learning_path_id = paths[1].id
+    db.session.commit()
+    response = client.get(LEARNING_PATHS_URL, headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [path['total_activities'] for path in response.json['learning_paths']] == [0, 1]
+
+
+def test_learning_path_revalidation_skips_the_activity_totals(client, app, auth_headers):
+    db.session.add(LearningPath(title='Basics'))
+    db.session.commit()
+    etag = client.get(LEARNING_PATHS_URL, headers=auth_headers).headers['ETag']
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert client.get(LEARNING_PATHS_URL, headers={**auth_headers, 'If-None-Match': etag}).status_code == 304
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert not any('FROM activities' in statement for statement in statements)
+
+
+def test_other_methods_pass_through(client, auth_headers):
+    chapter = Chapter(title='Greetings', chapter_number=1, topic='greetings')
+    db.session.add(chapter)
+    db.session.commit()
+
+    response = client.post(f'{CHAPTERS_URL}/{chapter.id}/progress', headers=auth_headers, json={})
+    assert 'ETag' not in response.headers
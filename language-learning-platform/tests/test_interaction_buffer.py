@@ -0,0 +1,187 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from sqlalchemy import func
+from app.models import db, Activity, LearningPath, UserActivityLog, UserLearningTimeline, AdaptiveLearningSession
+from app.services.interaction_buffer import InteractionBuffer, SESSION_INTERACTION
+from app.services.real_time_performance_monitor import RealTimePerformanceMonitor
+
+
+@pytest.fixture
+def activity(app):
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activity = Activity(learning_path_id=path.id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1)
+    db.session.add(activity)
+    db.session.commit()
+    return activity
+
+
+def _interaction(is_correct=True):
+    return {'timestamp': '2026-10-19T10:00:00', 'is_correct': is_correct, 'skill_area': 'vocabulary',
+            'interventions': []}
+
+
+def _written():
+    db.session.rollback()  # see rows committed by other connections
+    return db.session.query(func.count(UserLearningTimeline.id)).scalar()
+
+
+def _wait_for_rows(expected, timeout=5):
+    deadline = time.monotonic() + timeout
+    while _written() < expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return _written()
+
+
+def _spill_files(spill_dir):
+    return sorted(os.listdir(spill_dir)) if spill_dir.exists() else []
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_flushes_once_a_batch_is_full(app, user, buffer):
+    app.config['INTERACTION_BUFFER_MAX_EVENTS'] = 3
+    for _ in range(2):
+        buffer.append(1, user.id, _interaction())
+    time.sleep(0.2)
+    assert _written() == 0
+
+    buffer.append(1, user.id, _interaction())
+    assert _wait_for_rows(3) == 3
+
+
+def test_flushes_on_the_interval(app, user, buffer):
+    app.config['INTERACTION_BUFFER_FLUSH_SECONDS'] = 0.2
+    buffer.append(1, user.id, _interaction())
+    assert _wait_for_rows(1) == 1
+
+
+def test_flush_writes_every_pending_event_and_removes_the_spill(user, buffer, spill_dir):
+    buffer.append(1, user.id, _interaction())
+    buffer.append(1, user.id, _interaction(is_correct=False))
+    assert len(_spill_files(spill_dir)) == 1
+
+    assert buffer.flush() == 2
+    rows = UserLearningTimeline.query.order_by(UserLearningTimeline.id).all()
+    assert [(row.event_type, row.event_subtype, row.related_id) for row in rows] == [
+        (SESSION_INTERACTION, 'correct', 1), (SESSION_INTERACTION, 'incorrect', 1)
+    ]
+    assert _spill_files(spill_dir) == []
+
+
+def test_failed_write_keeps_events_pending_and_spilled(user, buffer, spill_dir, monkeypatch):
+    buffer.append(1, user.id, _interaction())
+    buffer.append(1, user.id, _interaction())
+
+    def failing_write(events):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(buffer, '_write', failing_write)
+    assert buffer.flush() == 0
+    assert len(buffer._pending) == 2
+    [segment] = _spill_files(spill_dir)
+    assert len((spill_dir / segment).read_text(encoding='utf-8').splitlines()) == 2
+    assert _written() == 0
+
+    monkeypatch.undo()
+    assert buffer.flush() == 2
+    assert _written() == 2
+    assert _spill_files(spill_dir) == []
+
+
+def _write_segment(path, events, torn_line=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as spill:
+        for event in events:
+            spill.write(json.dumps(event) + '\n')
+        if torn_line:
+            spill.write('{"user_id": ')
+
+
+def _event(user_id, related_id=1):
+    return {'user_id': user_id, 'event_type': SESSION_INTERACTION, 'event_subtype': 'correct',
+            'event_data': _interaction(), 'related_id': related_id, 'related_type': 'adaptive_learning_session',
+            'skill_areas_affected': None, 'difficulty_level': None, 'performance_score': 1.0,
+            'created_at': '2026-10-19T10:00:00'}
+
+
+def test_replays_segments_of_exited_processes(user, spill_dir):
+    dead = _dead_pid()
+    _write_segment(spill_dir / f'interactions-{dead}-0.jsonl', [_event(user.id)] * 2, torn_line=True)
+    # Claimed for replay by a process that died before writing it
+    _write_segment(spill_dir / f'interactions-{dead}-1.jsonl.replay-{dead}', [_event(user.id)])
+    # Still being written by a live process
+    _write_segment(spill_dir / f'interactions-{os.getppid()}-0.jsonl', [_event(user.id)])
+
+    assert InteractionBuffer().replay_orphaned_spills() == 3
+    assert _written() == 3
+    assert _spill_files(spill_dir) == [f'interactions-{os.getppid()}-0.jsonl']
+
+
+def test_failed_replay_leaves_the_segment_for_the_next_process(user, spill_dir, monkeypatch):
+    dead = _dead_pid()
+    _write_segment(spill_dir / f'interactions-{dead}-0.jsonl', [_event(user.id)])
+    replaying = InteractionBuffer()
+
+    def failing_write(events):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(replaying, '_write', failing_write)
+    assert replaying.replay_orphaned_spills() == 0
+    assert _spill_files(spill_dir) == [f'interactions-{dead}-0.jsonl']
+
+
+def _run_session(monitor, user, activity, answers):
+    monitor.start_learning_session(user.id, activity.id)
+    for is_correct in answers:
+        result = monitor.track_user_interaction(user.id, {
+            'is_correct': is_correct, 'response_time_seconds': 12, 'skill_area': 'vocabulary',
+            'question_type': 'multiple_choice'
+        })
+        assert 'error' not in result
+    db.session.add(UserActivityLog(user_id=user.id, activity_id=activity.id, score=2, max_score=3))
+    db.session.commit()
+
+
+def test_ended_session_stores_its_whole_timeline(app, user, activity, buffer):
+    monitor = RealTimePerformanceMonitor()
+    _run_session(monitor, user, activity, [True, False, True])
+
+    summary = monitor.end_learning_session(user.id)['session_summary']
+    assert summary['total_interactions'] == 3
+
+    db.session.expire_all()
+    record = AdaptiveLearningSession.query.one()
+    log = UserActivityLog.query.one()
+    assert record.session_status == 'completed'
+    assert record.interaction_count == 3
+    assert log.session_id == record.session_id
+    assert [event['is_correct'] for event in log.interaction_timeline] == [True, False, True]
+    assert buffer._pending == []
+
+
+def test_interactions_written_after_the_end_are_consolidated(app, user, activity, buffer):
+    app.config['INTERACTION_BUFFER_FLUSH_SECONDS'] = 0.2
+    monitor = RealTimePerformanceMonitor()
+    _run_session(monitor, user, activity, [True, False, True])
+    # Still held by another worker when the session ends
+    with buffer._lock:
+        late = buffer._pending.pop()
+
+    monitor.end_learning_session(user.id)
+    db.session.expire_all()
+    assert len(UserActivityLog.query.one().interaction_timeline) == 2
+
+    with buffer._lock:
+        buffer._pending.append(late)
+    assert buffer.flush() == 1
+    db.session.expire_all()
+    assert [event['is_correct'] for event in UserActivityLog.query.one().interaction_timeline] == [True, False, True]
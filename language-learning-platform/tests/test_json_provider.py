@@ -0,0 +1,79 @@
+import json
+from datetime import date, datetime
+import numpy as np
+import pytest
+from app import json_provider
+from app.json_provider import FastJSONProvider
+from app.services.reference_data import BadgeInfo
+
+PAYLOAD = {
+    'word': 'నమస్కారం',
+    'meaning': 'hello',
+    'completed_at': datetime(2026, 10, 14, 12, 30, 5),
+    'due': date(2026, 10, 15),
+    'scores': [1, 2.5, None, True],
+    'nested': {'z': 1, 'a': 2},
+}
+
+
+@pytest.fixture
+def provider(app):
+    return FastJSONProvider(app)
+
+
+@pytest.fixture
+def stdlib_provider(app, monkeypatch):
+    # The same provider as it behaves without orjson installed
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    return FastJSONProvider(app)
+
+
+def test_telugu_is_not_escaped(provider):
+    encoded = provider.dump_bytes({'word': 'నమస్కారం'})
+    assert encoded == '{"word":"నమస్కారం"}'.encode('utf-8')
+    assert b'\\u' not in encoded
+
+
+def test_dates_are_iso_8601(provider, stdlib_provider):
+    for candidate in (provider, stdlib_provider):
+        assert candidate.loads(candidate.dumps(PAYLOAD))['completed_at'] == '2026-10-14T12:30:05'
+        assert candidate.loads(candidate.dumps(PAYLOAD))['due'] == '2026-10-15'
+
+
+def test_named_tuples_encode_as_lists(provider, stdlib_provider):
+    badge = BadgeInfo(*range(len(BadgeInfo._fields)))
+    expected = json.dumps({'badges': [list(badge)]}, separators=(',', ':'))
+    assert provider.dumps({'badges': [badge]}) == expected
+    assert stdlib_provider.dumps({'badges': [badge]}) == expected
+
+
+def test_numpy_values_are_encoded(provider):
+    assert provider.dumps({'mean': np.float64(0.5), 'counts': np.array([1, 2])}) == '{"mean":0.5,"counts":[1,2]}'
+
+
+def test_big_integers_fall_back_to_the_stdlib_encoder(provider):
+    big = 2 ** 64 + 1
+    assert provider.dumps({'id': big, 'word': 'నమస్కారం'}) == f'{{"id":{big},"word":"నమస్కారం"}}'
+
+
+def test_output_matches_the_stdlib_provider(provider, stdlib_provider):
+    assert provider.dumps(PAYLOAD) == stdlib_provider.dumps(PAYLOAD)
+    assert provider.dumps(PAYLOAD, sort_keys=True) == stdlib_provider.dumps(PAYLOAD, sort_keys=True)
+    assert provider.dumps(PAYLOAD, indent=2) == stdlib_provider.dumps(PAYLOAD, indent=2)
+    assert provider.loads(provider.dumps(PAYLOAD)) == stdlib_provider.loads(stdlib_provider.dumps(PAYLOAD))
+
+
+def test_loads_falls_back_for_input_orjson_rejects(provider):
+    assert provider.loads('{"word": "నమస్కారం"}') == {'word': 'నమస్కారం'}
+    assert str(provider.loads('[NaN]')[0]) == 'nan'
+
+
+def test_responses_use_the_provider(app, client):
+    @app.route('/_json_probe')
+    def probe():
+        return PAYLOAD
+
+    response = client.get('/_json_probe')
+    assert response.mimetype == 'application/json'
+    assert 'నమస్కారం'.encode('utf-8') in response.data
+    assert response.get_json()['completed_at'] == '2026-10-14T12:30:05'
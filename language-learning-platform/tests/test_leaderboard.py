@@ -0,0 +1,153 @@
+from datetime import date, datetime, timedelta
+import pytest
+from app.models import db, Activity, Badge, LeaderboardLedger, LearningPath, Profile, User
+from app.services.achievement_service import AchievementService, POINTS_AWARDED
+from app.services.gamification_service import GamificationService
+from app.services.leaderboard_service import (
+    ALL_TIME, ALL_TIME_START, DAILY, WEEKLY, LeaderboardService, SortedLeaderboard, period_start
+)
+from app.services.progress_service import ProgressService
+
+
+@pytest.fixture
+def players(app):
+    players = []
+    for name in ('anil', 'bhanu', 'chitra', 'deepa'):
+        user = User(username=name, email=f'{name}@example.com')
+        user.set_password('password')
+        user.profile = Profile(points=0)
+        db.session.add(user)
+        players.append(user)
+    db.session.commit()
+    return players
+
+
+@pytest.fixture
+def activity(app):
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activity = Activity(learning_path_id=path.id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1, points_reward=20)
+    db.session.add(activity)
+    db.session.commit()
+    return activity
+
+
+def _ranking(period=ALL_TIME):
+    return [(entry['rank'], entry['username'], entry['points']) for entry in LeaderboardService.get_top(period)]
+
+
+def _ledger(user, period=ALL_TIME):
+    return LeaderboardLedger.query.filter_by(user_id=user.id, period=period).one().points
+
+
+def test_sorted_leaderboard_ranks_with_shared_ties():
+    board = SortedLeaderboard([(1, 50), (2, 80), (3, 50), (4, 10), (5, 0)])
+    assert len(board) == 4  # users without points are not ranked
+    assert board.top(10) == [(1, 2, 80), (2, 1, 50), (2, 3, 50), (4, 4, 10)]
+    assert board.rank(3) == 2
+    assert board.rank(5) is None
+
+    board.add(4, 45)
+    assert board.rank(4) == 2
+    assert board.rank(1) == 3
+    assert board.around(1, 1) == [(2, 4, 55), (3, 1, 50), (3, 3, 50)]
+
+    board.set(2, 0)
+    assert board.rank(2) is None
+    assert board.top(1) == [(1, 4, 55)]
+
+
+def test_period_start_of_windows():
+    wednesday = date(2026, 10, 14)
+    assert period_start(DAILY, wednesday) == wednesday
+    assert period_start(WEEKLY, wednesday) == date(2026, 10, 12)
+    assert period_start(ALL_TIME, wednesday) == date(1970, 1, 1)
+
+
+def test_committed_points_update_loaded_boards(players):
+    anil, bhanu, chitra, _ = players
+    assert _ranking() == []  # loads the windows before any award
+
+    for user, points in ((anil, 30), (bhanu, 50), (chitra, 30)):
+        LeaderboardService.record_points(user.id, points)
+    db.session.commit()
+
+    for period in (ALL_TIME, WEEKLY, DAILY):
+        assert _ranking(period) == [(1, 'bhanu', 50), (2, 'anil', 30), (2, 'chitra', 30)]
+    rank = LeaderboardService.get_user_rank(chitra.id, neighbours=1)
+    assert (rank['rank'], rank['points'], rank['total_ranked_users']) == (2, 30, 3)
+    assert [entry['username'] for entry in rank['neighbours']] == ['anil', 'chitra']
+
+
+def test_rolled_back_points_are_not_applied(players):
+    assert _ranking() == []
+    LeaderboardService.record_points(players[0].id, 40)
+    db.session.rollback()
+    assert _ranking() == []
+    assert LeaderboardLedger.query.count() == 0
+
+
+def test_boards_sync_ledger_rows_written_elsewhere(app, players):
+    app.config['LEADERBOARD_SYNC_INTERVAL_SECONDS'] = 0
+    assert _ranking() == []
+    # Another process awarded these; only the ledger knows
+    db.session.add(LeaderboardLedger(user_id=players[3].id, period=ALL_TIME, period_start=ALL_TIME_START,
+                                     points=70, updated_at=datetime.utcnow()))
+    db.session.commit()
+    assert _ranking() == [(1, 'deepa', 70)]
+
+
+def test_prune_drops_only_expired_windows(players):
+    today = datetime.utcnow().date()
+    old_day, old_week = today - timedelta(days=30), period_start(WEEKLY, today) - timedelta(weeks=20)
+    db.session.add_all([
+        LeaderboardLedger(user_id=players[0].id, period=DAILY, period_start=old_day, points=5),
+        LeaderboardLedger(user_id=players[0].id, period=WEEKLY, period_start=old_week, points=5),
+    ])
+    LeaderboardService.record_points(players[0].id, 5)
+    db.session.commit()
+
+    assert LeaderboardService.prune_expired_windows() == {DAILY: 1, WEEKLY: 1}
+    assert LeaderboardLedger.query.count() == 3
+
+
+def test_completing_an_activity_ranks_the_user(players, activity):
+    anil, bhanu, _, _ = players
+    _ranking()
+    progress = ProgressService()
+    progress.update_user_activity_log(anil.id, activity.id, 5, 5, {})
+    progress.update_user_activity_log(bhanu.id, activity.id, 2, 5, {})
+
+    assert _ledger(anil) == 20 and _ledger(bhanu, DAILY) == 8
+    assert _ranking() == [(1, 'anil', 20), (2, 'bhanu', 8)]
+
+
+def test_awarding_a_badge_ranks_the_user(players):
+    db.session.add(Badge(name='Helper', points_reward=15))
+    db.session.commit()
+    _ranking()
+
+    gamification = GamificationService()
+    assert gamification.award_badge(players[1].id, 'Helper') is True
+    assert gamification.award_badge(players[1].id, 'Helper') is False  # no second award
+
+    assert _ledger(players[1], WEEKLY) == 15
+    assert _ranking() == [(1, 'bhanu', 15)]
+
+
+def test_achievement_badges_rank_the_user(players):
+    db.session.add_all([
+        Badge(name='Hundred', requirement_type='points_earned', requirement_value=100, points_reward=25),
+        Badge(name='Big spender', requirement_type='points_earned', requirement_value=125, points_reward=10),
+    ])
+    players[2].profile.points = 100
+    db.session.commit()
+    _ranking()
+
+    # The first badge's bonus unlocks the second in the same evaluation
+    awarded = AchievementService.evaluate(players[2].id, [POINTS_AWARDED])
+    assert [badge['name'] for badge in awarded] == ['Hundred', 'Big spender']
+    assert _ledger(players[2]) == 35
+    assert _ranking(DAILY) == [(1, 'chitra', 35)]
@@ -0,0 +1,176 @@
+import json
+import threading
+import pytest
+import simple_websocket
+from flask_jwt_extended import create_access_token
+from itsdangerous import TimestampSigner
+from werkzeug.serving import make_server
+from app.models import db, Activity, LearningPath
+
+API = '/api/adaptive'
+
+
+@pytest.fixture
+def activity(app):
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activity = Activity(learning_path_id=path.id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1)
+    db.session.add(activity)
+    db.session.commit()
+    return activity
+
+
+@pytest.fixture
+def short_streams(app):
+    app.config.update(LIVE_EVENTS_POLL_SECONDS=0.05, LIVE_EVENTS_MAX_STREAM_SECONDS=0.3)
+
+
+def _start(client, auth_headers, activity):
+    response = client.post(f'{API}/activity/{activity.id}/start-session', headers=auth_headers)
+    assert response.status_code == 200
+    return response.json['session']['session_id']
+
+
+def _slow_answer(client, auth_headers):
+    # Right but slow: only a hint_suggestion intervention, every time
+    response = client.post(f'{API}/session/track-interaction', headers=auth_headers,
+                           json={'is_correct': True, 'response_time_seconds': 90, 'skill_area': 'vocabulary'})
+    assert response.status_code == 200
+    return response
+
+
+def _ticket(client, auth_headers):
+    response = client.post(f'{API}/session/events/ticket', headers=auth_headers)
+    assert response.status_code == 200
+    return response.json['ticket']
+
+
+def _events(response):
+    """(id, event) of every event in a server-sent events body."""
+    events = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields.get('id'), fields['event']))
+    return events
+
+
+def test_ticket_opens_the_event_stream(client, auth_headers, activity, buffer, short_streams):
+    session_id = _start(client, auth_headers, activity)
+    _slow_answer(client, auth_headers)
+
+    response = client.get(f'{API}/session/events?ticket={_ticket(client, auth_headers)}')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert _events(response) == [(f'{session_id}:1', 'intervention')]
+
+
+def test_expired_ticket_is_rejected(app, client, auth_headers, monkeypatch):
+    ticket = _ticket(client, auth_headers)
+    issued_at = TimestampSigner.get_timestamp
+    monkeypatch.setattr(TimestampSigner, 'get_timestamp',
+                        lambda self: issued_at(self) + app.config['LIVE_EVENTS_TICKET_SECONDS'] + 1)
+
+    response = client.get(f'{API}/session/events?ticket={ticket}')
+    assert response.status_code == 401
+    assert response.json['error'] == 'Invalid or expired ticket'
+
+
+@pytest.mark.parametrize('ticket', ['not-a-ticket', 'jwt'])
+def test_forged_tickets_are_rejected(client, auth_headers, ticket):
+    if ticket == 'jwt':
+        # A bearer token is not a ticket
+        ticket = auth_headers['Authorization'].split()[1]
+    assert client.get(f'{API}/session/events?ticket={ticket}').status_code == 401
+
+
+def test_event_stream_needs_authentication(client, auth_headers):
+    assert client.get(f'{API}/session/events').status_code == 401
+    token = auth_headers['Authorization'].split()[1]
+    assert client.get(f'{API}/session/events?jwt={token}').status_code == 401
+
+
+def test_interactions_posted_over_http_reach_the_stream(client, auth_headers, activity, buffer, short_streams):
+    session_id = _start(client, auth_headers, activity)
+    for _ in range(3):
+        _slow_answer(client, auth_headers)
+
+    response = client.get(f'{API}/session/events', headers=auth_headers)
+    assert _events(response) == [(f'{session_id}:{seq}', 'intervention') for seq in (1, 2, 3)]
+
+
+def test_last_event_id_resumes_within_the_session(client, auth_headers, activity, buffer, short_streams):
+    session_id = _start(client, auth_headers, activity)
+    for _ in range(3):
+        _slow_answer(client, auth_headers)
+
+    response = client.get(f'{API}/session/events', headers={**auth_headers, 'Last-Event-ID': f'{session_id}:2'})
+    assert _events(response) == [(f'{session_id}:3', 'intervention')]
+
+
+def test_last_event_id_of_another_session_starts_over(client, auth_headers, activity, buffer, short_streams):
+    first_session_id = _start(client, auth_headers, activity)
+    for _ in range(3):
+        _slow_answer(client, auth_headers)
+    session_id = _start(client, auth_headers, activity)
+    assert session_id != first_session_id
+    _slow_answer(client, auth_headers)
+
+    response = client.get(f'{API}/session/events',
+                          headers={**auth_headers, 'Last-Event-ID': f'{first_session_id}:3'})
+    assert _events(response) == [(f'{session_id}:1', 'intervention')]
+
+
+def test_stream_ends_with_the_session(client, auth_headers, short_streams):
+    response = client.get(f'{API}/session/events', headers=auth_headers)
+    assert _events(response) == [(None, 'session_ended')]
+
+
+@pytest.fixture
+def server(app):
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'ws://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def _receive(ws):
+    return json.loads(ws.receive(timeout=5))
+
+
+def test_websocket_session(server, user, activity, buffer):
+    token = create_access_token(identity=str(user.id))
+    ws = simple_websocket.Client.connect(f'{server}{API}/session/live?jwt={token}')
+    try:
+        ws.send(json.dumps({'type': 'ping'}))
+        assert _receive(ws) == {'type': 'pong'}
+
+        ws.send(json.dumps({'type': 'start', 'activity_id': activity.id}))
+        assert _receive(ws)['monitoring_active'] is True
+
+        ws.send(json.dumps({'type': 'interaction', 'is_correct': True, 'response_time_seconds': 90}))
+        tracked = _receive(ws)
+        assert tracked['type'] == 'tracking_result'
+        assert tracked['session_performance']['total_interactions'] == 1
+        event = _receive(ws)
+        assert (event['type'], event['seq'], event['intervention']['type']) == ('intervention', 1, 'hint_suggestion')
+
+        ws.send(json.dumps({'type': 'interaction', 'is_correct': True}))
+        assert _receive(ws) == {'type': 'error', 'error': 'response_time_seconds is required'}
+
+        ws.send(json.dumps({'type': 'end'}))
+        assert _receive(ws)['session_ended'] is True
+    finally:
+        ws.close()
+
+
+def test_websocket_needs_a_valid_token(server):
+    ws = simple_websocket.Client.connect(f'{server}{API}/session/live?jwt=invalid')
+    message = _receive(ws)
+    assert (message['type'], message['error']) == ('error', 'Authentication required')
+    with pytest.raises(simple_websocket.ConnectionClosed):
+        ws.receive(timeout=5)
+    assert ws.close_reason == 1008
@@ -0,0 +1,13 @@
+import pytest
+from app.prefork import prepare_fork
+from config import ProductionConfig
+
+
+def test_several_workers_need_shared_session_state(app):
+    app.config['SESSION_STATE_BACKEND'] = 'memory'
+    with pytest.raises(RuntimeError, match='SESSION_STATE_BACKEND'):
+        prepare_fork(app, workers=4)
+
+
+def test_production_shares_session_state_by_default():
+    assert ProductionConfig.SESSION_STATE_BACKEND.startswith(('sqlite:///', 'redis://', 'rediss://', 'unix://'))
@@ -0,0 +1,82 @@
+import pytest
+from app.models import db, Badge, Chapter, ChapterDependency, UserBadge
+from app.services.reference_data import reference_data, freeze
+
+
+@pytest.fixture
+def badges(app):
+    badges = [Badge(name=f'Badge {i}', requirement_type='activities_completed', requirement_value=i)
+              for i in range(1, 4)]
+    db.session.add_all(badges)
+    db.session.commit()
+    return badges
+
+
+def test_insert_bumps_version(app):
+    assert reference_data.versions('badges') == (0,)
+    db.session.add(Badge(name='First steps'))
+    db.session.commit()
+    assert reference_data.versions('badges') == (1,)
+
+
+def test_snapshot_is_reused_until_the_table_changes(badges):
+    snapshot = reference_data.badges()
+    assert [badge.name for badge in snapshot] == ['Badge 1', 'Badge 2', 'Badge 3']
+    assert reference_data.badges() is snapshot
+
+    badges[0].name = 'Renamed'
+    db.session.commit()
+
+    assert reference_data.badges() is not snapshot
+    assert reference_data.badges()[0].name == 'Renamed'
+
+
+def test_delete_refreshes_snapshot(badges):
+    reference_data.badges()
+    db.session.delete(badges[1])
+    db.session.commit()
+    assert [badge.name for badge in reference_data.badges()] == ['Badge 1', 'Badge 3']
+
+
+def test_rolled_back_write_keeps_snapshot(badges):
+    snapshot = reference_data.badges()
+    version = reference_data.versions('badges')
+
+    badges[0].name = 'Not saved'
+    db.session.flush()
+    db.session.rollback()
+
+    assert reference_data.versions('badges') == version
+    assert reference_data.badges() is snapshot
+
+
+def test_writes_to_other_tables_leave_snapshot_alone(badges, user):
+    snapshot = reference_data.badges()
+    db.session.add(UserBadge(user_id=user.id, badge_id=badges[0].id))
+    db.session.commit()
+    assert reference_data.badges() is snapshot
+
+
+def test_chapter_graph_follows_dependency_writes(app):
+    chapters = [Chapter(title=f'Chapter {i}', chapter_number=i, topic='greetings') for i in range(1, 4)]
+    db.session.add_all(chapters)
+    db.session.flush()
+    db.session.add(ChapterDependency(chapter_id=chapters[1].id, prerequisite_chapter_id=chapters[0].id))
+    db.session.commit()
+    assert dict(reference_data.chapter_graph().strict_prerequisites) == {chapters[1].id: (chapters[0].id,)}
+
+    db.session.add(ChapterDependency(chapter_id=chapters[2].id, prerequisite_chapter_id=chapters[1].id,
+                                     is_strict=False))
+    db.session.commit()
+    graph = reference_data.chapter_graph()
+    assert len(graph.edges) == 2
+    assert chapters[2].id not in graph.strict_prerequisites
+
+
+def test_snapshots_are_read_only():
+    frozen = freeze({'subtopics': ['verbs', {'tenses': ['past']}]})
+    assert frozen['subtopics'] == ('verbs', {'tenses': ('past',)})
+    with pytest.raises(TypeError):
+        frozen['subtopics'] = ()
+    with pytest.raises(TypeError):
+        frozen['subtopics'][1].update(tenses=())
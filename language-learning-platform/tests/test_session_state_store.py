@@ -0,0 +1,133 @@
+import threading
+import time
+import pytest
+from app.services import session_state_store
+from app.services.session_state_store import (
+    MemorySessionBackend, SessionStateStore, append_bounded, session_states
+)
+from app.services.real_time_performance_monitor import RealTimePerformanceMonitor
+from app.models import db, Activity, LearningPath
+
+
+@pytest.fixture
+def sqlite_backend(app, tmp_path):
+    app.config['SESSION_STATE_BACKEND'] = f"sqlite:///{tmp_path / 'sessions.db'}"
+
+
+def _increment(state):
+    state = state or {'count': 0}
+    state['count'] += 1
+    return state, state['count']
+
+
+def test_append_bounded_keeps_the_newest_items():
+    items = []
+    for item in range(5):
+        append_bounded(items, item, 3)
+    assert items == [2, 3, 4]
+
+
+def test_memory_sessions_expire_after_idle_ttl():
+    backend = MemorySessionBackend(ttl=0.1, max_sessions=10)
+    backend.update('1', lambda state: ({'step': 1}, None))
+    assert backend.read('1') == {'step': 1}
+
+    time.sleep(0.15)
+    assert backend.read('1') is None
+    assert backend.update('1', lambda state: (state, state)) is None
+
+
+def test_memory_sessions_evict_the_least_recently_updated():
+    backend = MemorySessionBackend(ttl=60, max_sessions=2)
+    backend.update('1', _increment)
+    backend.update('2', _increment)
+    backend.update('1', _increment)
+    backend.update('3', _increment)
+
+    assert backend.read('1') == {'count': 2}
+    assert backend.read('2') is None
+    assert backend.read('3') == {'count': 1}
+
+
+def test_mutate_returning_none_deletes(app):
+    store = SessionStateStore()
+    store.put(1, {'step': 1})
+    assert store.pop(1) == {'step': 1}
+    assert store.get(1) is None
+
+
+def test_sqlite_sessions_are_shared_between_stores(sqlite_backend):
+    # As two worker processes would see it
+    first, second = SessionStateStore(), SessionStateStore()
+    first.put(7, {'count': 1})
+    assert second.get(7) == {'count': 1}
+
+    assert second.update(7, _increment) == 2
+    assert first.get(7) == {'count': 2}
+
+
+def test_sqlite_updates_are_serialized(app, sqlite_backend):
+    stores = [SessionStateStore(), SessionStateStore()]
+
+    def work(store):
+        with app.app_context():
+            for _ in range(25):
+                store.update('shared', _increment)
+
+    threads = [threading.Thread(target=work, args=(stores[i % 2],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stores[0].get('shared') == {'count': 100}
+
+
+def test_sqlite_sessions_expire_after_idle_ttl(app, sqlite_backend):
+    app.config['SESSION_STATE_TTL_SECONDS'] = 0.1
+    store = SessionStateStore()
+    store.put(1, {'step': 1})
+    time.sleep(0.15)
+    assert store.get(1) is None
+
+
+def test_unsupported_backend_is_rejected(app):
+    app.config['SESSION_STATE_BACKEND'] = 'memcached://localhost'
+    with pytest.raises(ValueError):
+        SessionStateStore().get(1)
+
+
+@pytest.mark.skipif(session_state_store.redis is not None, reason='redis is installed')
+def test_redis_backend_needs_the_redis_package(app):
+    app.config['SESSION_STATE_BACKEND'] = 'redis://localhost:6379/0'
+    with pytest.raises(RuntimeError, match='redis'):
+        SessionStateStore().get(1)
+
+
+def test_session_averages_stay_exact_past_the_history_limit(app, user, buffer):
+    app.config['SESSION_HISTORY_LENGTH'] = 3
+    path = LearningPath(title='Basics')
+    db.session.add(path)
+    db.session.flush()
+    activity = Activity(learning_path_id=path.id, activity_type='quiz', title='Greetings', content={},
+                        order_in_path=1)
+    db.session.add(activity)
+    db.session.commit()
+
+    monitor = RealTimePerformanceMonitor()
+    monitor.start_learning_session(user.id, activity.id)
+    for seconds in range(1, 11):
+        result = monitor.track_user_interaction(user.id, {
+            'is_correct': seconds % 2 == 0, 'response_time_seconds': seconds, 'skill_area': f'skill-{seconds}'
+        })
+
+    assert result['session_performance']['average_response_time'] == 5.5
+    assert result['session_performance']['current_accuracy'] == 0.5
+    state = session_states.get(user.id)
+    assert state['time_spent_per_question'] == [8, 9, 10]
+    assert len(state['performance_history']) == 3
+    assert len(state['error_patterns']) == 3
+
+    summary = monitor.end_learning_session(user.id)['session_summary']
+    assert summary['total_interactions'] == 10
+    assert summary['average_response_time'] == 5.5
+    assert summary['final_accuracy'] == 0.5
@@ -0,0 +1,88 @@
+from datetime import date, datetime
+import pytest
+from app.models import db, LearningStreak, Profile
+from app.services.streak_service import (
+    ACTIVITY_SPECIFIC, DAILY, StreakService, effective_streak, local_date
+)
+
+
+@pytest.fixture
+def learner(user):
+    user.timezone = 'Asia/Kolkata'  # UTC+05:30
+    db.session.add(Profile(user_id=user.id))
+    db.session.commit()
+    return user
+
+
+def _record(user, occurred_at, activity_type='quiz'):
+    grew = StreakService.record_activity(user.id, activity_type, None, occurred_at)
+    db.session.commit()
+    return grew
+
+
+def _streak(user, streak_type=DAILY):
+    return LearningStreak.query.filter_by(user_id=user.id, streak_type=streak_type).one()
+
+
+def test_local_date_changes_at_local_midnight():
+    assert local_date('Asia/Kolkata', datetime(2026, 10, 14, 18, 29)) == date(2026, 10, 14)
+    assert local_date('Asia/Kolkata', datetime(2026, 10, 14, 18, 30)) == date(2026, 10, 15)
+    assert local_date('America/Los_Angeles', datetime(2026, 10, 15, 6, 59)) == date(2026, 10, 14)
+    assert local_date('America/Los_Angeles', datetime(2026, 10, 15, 7, 0)) == date(2026, 10, 15)
+
+
+def test_unknown_timezone_counts_days_in_utc():
+    assert local_date('Mars/Olympus_Mons', datetime(2026, 10, 14, 23, 59)) == date(2026, 10, 14)
+
+
+def test_activities_on_either_side_of_local_midnight_extend_the_streak(learner):
+    # 23:50 and 00:10 in Kolkata; the same UTC day
+    assert _record(learner, datetime(2026, 10, 14, 18, 20)) is True
+    assert _record(learner, datetime(2026, 10, 14, 18, 40)) is True
+
+    assert learner.profile.current_streak == 2
+    assert learner.profile.last_activity_date == date(2026, 10, 15)
+    assert _streak(learner).current_streak == 2
+    assert _streak(learner, ACTIVITY_SPECIFIC).current_streak == 2
+
+
+def test_activities_within_one_local_day_count_once(learner):
+    # 00:10 and 23:50 in Kolkata; different UTC days
+    assert _record(learner, datetime(2026, 10, 13, 18, 40)) is True
+    assert _record(learner, datetime(2026, 10, 14, 18, 20)) is False
+
+    assert learner.profile.current_streak == 1
+    assert _streak(learner).current_streak == 1
+
+
+def test_streak_breaks_after_a_missed_local_day(learner):
+    for day in (12, 13, 14):
+        _record(learner, datetime(2026, 10, day, 12, 0))
+    assert learner.profile.current_streak == 3
+
+    # Nothing on the 15th local time; the next activity starts over
+    _record(learner, datetime(2026, 10, 16, 12, 0))
+    assert learner.profile.current_streak == 1
+    assert learner.profile.longest_streak == 3
+    streak = _streak(learner)
+    assert (streak.current_streak, streak.longest_streak, streak.streak_start_date) == (1, 3, date(2026, 10, 16))
+
+
+def test_reads_treat_a_lapsed_streak_as_broken(learner):
+    _record(learner, datetime(2026, 10, 13, 12, 0))
+    _record(learner, datetime(2026, 10, 14, 12, 0))
+
+    assert StreakService.get_daily_streak(learner, today=date(2026, 10, 15))['current_streak'] == 2
+    assert StreakService.get_daily_streak(learner, today=date(2026, 10, 16))['current_streak'] == 0
+    assert effective_streak(2, date(2026, 10, 14), date(2026, 10, 16)) == 0
+
+
+def test_refresh_zeroes_lapsed_streaks(learner):
+    _record(learner, datetime(2020, 1, 1, 12, 0))
+    assert StreakService.get_active_streaks(learner.id) == []
+
+    assert StreakService.refresh(learner.id) is True
+    db.session.commit()
+    assert learner.profile.current_streak == 0
+    assert learner.profile.longest_streak == 1
+    assert LearningStreak.query.filter_by(user_id=learner.id, is_active=True).count() == 0
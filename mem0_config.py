@@ -1,6 +1,6 @@
+import functools
 import os
 from dotenv import load_dotenv
-from mem0 import Memory
 
 # # Set environment variables
 load_dotenv()
@@ -41,5 +41,16 @@ config = {
     "custom_fact_extraction_prompt": "Extract key facts and preferences from the conversation",
 }
 
-# Initialize Memory
-memory_agent = Memory.from_config(config)
\ No newline at end of file
+
+@functools.lru_cache(maxsize=None)
+def get_memory_agent():
+    """Build the Memory client on first use; importing mem0 loads its vector store and LLM SDKs."""
+    from mem0 import Memory
+    return Memory.from_config(config)
+
+
+def __getattr__(name):
+    # Keeps `from mem0_config import memory_agent` working without building it at import
+    if name == 'memory_agent':
+        return get_memory_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")